@@ -0,0 +1,108 @@
+"""
+Broadcast benchmark against a local fake Bot API server.
+
+The fake server answers sendMessage like Telegram does, rejects blocked chats with 403 and answers a share of
+requests with 429 and a retry-after, so that throttling and retries are exercised without touching the real API:
+
+    python -m benchmarks.broadcast_benchmark --users 2000 --rate 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from bot.enums.enums import BroadcastTarget, UserRole
+from bot.enums.language import Language
+from bot.services.broadcast import Broadcaster
+from bot.services.database.pool import close_pool
+from bot.services.database.response import user as db_user
+from bot.services.database.response.base import initialize
+
+FIRST_TG_ID = 10 ** 9
+
+
+def _fake_api(blocked_every: int, flood_share: float, retry_after: int) -> tuple[web.Application, Counter]:
+    received = Counter()
+
+    async def send_message(request: web.Request) -> web.Response:
+        data = await request.post()
+        chat_id = int(data['chat_id'])
+        if random.random() < flood_share:
+            return web.json_response({'ok': False, 'error_code': 429,
+                                      'description': f'Too Many Requests: retry after {retry_after}',
+                                      'parameters': {'retry_after': retry_after}}, status=429)
+        if blocked_every and chat_id % blocked_every == 0:
+            return web.json_response({'ok': False, 'error_code': 403,
+                                      'description': 'Forbidden: bot was blocked by the user'}, status=403)
+        received[chat_id] += 1
+        return web.json_response({'ok': True, 'result': {
+            'message_id': sum(received.values()), 'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'}, 'text': data['text'],
+        }})
+
+    app = web.Application()
+    app.router.add_post('/bot{token}/sendMessage', send_message)
+    return app, received
+
+
+async def run(users: int, rate: float, concurrency: int, page_size: int, port: int,
+              blocked_every: int, flood_share: float) -> None:
+    Language.DEFAULT = Language.ALL[0]
+    app, received = _fake_api(blocked_every, flood_share, retry_after=1)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+
+    db_dir = tempfile.mkdtemp(prefix='broadcast_bench_')
+    await initialize(os.path.join(db_dir, 'bench.db'))
+    bot = Bot(token='42:fake', session=AiohttpSession(api=TelegramAPIServer.from_base(f'http://127.0.0.1:{port}')))
+    try:
+        await db_user.import_users([(FIRST_TG_ID + i, f'User {i}', 1 + i % 2, UserRole.USER.value, Language.DEFAULT)
+                                    for i in range(users)])
+        broadcaster = Broadcaster(bot, rate=rate, per_chat_rate=1, concurrency=concurrency, page_size=page_size)
+        broadcast_id = await broadcaster.create('Benchmark announcement', BroadcastTarget.ALL)
+
+        started = time.perf_counter()
+        report = await broadcaster.run(broadcast_id)
+        elapsed = time.perf_counter() - started
+        print(f"{report.total} recipients in {elapsed:.2f}s -> {report.total / elapsed:.0f} msg/s "
+              f"(rate limit {rate}/s, concurrency {concurrency}, page {page_size})")
+        print(report)
+
+        duplicates = sum(1 for count in received.values() if count > 1)
+        assert report.sent == len(received), f"Report says {report.sent} sent, server got {len(received)} chats"
+        assert duplicates == 0, f"{duplicates} chats received the message more than once"
+        print("every reachable chat received the message exactly once")
+    finally:
+        await bot.session.close()
+        await close_pool()
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--port', type=int, default=8181)
+    parser.add_argument('--blocked-every', type=int, default=50, help='every n-th chat has blocked the bot')
+    parser.add_argument('--flood-share', type=float, default=0.001, help='share of requests answered with 429')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(run(args.users, args.rate, args.concurrency, args.page_size, args.port,
+                    args.blocked_every, args.flood_share))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+End-to-end handler benchmark.
+
+Builds the real Dispatcher with ``loader.loading_data`` against a temporary database, swaps the Bot session for a
+stub that answers every API call locally, and feeds synthetic updates through ``dp.feed_update``:
+
+    python -m benchmarks.handlers_benchmark --users 500 --concurrency 32
+    python -m benchmarks.handlers_benchmark --compare benchmarks/results/handlers_<previous>.json
+
+Each registration step is measured separately, results are written as JSON for comparison between commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Optional
+
+# Config reads the environment on import
+os.environ.setdefault('SUPERUSER_IDS', '1')
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.methods import EditMessageText, SendMessage, TelegramMethod  # noqa: E402
+from aiogram.methods.base import TelegramType  # noqa: E402
+from aiogram.types import Chat, Message, Update  # noqa: E402
+
+from bot import loader  # noqa: E402
+from bot.config import Config  # noqa: E402
+from bot.services.database.pool import close_pool  # noqa: E402
+from bot.utils.logger import stop_logger  # noqa: E402
+
+SECRET_PHRASE = 'benchmark-secret'
+FIRST_TG_ID = 10 ** 9
+RESULTS_DIR = 'benchmarks/results'
+
+
+class StubSession(BaseSession):
+    """Answers every Bot API call without network access, messages are echoed back."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[TelegramType],
+                           timeout: Optional[int] = None) -> TelegramType:
+        self.calls += 1
+        if isinstance(method, (SendMessage, EditMessageText)):
+            return Message(message_id=self.calls, date=datetime.now(timezone.utc),
+                           chat=Chat(id=method.chat_id, type='private'), text=method.text)
+        return True
+
+    async def stream_content(self, url: str, headers: Optional[dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b''
+
+    async def close(self) -> None:
+        pass
+
+
+class UpdateFactory:
+    def __init__(self) -> None:
+        self._update_id = 0
+
+    def message(self, tg_id: int, text: str) -> Update:
+        self._update_id += 1
+        return Update.model_validate({
+            'update_id': self._update_id,
+            'message': {
+                'message_id': self._update_id,
+                'date': int(time.time()),
+                'chat': {'id': tg_id, 'type': 'private'},
+                'from': {'id': tg_id, 'is_bot': False, 'first_name': 'Bench', 'language_code': 'ru'},
+                'text': text,
+            },
+        })
+
+
+def _summary(latencies: list[float], wall_time: float) -> dict[str, float]:
+    latencies = sorted(latencies)
+
+    def percentile(share: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * share))]
+
+    return {
+        'count': len(latencies),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(percentile(0.95), 3),
+        'p99_ms': round(percentile(0.99), 3),
+        'max_ms': round(latencies[-1], 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'updates_per_sec': round(len(latencies) / wall_time, 1),
+    }
+
+
+async def _run_scenario(name: str, users: list[int], steps: list[str], factory: UpdateFactory,
+                        concurrency: int, latencies: dict[str, list[float]]) -> float:
+    """Every user walks through the steps in order, up to ``concurrency`` users at once."""
+    bot, dp = loader.bot, loader.dp
+    pending = iter(users)
+
+    async def worker():
+        for tg_id in pending:
+            for step, text in enumerate(steps):
+                update = factory.message(tg_id, text)
+                started = time.perf_counter()
+                await dp.feed_update(bot, update)
+                latencies[f"{name}.{step}"].append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(users: int, concurrency: int) -> dict[str, Any]:
+    db_dir = tempfile.mkdtemp(prefix='handlers_bench_')
+    Config.BOT_TOKEN = '42:BENCHMARK'
+    Config.DB_PATH = os.path.join(db_dir, 'bench.db')
+    Config.CATALOG_CACHE_DIR = os.path.join(db_dir, 'cache')
+    Config.LOG_TO_FILE = False
+    Config.LOG_LEVEL = 'WARNING'
+    Config.LOAD_USERS_FROM_FILE = False
+    Config.USER_SECRETKEY = SECRET_PHRASE
+    # Every synthetic user sends its updates back to back, throttling would drop most of them
+    Config.THROTTLING_BURST = 10 ** 9
+
+    await loader.loading_data()
+    loader.bot.session = StubSession()
+    factory = UpdateFactory()
+    try:
+        tg_ids = [FIRST_TG_ID + i for i in range(users)]
+        scenarios = {
+            # start_command for a new user, enter_secret_phrase, enter_surname, enter_name
+            'registration': ['/start', SECRET_PHRASE, 'Benchmarkov', 'Bench'],
+            # start_command for a registered user
+            'start_registered': ['/start'],
+        }
+        latencies: dict[str, list[float]] = {f"{name}.{step}": [] for name, steps in scenarios.items()
+                                             for step in range(len(steps))}
+        wall_times = {name: await _run_scenario(name, tg_ids, steps, factory, concurrency, latencies)
+                      for name, steps in scenarios.items()}
+    finally:
+        await loader.dp.storage.close()
+        await close_pool()
+        stop_logger()
+
+    step_names = {
+        'registration.0': 'start_command (new user)',
+        'registration.1': 'enter_secret_phrase',
+        'registration.2': 'enter_surname',
+        'registration.3': 'enter_name',
+        'start_registered.0': 'start_command (registered user)',
+    }
+    results = {}
+    for key, samples in latencies.items():
+        scenario = key.split('.')[0]
+        # Throughput is shared by all steps of a scenario
+        wall_time = wall_times[scenario] * len(samples) / sum(len(latencies[other]) for other in latencies
+                                                             if other.startswith(scenario + '.'))
+        results[step_names.get(key, key)] = _summary(samples, wall_time)
+    return {
+        'benchmark': 'handlers',
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'users': users,
+        'concurrency': concurrency,
+        'results': results,
+    }
+
+
+def _print_report(report: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    print(f"{'handler':<34}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'updates/s':>12}")
+    for name, result in report['results'].items():
+        line = (f"{name:<34}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['updates_per_sec']:>12.0f}")
+        previous = (baseline or {}).get('results', {}).get(name)
+        if previous:
+            change = (result['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100
+            line += f"   p95 {change:+.0f}% vs {baseline.get('commit')}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--output', help=f"JSON result path, defaults to {RESULTS_DIR}/handlers_<commit>.json")
+    parser.add_argument('--compare', help='previous JSON result to compare p95 latencies with')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    report = asyncio.run(run(args.users, args.concurrency))
+    _print_report(report, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"handlers_{report['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
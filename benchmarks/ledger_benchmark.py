@@ -0,0 +1,94 @@
+"""
+Ledger throughput benchmark.
+
+Runs concurrent coin transfers and a burst of batched credits against a temporary database:
+
+    python -m benchmarks.ledger_benchmark --wallets 1000 --transfers 20000 --concurrency 64
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+
+from bot.exceptions.wallet import InsufficientFundsError
+from bot.services.database.pool import close_pool, connection
+from bot.services.database.response import ledger
+from bot.services.database.response.base import initialize
+
+
+async def _create_wallets(count: int, balance: int) -> list[int]:
+    async with connection() as conn:
+        async with conn.execute('SELECT COALESCE(MAX(wallet_token), 0) FROM wallets') as cursor:
+            start = (await cursor.fetchone())[0] + 1
+        tokens = list(range(start, start + count))
+        await conn.executemany('INSERT INTO wallets (wallet_token, balance) VALUES (?, ?)',
+                               [(token, balance) for token in tokens])
+        await conn.commit()
+    return tokens
+
+
+async def _total_balance(tokens: list[int]) -> int:
+    async with connection() as conn:
+        async with conn.execute(f'SELECT SUM(balance) FROM wallets WHERE wallet_token IN '
+                                f'({",".join("?" * len(tokens))})', tokens) as cursor:
+            return (await cursor.fetchone())[0]
+
+
+async def run(wallets: int, transfers: int, concurrency: int, pool_size: int) -> None:
+    db_dir = tempfile.mkdtemp(prefix='ledger_bench_')
+    await initialize(os.path.join(db_dir, 'bench.db'), pool_size)
+    try:
+        tokens = await _create_wallets(wallets, 100 * ledger.MINOR_UNITS_PER_COIN)
+        total_before = await _total_balance(tokens)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(transfers):
+            source, target = random.sample(tokens, 2)
+            queue.put_nowait((source, target, random.randint(1, 5 * ledger.MINOR_UNITS_PER_COIN)))
+
+        rejected = 0
+
+        async def worker():
+            nonlocal rejected
+            while not queue.empty():
+                source, target, amount = queue.get_nowait()
+                try:
+                    await ledger.transfer(source, target, amount, 'benchmark')
+                except InsufficientFundsError:
+                    rejected += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        print(f"transfers: {transfers} in {elapsed:.2f}s -> {transfers / elapsed:.0f} transfers/s "
+              f"(concurrency {concurrency}, pool {pool_size}, rejected {rejected})")
+
+        total_after = await _total_balance(tokens)
+        assert total_before == total_after, f"Balance drift: {total_before} != {total_after}"
+        print(f"total balance conserved: {total_after}")
+
+        started = time.perf_counter()
+        await ledger.credit_many([(token, ledger.MINOR_UNITS_PER_COIN) for token in tokens], 'benchmark award')
+        elapsed = time.perf_counter() - started
+        print(f"credit_many: {len(tokens)} wallets in {elapsed * 1000:.1f}ms -> {len(tokens) / elapsed:.0f} credits/s")
+    finally:
+        await close_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wallets', type=int, default=1000)
+    parser.add_argument('--transfers', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--pool-size', type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args.wallets, args.transfers, args.concurrency, args.pool_size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Participant search latency benchmark.
+
+Fills a temporary database with generated users and measures prefix searches of growing length:
+
+    python -m benchmarks.search_benchmark --users 50000 --queries 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from bot.enums.enums import Tribe, UserRole
+from bot.enums.language import Language
+from bot.services.database.pool import close_pool
+from bot.services.database.response import user as db_user
+from bot.services.database.response.base import initialize
+from bot.services.database.response.search import search_users
+
+SYLLABLES = ['an', 'ar', 'va', 'le', 'ni', 'ko', 'ma', 'ri', 'sa', 'to', 'el', 'ov', 'in', 'ka', 'mi', 'ra', 'de',
+             'na', 'po', 'lu', 'ser', 'gei', 'dim', 'ol', 'ga', 'tat', 'ya', 'pet', 'rov', 'iv']
+FIRST_TG_ID = 10 ** 9
+
+
+def _word(rng: random.Random) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _percentile(samples: list[float], share: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * share))]
+
+
+async def run(users: int, queries: int, pool_size: int, seed: int) -> None:
+    rng = random.Random(seed)
+    Language.DEFAULT = Language.ALL[0]
+    db_dir = tempfile.mkdtemp(prefix='search_bench_')
+    await initialize(os.path.join(db_dir, 'bench.db'), pool_size)
+    try:
+        tribes = [tribe.value for tribe in Tribe]
+        names = [f"{_word(rng)} {_word(rng)}" for _ in range(users)]
+        started = time.perf_counter()
+        for start in range(0, users, 5000):
+            await db_user.import_users([(FIRST_TG_ID + i, names[i], rng.choice(tribes), UserRole.USER.value,
+                                         Language.DEFAULT) for i in range(start, min(users, start + 5000))])
+        print(f"indexed {users} users in {time.perf_counter() - started:.2f}s")
+
+        for prefix_length in (2, 3, 5):
+            latencies = []
+            found = 0
+            for _ in range(queries):
+                surname, name = rng.choice(names).split()
+                query = f"{surname[:prefix_length]} {name[:prefix_length]}" if rng.random() < 0.5 \
+                    else surname[:prefix_length]
+                tribe_id = rng.choice(tribes) if rng.random() < 0.3 else None
+                started = time.perf_counter()
+                page, _ = await search_users(query, tribe_id=tribe_id, limit=10)
+                latencies.append((time.perf_counter() - started) * 1000)
+                found += len(page)
+            latencies.sort()
+            print(f"prefix {prefix_length}: p50 {statistics.median(latencies):.2f}ms, "
+                  f"p95 {_percentile(latencies, 0.95):.2f}ms, p99 {_percentile(latencies, 0.99):.2f}ms, "
+                  f"max {latencies[-1]:.2f}ms, avg results {found / queries:.1f}")
+    finally:
+        await close_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args.users, args.queries, args.pool_size, args.seed))
+
+
+if __name__ == '__main__':
+    main()
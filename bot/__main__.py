@@ -1,22 +1,90 @@
 import asyncio
 import logging
 
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
 from bot import loader
+from bot.config import Config
+from bot.services.database.pool import close_pool
+from bot.services.metrics import start_metrics_server
+from bot.utils.logger import stop_logger
 
 logger = logging.getLogger(__name__)
 
 
+async def start_polling():
+    logger.info("Starting bot in long polling mode")
+    # Every update runs in its own task, OrderedEventIsolation keeps the updates of a chat in order
+    await loader.dp.start_polling(loader.bot, handle_as_tasks=True)
+
+
+async def start_webhook():
+    logger.info(f"Starting bot in webhook mode on {Config.WEBHOOK_HOST}:{Config.WEBHOOK_PORT}{Config.WEBHOOK_PATH}")
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=loader.dp,
+        bot=loader.bot,
+        secret_token=Config.WEBHOOK_SECRET,
+        handle_in_background=Config.WEBHOOK_HANDLE_IN_BACKGROUND,
+    ).register(app, path=Config.WEBHOOK_PATH)
+    # Emits dispatcher startup/shutdown together with the aiohttp application
+    setup_application(app, loader.dp, bot=loader.bot)
+
+    # Only the instance that owns the public URL registers it, the others just serve requests
+    if Config.WEBHOOK_URL:
+        await loader.bot.set_webhook(url=Config.WEBHOOK_URL + Config.WEBHOOK_PATH,
+                                     secret_token=Config.WEBHOOK_SECRET,
+                                     allowed_updates=loader.dp.resolve_used_update_types())
+        logger.info(f"Webhook set to {Config.WEBHOOK_URL + Config.WEBHOOK_PATH}")
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=Config.WEBHOOK_HOST, port=Config.WEBHOOK_PORT)
+    await site.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
 async def main():
+    metrics_runner = None
     try:
         await loader.loading_data()
+        if Config.METRICS_ENABLED:
+            metrics_runner = await start_metrics_server(Config.METRICS_HOST, Config.METRICS_PORT)
+        await loader.broadcaster.resume_unfinished()
+        loader.achievements.start()
+        loader.event_scheduler.start()
         logger.info("Starting bot")
-        await loader.dp.start_polling(loader.bot)
+        if Config.USE_WEBHOOK:
+            await start_webhook()
+        else:
+            await start_polling()
 
     except Exception as e:
         logger.exception(f"Error starting bot: {e}")
     finally:
-        await loader.bot.session.close()
+        # Services are None if loading failed before creating them
+        # Stopped first, it hands reminders to the broadcaster
+        if loader.event_scheduler is not None:
+            await loader.event_scheduler.close()
+        # Applies the progress still pending and sends its notifications, so the session must be open
+        if loader.achievements is not None:
+            await loader.achievements.close()
+        if loader.broadcaster is not None:
+            await loader.broadcaster.close()
+        if loader.bot is not None:
+            await loader.bot.session.close()
+        # Buffered profile updates need the pool, so they are written before it closes
+        if loader.profile_buffer is not None:
+            await loader.profile_buffer.close()
+        await close_pool()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         logger.info("Bot stopped")
+        stop_logger()
 
 
 if __name__ == '__main__':
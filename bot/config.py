@@ -8,17 +8,53 @@ load_dotenv()
 @dataclass
 class Config:
     BOT_TOKEN: str = os.getenv('BOT_TOKEN')
+    TELEGRAM_API_SERVER: str = os.getenv('TELEGRAM_API_SERVER')  # Bot API base URL, leave empty for api.telegram.org
     LOG_LEVEL: str = "INFO"                            # You can set DEBUG for more detailed logging
     LOG_FILE: str = "bot/logs/bot.log"                  # Path to the log file
     LOG_TO_FILE: bool = True                            # Set to False if you don't want to log to a file
     LOG_TO_CONSOLE: bool = True                         # Set to False if you don't want to log to a console
     LOAD_USERS_FROM_FILE: bool = False                   # Set to False if you don't want to load users from file
     LIST_USERS_PATH: str = "bot/data/users.txt"         # Path to the list of users to load file
+    LOAD_USERS_CHUNK_SIZE: int = 500                    # Users inserted per transaction when loading from file
     DB_PATH: str = "bot/data/database.db"               # Path to the SQLite database file
+    DB_POOL_SIZE: int = 4                               # Number of shared SQLite connections
+    USER_CACHE_SIZE: int = 10000                        # Max number of users kept in the lookup cache
+    USER_CACHE_TTL: float = 300                         # Seconds a cached user stays valid
+    WALLET_TOKEN_BLOCK_SIZE: int = 100                  # Wallet tokens reserved from the database at a time
+    FSM_FLUSH_INTERVAL: float = 1.0                     # Seconds FSM state changes are buffered before being written
+    FSM_CACHE_SIZE: int = 10000                         # Max number of FSM records kept in memory
+    PROFILE_FLUSH_INTERVAL: float = 5.0                 # Seconds tag, language and last seen updates are buffered
+    PROFILE_FLUSH_SIZE: int = 1000                      # Buffered users that trigger an early flush
     SUPERUSER_IDS = list(map(int,                       # List of superuser id's
                              os.getenv("SUPERUSER_IDS")
-                             .strip().split())),
+                             .strip().split()))
+    THROTTLING_RATE: float = 1.0                        # Updates per second allowed for a single user
+    THROTTLING_BURST: int = 5                           # Updates a user may send at once before being throttled
+    UPDATE_CONCURRENCY_LIMIT: int = 64                  # Updates processed at once, a chat's updates run one by one
+    USE_WEBHOOK: bool = False                           # Set to True to receive updates via webhook instead of polling
+    WEBHOOK_URL: str = os.getenv('WEBHOOK_URL')         # Public base URL, leave empty on instances that must not set it
+    WEBHOOK_PATH: str = "/webhook"                      # Path the webhook requests are served on
+    WEBHOOK_HOST: str = "127.0.0.1"                     # Host the webhook server binds to
+    WEBHOOK_PORT: int = 8080                            # Port the webhook server binds to
+    WEBHOOK_SECRET: str = os.getenv('WEBHOOK_SECRET')   # Required with USE_WEBHOOK, checked on every webhook request
+    WEBHOOK_HANDLE_IN_BACKGROUND: bool = True           # Set to False to process updates inside the request
+    BROADCAST_RATE: float = 25                          # Messages per second sent by all broadcasts together
+    BROADCAST_PER_CHAT_RATE: float = 1                  # Messages per second sent to a single chat
+    BROADCAST_CONCURRENCY: int = 8                      # Messages of a broadcast in flight at once
+    BROADCAST_PAGE_SIZE: int = 500                      # Recipients loaded and checkpointed at a time
+    EVENT_DURATION: float = 3 * 3600                    # Seconds an event stays in progress after its start
+    EVENT_REMINDER_BEFORE: float = 3600                 # Seconds before the start subscribers are reminded
+    EVENT_SCHEDULER_HORIZON: float = 600                # Seconds of upcoming event deadlines kept in memory
+    ACHIEVEMENTS_INTERVAL: float = 5.0                  # Seconds between evaluations of achievement progress
+    ACHIEVEMENTS_LEDGER_PAGE_SIZE: int = 1000           # Wallet transactions counted per evaluation
+    ACHIEVEMENTS_NOTIFY_RATE: float = 20                # Achievement notifications sent per second
+    SEARCH_PAGE_SIZE: int = 10                          # Participants shown per page of search results
+    SEARCH_TIMEOUT: float = 0.5                         # Seconds a participant search may take before it is cancelled
+    METRICS_ENABLED: bool = True                        # Set to False to disable the metrics endpoint and middlewares
+    METRICS_HOST: str = "127.0.0.1"                     # Host the Prometheus metrics endpoint binds to
+    METRICS_PORT: int = int(os.getenv('METRICS_PORT', 9101))  # Port of /metrics, 0 picks a free one per instance
     DEFAULT_LANGUAGE: str = "ru"                        # Set default language
+    CATALOG_CACHE_DIR: str = "bot/data/cache"           # Compiled message catalogs, set to None to disable caching
     REGISTRATION_BY_SECRETKEY: bool = True              # Set to False if you don't want to registrate by secret key
     USER_SECRETKEY: str = os.getenv('USER_SECRETKEY')
     ADMIN_SECRETKEY: str = os.getenv('ADMIN_SECRETKEY')
@@ -19,3 +19,23 @@ class EventState(Enum):
     REJECTED = 2
     IN_PROGRESS = 3
     COMPLETED = 4
+
+
+class BroadcastTarget(Enum):
+    ALL = 0
+    TRIBE = 1
+    ROLE = 2
+    EVENT = 3
+
+
+class BroadcastState(Enum):
+    IN_PROGRESS = 0
+    COMPLETED = 1
+
+
+class AchievementCounter(Enum):
+    REGISTERED = 0
+    EVENTS_ATTENDED = 1
+    TRANSFERS_SENT = 2
+    COINS_SENT = 3
+    COINS_RECEIVED = 4
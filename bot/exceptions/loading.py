@@ -3,3 +3,26 @@ class InvalidDefaultLanguageError(Exception):
         self.default_language = default_language
         self.message = message
         super().__init__(f"{message}: {default_language}")
+
+
+class MissingWebhookSecretError(Exception):
+    def __init__(self, message="WEBHOOK_SECRET must be set when USE_WEBHOOK is enabled"):
+        self.message = message
+        super().__init__(message)
+
+
+class IncompleteCatalogError(Exception):
+    def __init__(self, file_path, missing, message="Messages are missing translations"):
+        self.file_path = file_path
+        self.missing = missing
+        self.message = message
+        super().__init__(f"{message} in {file_path}: {', '.join(missing)}")
+
+
+class InvalidAchievementRuleError(Exception):
+    def __init__(self, file_path, achievement_id, reason, message="Invalid achievement rule"):
+        self.file_path = file_path
+        self.achievement_id = achievement_id
+        self.reason = reason
+        self.message = message
+        super().__init__(f"{message} '{achievement_id}' in {file_path}: {reason}")
@@ -0,0 +1,6 @@
+class SearchTimeoutError(Exception):
+    def __init__(self, query, timeout, message="Search exceeded its time budget"):
+        self.query = query
+        self.timeout = timeout
+        self.message = message
+        super().__init__(f"{message} of {timeout}s: {query!r}")
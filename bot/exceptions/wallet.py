@@ -0,0 +1,13 @@
+class WalletNotFoundError(Exception):
+    def __init__(self, wallet_token, message="Wallet not found"):
+        self.wallet_token = wallet_token
+        self.message = message
+        super().__init__(f"{message}: {wallet_token}")
+
+
+class InsufficientFundsError(Exception):
+    def __init__(self, wallet_token, amount, message="Insufficient funds"):
+        self.wallet_token = wallet_token
+        self.amount = amount
+        self.message = message
+        super().__init__(f"{message} in wallet {wallet_token} to debit {amount}")
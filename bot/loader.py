@@ -1,39 +1,67 @@
+import asyncio
 import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Iterable, Optional, TypeVar
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
 from bot.config import Config
 from bot.enums import language
-from bot.enums.enums import Tribe
+from bot.enums.enums import Tribe, UserRole
 from bot.telegram.keyboards import keyboards_config
+from bot.telegram.keyboards.registry import build_keyboards
 from bot.telegram.handlers import handlers_config
 from bot.telegram.handlers.admin import router as admin_router
 from bot.telegram.handlers.common import router as common_router
+from bot.middlewares.metrics import HandlerMetricsMiddleware, TelegramMetricsMiddleware, UpdateMetricsMiddleware
+from bot.middlewares.profile import LastSeenMiddleware
+from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.services.achievements import AchievementEngine
+from bot.services.broadcast import Broadcaster
+from bot.services.event_isolation import OrderedEventIsolation
+from bot.services.event_scheduler import EventScheduler
+from bot.services.media import ACHIEVEMENT_IMAGES_DIR, MediaService
+from bot.services.database.fsm_storage import SQLiteStorage
+from bot.services.database.profile_buffer import ProfileBuffer
+from bot.services.database.response import event as db_event
 from bot.services.database.response import user as db_user
+from bot.services.database.response import wallet as db_wallet
 from bot.services.database.response.base import initialize as db_initialize
-from bot.utils.json_loader import load_from_xml
+from bot.utils.achievement_rules import check_achievement_titles, load_achievement_rules
+from bot.utils.localization import Catalog, load_catalog
 from bot.utils.logger import configurate_logger
-from bot.exceptions.loading import InvalidDefaultLanguageError
+from bot.exceptions.loading import InvalidDefaultLanguageError, MissingWebhookSecretError
 
-# Variables
+# Variables, None until loading_data has created them
 logger: logging.Logger
-bot: Bot
-dp: Dispatcher
+bot: Optional[Bot] = None
+dp: Optional[Dispatcher] = None
+broadcaster: Optional[Broadcaster] = None
+media: Optional[MediaService] = None
+event_scheduler: Optional[EventScheduler] = None
+achievements: Optional[AchievementEngine] = None
+profile_buffer: Optional[ProfileBuffer] = None
+
+T = TypeVar('T')
 
 
 async def loading_data():
-    global logger, bot, dp
+    global logger
     # Logging configuration
     configurate_logger(Config.LOG_FILE, Config.LOG_TO_FILE, Config.LOG_TO_CONSOLE, Config.LOG_LEVEL)
     logger = logging.getLogger(__name__)
+    started = time.perf_counter()
+    phases: dict[str, float] = {}
 
     logger.debug("Initializing Bot and Dispatcher")
-    # Bot and Dispatcher initialization
-    bot = Bot(token=Config.BOT_TOKEN)
-    dp = Dispatcher()
+    with _phase(phases, 'dispatcher'):
+        _setup_dispatcher()
 
-    # Include routers
-    logger.debug("Including routers")
-    dp.include_routers(admin_router, common_router)
+    # Without a secret token the webhook endpoint would accept updates from anyone
+    if Config.USE_WEBHOOK and not Config.WEBHOOK_SECRET:
+        raise MissingWebhookSecretError()
 
     logger.debug("Set default language")
     # Set default language
@@ -41,87 +69,161 @@ async def loading_data():
         raise InvalidDefaultLanguageError(Config.DEFAULT_LANGUAGE)
     language.Language.DEFAULT = Config.DEFAULT_LANGUAGE
 
-    # Load messages from json
-    constant_path = "bot/constants"
-    handlers_config.menu_messages = load_from_xml(constant_path + '/messages/common/menu.xml')
-    handlers_config.registration_messages = load_from_xml(constant_path + '/messages/common/registration.xml')
-
-    # Load keyboards from json
-    keyboards_config.menu_keyboard_buttons = load_from_xml(constant_path + '/keyboards/menu.xml')
-
     # Set secret keys
     logger.debug("Set SECRET KEYS")
     handlers_config.ADMIN_SECRETKEY = Config.ADMIN_SECRETKEY
     handlers_config.USER_SECRETKEY = Config.USER_SECRETKEY
 
-    # Initialize the database
-    await db_initialize(Config.DB_PATH)
+    # Compiled message catalogs are loaded in worker threads while the database is initialized
+    constant_path = "bot/constants"
+    locales = language.Language.ALL
+    catalogs, _ = await asyncio.gather(
+        _run_phase(phases, 'catalogs', _load_catalogs([
+            constant_path + '/messages/common/menu.xml',
+            constant_path + '/messages/common/registration.xml',
+            constant_path + '/messages/common/throttling.xml',
+            constant_path + '/messages/admin/admin.xml',
+            constant_path + '/messages/common/search.xml',
+            constant_path + '/messages/common/events.xml',
+            constant_path + '/messages/common/achievements.xml',
+            constant_path + '/keyboards/menu.xml',
+        ], locales, Config.CATALOG_CACHE_DIR)),
+        _run_phase(phases, 'database', db_initialize(Config.DB_PATH, Config.DB_POOL_SIZE)),
+    )
+    (handlers_config.menu_messages, handlers_config.registration_messages, handlers_config.throttling_messages,
+     handlers_config.admin_messages, handlers_config.search_messages, handlers_config.event_messages,
+     handlers_config.achievement_messages, keyboards_config.menu_keyboard_buttons) = catalogs
+    check_achievement_titles(list(achievements.rules.values()), handlers_config.achievement_messages, locales,
+                             constant_path + '/messages/common/achievements.xml')
+    db_user.configure_user_cache(Config.USER_CACHE_SIZE, Config.USER_CACHE_TTL)
+    db_wallet.configure_wallet_tokens(Config.WALLET_TOKEN_BLOCK_SIZE)
+
+    # Build every declared keyboard once per locale
+    with _phase(phases, 'keyboards'):
+        build_keyboards(locales)
 
     # Load users from file
     if Config.LOAD_USERS_FROM_FILE:
         logger.debug(f"Loading users from file: {Config.LIST_USERS_PATH}")
-        await load_users_from_file(Config.LIST_USERS_PATH)
+        with _phase(phases, 'users'):
+            await load_users_from_file(Config.LIST_USERS_PATH, Config.LOAD_USERS_CHUNK_SIZE)
         logger.info("Users loaded from file successfully")
     else:
         logger.debug("LOAD_USERS_FROM_FILE is set to False, skipping loading users from file")
 
+    # Concurrent phases overlap, so their sum can exceed the total
+    logger.info("Startup finished in %.1fms (%s)", (time.perf_counter() - started) * 1000,
+                ', '.join(f"{name} {elapsed * 1000:.1f}ms" for name, elapsed in phases.items()))
     logger.debug("loading_data function completed successfully")
 
 
-async def load_users_from_file(file_path: str):
-    logger.debug(f"load_users_from_file called with file_path: {file_path}")
+def _setup_dispatcher():
+    global bot, dp, broadcaster, media, profile_buffer, event_scheduler, achievements
+    # Bot and Dispatcher initialization
+    # A custom Bot API server is used for self-hosted deployments and for testing against a local fake
+    session = None
+    if Config.TELEGRAM_API_SERVER:
+        logger.info(f"Using Bot API server: {Config.TELEGRAM_API_SERVER}")
+        session = AiohttpSession(api=TelegramAPIServer.from_base(Config.TELEGRAM_API_SERVER))
+    bot = Bot(token=Config.BOT_TOKEN, session=session)
+    # The isolation lock is taken before the FSM state is read, so a chat's updates see each other's state.
+    # The FSM middleware is registered below, after throttling, instead of by the Dispatcher itself
+    dp = Dispatcher(storage=SQLiteStorage(Config.FSM_FLUSH_INTERVAL, Config.FSM_CACHE_SIZE),
+                    events_isolation=OrderedEventIsolation(Config.UPDATE_CONCURRENCY_LIMIT),
+                    disable_fsm=True)
+
+    broadcaster = Broadcaster(bot, Config.BROADCAST_RATE, Config.BROADCAST_PER_CHAT_RATE,
+                              Config.BROADCAST_CONCURRENCY, Config.BROADCAST_PAGE_SIZE)
+    media = MediaService(bot)
+    achievements = AchievementEngine(bot, media,
+                                     load_achievement_rules('bot/constants/achievements/rules.xml',
+                                                            ACHIEVEMENT_IMAGES_DIR),
+                                     Config.ACHIEVEMENTS_INTERVAL, Config.ACHIEVEMENTS_LEDGER_PAGE_SIZE,
+                                     Config.ACHIEVEMENTS_NOTIFY_RATE)
+    # Subscribers of completed events are counted as attendees
+    event_scheduler = EventScheduler(broadcaster, Config.EVENT_DURATION, Config.EVENT_REMINDER_BEFORE,
+                                     Config.EVENT_SCHEDULER_HORIZON, achievements.events_completed)
+    # An event approved inside the loaded horizon would otherwise wait for the next reload
+    db_event.set_approval_listener(event_scheduler.wake)
+    profile_buffer = ProfileBuffer(Config.PROFILE_FLUSH_INTERVAL, Config.PROFILE_FLUSH_SIZE)
+    # Handlers receive the services as keyword arguments
+    dp['broadcaster'] = broadcaster
+    dp['event_scheduler'] = event_scheduler
+    dp['media'] = media
+    dp['profile_buffer'] = profile_buffer
+    dp['achievements'] = achievements
+
+    # Include routers
+    logger.debug("Including routers")
+    dp.include_routers(admin_router, common_router)
+
+    # Register middlewares
+    logger.debug("Registering middlewares")
+    if Config.METRICS_ENABLED:
+        # Registered ahead of the other middlewares and dp.fsm, so the update timing also covers throttling,
+        # the wait for the events isolation lock and the FSM state read
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+        handler_metrics = HandlerMetricsMiddleware()
+        for event_name, observer in dp.observers.items():
+            if event_name not in ('update', 'error'):
+                observer.middleware(handler_metrics)
+        bot.session.middleware(TelegramMetricsMiddleware())
+    dp.update.outer_middleware(ThrottlingMiddleware(Config.THROTTLING_RATE, Config.THROTTLING_BURST))
+    dp.update.outer_middleware(LastSeenMiddleware(profile_buffer))
+    # Last, so flooding users are dropped before they wait for the isolation lock or their state is read
+    dp.update.outer_middleware(dp.fsm)
+
 
-    tribe_mapping = {
-        "ignis": Tribe.IGNIS.value,
-        "aqua": Tribe.AQUA.value,
-        "air": Tribe.AIR.value,
-        "terra": Tribe.TERRA.value
-    }
+@contextmanager
+def _phase(phases: dict[str, float], name: str):
+    phase_started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = time.perf_counter() - phase_started
+
+
+async def _run_phase(phases: dict[str, float], name: str, awaitable: Awaitable[T]) -> T:
+    with _phase(phases, name):
+        return await awaitable
+
+
+async def _load_catalogs(paths: Iterable[str], locales: Iterable[str], cache_dir: Optional[str]) -> list[Catalog]:
+    locales = tuple(locales)
+    return await asyncio.gather(*(asyncio.to_thread(load_catalog, path, locales, cache_dir) for path in paths))
+
+
+async def load_users_from_file(file_path: str, chunk_size: int = 500):
+    logger.debug(f"load_users_from_file called with file_path: {file_path}, chunk_size: {chunk_size}")
+
+    tribe_mapping = {tribe.name.lower(): tribe.value for tribe in Tribe}
+
+    started = time.perf_counter()
+    lines_read = 0
+    imported = 0
+    chunk = []
 
     try:
         with open(file_path, 'r') as file:
             logger.debug(f"Opened file: {file_path}")
-            users = file.read().strip().split('\n')
-            logger.debug(f"Read {len(users)} lines from file")
 
-            for user in users:
+            # The file is consumed lazily, only one chunk is held in memory at a time
+            for user in file:
+                lines_read += 1
                 if not user.strip():
                     continue
 
-                info = [part.strip() for part in user.split('|')]
-                if len(info) < 3:
-                    logger.warning(f"Skipping malformed line: {user}")
+                parsed = _parse_user_line(user.strip(), tribe_mapping)
+                if parsed is None:
                     continue
+                chunk.append(parsed)
 
-                try:
-                    tg_id = int(info[0])
-                    name = info[1]
-                    tribe_name = info[2]
-                    locale = info[3] if len(info) > 3 else None
-                except ValueError:
-                    logger.warning(f"Skipping line with invalid format: {user}")
-                    continue
+                if len(chunk) >= chunk_size:
+                    imported += await db_user.import_users(chunk)
+                    chunk = []
 
-                tribe_value = tribe_mapping.get(tribe_name.lower())
-                logger.debug(f"Parsed user info - tg_id: {tg_id}, name: {name}, tribe_name: {tribe_name}, "
-                             f"tribe_value: {tribe_value}, language: {locale}")
-
-                if tribe_value is not None:
-                    if not await db_user.user_exists(tg_id=tg_id):
-                        if tg_id in Config.SUPERUSER_IDS:
-                            if locale in [language.Language.RU, language.Language.EN]:
-                                await db_user.add_admin(tg_id, name, tribe_value, locale)
-                            else:
-                                await db_user.add_admin(tg_id, name, tribe_value)
-                        else:
-                            if locale in [language.Language.RU, language.Language.EN]:
-                                await db_user.add_user(tg_id, name, tribe_value, locale)
-                            else:
-                                await db_user.add_user(tg_id, name, tribe_value)
-                    else:
-                        logger.warning(f"User already exists - tg_id: {tg_id}")
-                else:
-                    logger.warning(f"Tribe not found for tribe_name: {tribe_name}")
+            if chunk:
+                imported += await db_user.import_users(chunk)
 
     except FileNotFoundError:
         logger.critical(f"File not found: {file_path}")
@@ -129,3 +231,36 @@ async def load_users_from_file(file_path: str):
     except Exception as e:
         logger.critical(f"Error loading users from file: {e}")
         raise
+
+    elapsed = time.perf_counter() - started
+    rate = imported / elapsed if elapsed > 0 else 0
+    logger.info(f"Read {lines_read} lines, imported {imported} users in {elapsed:.2f}s ({rate:.0f} users/s)")
+
+
+def _parse_user_line(user: str, tribe_mapping: dict[str, int]) -> Optional[tuple[int, str, int, int, str]]:
+    info = [part.strip() for part in user.split('|')]
+    if len(info) < 3:
+        logger.warning(f"Skipping malformed line: {user}")
+        return None
+
+    try:
+        tg_id = int(info[0])
+        name = info[1]
+        tribe_name = info[2]
+        locale = info[3] if len(info) > 3 else None
+    except ValueError:
+        logger.warning(f"Skipping line with invalid format: {user}")
+        return None
+
+    tribe_value = tribe_mapping.get(tribe_name.lower())
+    logger.debug("Parsed user info - tg_id: %s, name: %s, tribe_name: %s, tribe_value: %s, language: %s",
+                 tg_id, name, tribe_name, tribe_value, locale)
+
+    if tribe_value is None:
+        logger.warning(f"Tribe not found for tribe_name: {tribe_name}")
+        return None
+
+    if locale not in language.Language.ALL:
+        locale = language.Language.DEFAULT
+    role = UserRole.ADMIN.value if tg_id in Config.SUPERUSER_IDS else UserRole.USER.value
+    return tg_id, name, tribe_value, role, locale
@@ -0,0 +1,78 @@
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, Update
+
+from bot.services.metrics import (HANDLER_DURATION, HANDLER_ERRORS, TELEGRAM_REQUEST_DURATION, TELEGRAM_REQUEST_ERRORS,
+                                  UPDATE_DURATION)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer update middleware timing the whole processing of every update, labelled by update type.
+
+    Updates no handler accepted are labelled ``<type>:unhandled``.
+    """
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        update_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        started = time.perf_counter()
+        result = UNHANDLED
+        try:
+            result = await handler(event, data)
+            return result
+        finally:
+            label = f"{update_type}:unhandled" if result is UNHANDLED else update_type
+            UPDATE_DURATION.observe(time.perf_counter() - started, label)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware timing handlers and counting their exceptions, labelled by handler name.
+
+    aiogram picks the handler after filters ran, so the name is only known to inner middlewares. Register it on
+    the dispatcher's event observers, it then applies to handlers of every included router.
+    """
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        handler_object = data.get('handler')
+        callback = getattr(handler_object, 'callback', None)
+        name = (f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__name__}"
+                if callback is not None else type(event).__name__)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            HANDLER_ERRORS.inc(name, type(e).__name__)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, name)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Bot session middleware timing Bot API requests, labelled by API method."""
+
+    async def __call__(self,
+                       make_request: NextRequestMiddlewareType[TelegramType],
+                       bot: Bot,
+                       method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        name = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            TELEGRAM_REQUEST_ERRORS.inc(name, type(e).__name__)
+            raise
+        finally:
+            TELEGRAM_REQUEST_DURATION.observe(time.perf_counter() - started, name)
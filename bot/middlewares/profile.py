@@ -0,0 +1,22 @@
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from bot.services.database.profile_buffer import ProfileBuffer
+
+
+class LastSeenMiddleware(BaseMiddleware):
+    """Outer update middleware recording when each user was last seen, written behind by the profile buffer."""
+
+    def __init__(self, profile_buffer: ProfileBuffer) -> None:
+        self.profile_buffer = profile_buffer
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        user: Optional[User] = data.get('event_from_user')
+        if user is not None:
+            self.profile_buffer.touch(user.id)
+        return await handler(event, data)
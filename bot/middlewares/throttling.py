@@ -0,0 +1,89 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import TelegramObject, Update, User
+
+from bot.enums.language import Language
+from bot.telegram.handlers import handlers_config
+from bot.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class _UserBucket(TokenBucket):
+    __slots__ = ('warned',)
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        super().__init__(rate, capacity, now)
+        self.warned = False
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Outer update middleware limiting every user with a token bucket.
+
+    Must be registered on ``dp.update`` ahead of ``dp.fsm``, which the Dispatcher only allows when it is created
+    with ``disable_fsm=True`` and ``dp.fsm`` is registered afterwards. Flooding users are then dropped before they
+    wait for the events isolation lock or their FSM state is read from storage. The first dropped update of a burst
+    is answered with a "slow down" message, the following ones are ignored silently.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        # Least recently active users first, so idle buckets are evicted from the front
+        self._buckets: OrderedDict[int, _UserBucket] = OrderedDict()
+
+    async def __call__(self,
+                       handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject,
+                       data: dict[str, Any]) -> Any:
+        user: Optional[User] = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        bucket = self._buckets.get(user.id)
+        if bucket is None:
+            bucket = self._buckets[user.id] = _UserBucket(self.rate, self.burst, now)
+        else:
+            self._buckets.move_to_end(user.id)
+
+        if bucket.consume(now):
+            bucket.warned = False
+            return await handler(event, data)
+
+        logger.debug("Throttled update from user with tg_id: %s", user.id)
+        if not bucket.warned:
+            bucket.warned = True
+            await self._notify(event, user)
+        return None
+
+    def _evict_idle(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            tg_id, bucket = next(iter(buckets.items()))
+            if not bucket.is_full(now):
+                break
+            del buckets[tg_id]
+
+    @staticmethod
+    async def _notify(event: TelegramObject, user: User) -> None:
+        locale = user.language_code if user.language_code in Language.ALL else Language.DEFAULT
+        text = handlers_config.throttling_messages.get('too_many_requests', locale)
+        try:
+            if isinstance(event, Update) and event.message:
+                await event.message.answer(text)
+            elif isinstance(event, Update) and event.callback_query:
+                await event.callback_query.answer(text)
+        except TelegramAPIError as e:
+            logger.warning(f"Failed to notify throttled user with tg_id: {user.id}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+
+from bot.enums.enums import AchievementCounter
+from bot.services.database.response import achievement as db_achievement
+from bot.services.database.response import event as db_event
+from bot.services.database.response import user as db_user
+from bot.services.database.response.ledger import MINOR_UNITS_PER_COIN
+from bot.services.media import MediaService
+from bot.telegram.handlers import handlers_config
+from bot.utils.achievement_rules import AchievementRule
+from bot.utils.rate_limit import AsyncRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Counters kept in minor units, their rule thresholds are declared in coins
+_COIN_COUNTERS = (AchievementCounter.COINS_SENT, AchievementCounter.COINS_RECEIVED)
+
+
+class AchievementEngine:
+    """
+    Awards achievements from streaming per-user counters.
+
+    Handlers ``publish`` domain events, which only adds to an in-memory delta, and the scheduler reports completed
+    events, whose subscribers attended them. Coin transfers are read from the wallet ledger after a cursor kept in
+    app_meta. A background worker applies the coalesced deltas at most every ``interval`` seconds in one
+    transaction and awards every achievement whose threshold lies between the old and the new counter value, so
+    user history is never rescanned. Awards are recorded before users are notified, a lost notification is not
+    retried. Deltas pending on ``close`` are applied before it returns.
+    """
+
+    def __init__(self,
+                 bot: Bot,
+                 media: MediaService,
+                 rules: list[AchievementRule],
+                 interval: float = 5.0,
+                 ledger_page_size: int = 1000,
+                 notify_rate: float = 20) -> None:
+        self.bot = bot
+        self.media = media
+        self.rules = {rule.achievement_id: rule for rule in rules}
+        self.interval = interval
+        self.ledger_page_size = ledger_page_size
+        # Thresholds per counter value, in the unit the counter is stored in
+        self._thresholds: dict[int, list[tuple[int, str]]] = defaultdict(list)
+        for rule in rules:
+            scale = MINOR_UNITS_PER_COIN if rule.counter in _COIN_COUNTERS else 1
+            self._thresholds[rule.counter.value].append((rule.threshold * scale, rule.achievement_id))
+        self._pending: dict[tuple[int, int], int] = defaultdict(int)
+        self._completed_events: list[int] = []
+        self._limiter = AsyncRateLimiter(notify_rate)
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, counter: AchievementCounter, user_ids: Iterable[int], amount: int = 1) -> None:
+        """Adds ``amount`` to the counter of every user, evaluated by the worker later."""
+        for user_id in user_ids:
+            self._pending[user_id, counter.value] += amount
+        self._wakeup.set()
+
+    def events_completed(self, event_ids: list[int]) -> None:
+        """Scheduler callback, every subscriber of the completed events counts as having attended."""
+        self._completed_events.extend(event_ids)
+        self._wakeup.set()
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="achievement-engine")
+        return self._task
+
+    async def close(self) -> None:
+        if self._task is None:
+            # Never started, so nothing was published either
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await self.evaluate()
+        except Exception as e:
+            logger.error(f"Error applying pending achievement progress: {e}")
+        logger.info("Achievement engine closed")
+
+    async def _run(self) -> None:
+        logger.info("Achievement engine started with %s rules", len(self.rules))
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            started = loop.time()
+            try:
+                if await self.evaluate():
+                    # A full ledger page, more transfers are waiting
+                    self._wakeup.set()
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Error evaluating achievements: {e}")
+            # Deltas published meanwhile are applied together, the evaluation time counts towards the interval
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+    async def evaluate(self) -> bool:
+        """
+        Applies pending deltas and one page of the ledger, then notifies the awarded users.
+
+        :return: Whether to evaluate again right away: the ledger page was full, or the ledger cursor was moved by
+            another evaluation and the page has to be read again.
+        """
+        async with self._lock:
+            published, self._pending = self._pending, defaultdict(int)
+            completed, self._completed_events = self._completed_events, []
+            try:
+                result = await self._apply(published, completed)
+            except BaseException:
+                # Nothing was committed: keep the published work, the ledger page is read again from the cursor
+                self._restore(published, completed)
+                raise
+            if result is None:
+                self._restore(published, completed)
+                return True
+            awarded, transfers = result
+
+        if awarded:
+            await self._notify(awarded)
+        return transfers == self.ledger_page_size
+
+    def _restore(self, published: dict[tuple[int, int], int], completed: list[int]) -> None:
+        for key, delta in published.items():
+            self._pending[key] += delta
+        self._completed_events[:0] = completed
+
+    async def _apply(self, published: dict[tuple[int, int], int],
+                     completed: list[int]) -> Optional[tuple[list[tuple[int, str]], int]]:
+        deltas = defaultdict(int, published)
+        if completed:
+            for user_id in await db_event.get_subscriber_ids(completed):
+                deltas[user_id, AchievementCounter.EVENTS_ATTENDED.value] += 1
+
+        read = cursor = await db_achievement.get_ledger_cursor()
+        changes = await db_achievement.get_ledger_changes(read, self.ledger_page_size)
+        for transaction_id, sender_id, receiver_id, amount in changes:
+            if sender_id is not None:
+                deltas[sender_id, AchievementCounter.TRANSFERS_SENT.value] += 1
+                deltas[sender_id, AchievementCounter.COINS_SENT.value] += amount
+            if receiver_id is not None:
+                deltas[receiver_id, AchievementCounter.COINS_RECEIVED.value] += amount
+            cursor = transaction_id
+
+        if not deltas and not changes:
+            return [], 0
+        # The cursor is only moved if it is still the one read, so a page is never counted twice
+        awarded = await db_achievement.record_progress(deltas, self._thresholds, (read, cursor) if changes else None)
+        if awarded is None:
+            return None
+        logger.debug("Applied %s counter updates from %s transfers, %s achievements awarded",
+                     len(deltas), len(changes), len(awarded))
+        return awarded, len(changes)
+
+    async def _notify(self, awarded: list[tuple[int, str]]) -> None:
+        users = await db_user.get_users(user_ids={user_id for user_id, _ in awarded})
+        messages = handlers_config.achievement_messages
+        for user_id, achievement_id in awarded:
+            user = users.get(user_id)
+            if user is None:
+                continue
+            rule = self.rules[achievement_id]
+            text = messages.get('achievement_unlocked', user.language).format(
+                title=messages.get(achievement_id, user.language))
+            await self._limiter.acquire()
+            try:
+                if rule.image is not None:
+                    await self.media.send_photo(user.tg_id, rule.image, caption=text)
+                else:
+                    await self.bot.send_message(chat_id=user.tg_id, text=text)
+            except TelegramRetryAfter as e:
+                logger.warning("Flood control while notifying achievements, pausing for %ss", e.retry_after)
+                self._limiter.pause(e.retry_after)
+            except TelegramAPIError as e:
+                logger.warning("Achievement %s notification to user %s failed: %s", achievement_id, user_id, e)
+            else:
+                logger.info("User %s awarded achievement %s", user_id, achievement_id)
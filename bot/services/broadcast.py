@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (TelegramAPIError, TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError,
+                                TelegramRetryAfter, TelegramServerError)
+
+from bot.enums.enums import BroadcastTarget
+from bot.services.database.models.broadcast import BroadcastReport
+from bot.services.database.response import broadcast as db_broadcast
+from bot.utils.rate_limit import AsyncRateLimiter, KeyedRateLimiter
+
+logger = logging.getLogger(__name__)
+
+_SENT, _BLOCKED, _FAILED = range(3)
+
+# 429s for one chat after which it is marked failed, each one pauses the whole broadcast
+_MAX_FLOOD_RETRIES = 5
+
+
+class Broadcaster:
+    """
+    Delivers one text to many users without tripping Telegram flood limits.
+
+    Recipients are streamed from the database page by page and sent by a bounded pool of workers that share a
+    global and a per-chat rate limiter. A 429 pauses every worker for the requested retry-after. Progress is saved
+    after each page, so an interrupted broadcast resumes from the last finished page (recipients of the page that was
+    in flight may receive the message twice).
+    """
+
+    def __init__(self,
+                 bot: Bot,
+                 rate: float = 25,
+                 per_chat_rate: float = 1,
+                 concurrency: int = 8,
+                 page_size: int = 500,
+                 max_attempts: int = 3) -> None:
+        self.bot = bot
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.max_attempts = max_attempts
+        self._limiter = AsyncRateLimiter(rate)
+        self._chat_limiter = KeyedRateLimiter(per_chat_rate)
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    async def create(self, text: str, target: BroadcastTarget, target_id: Optional[int] = None) -> int:
+        return await db_broadcast.create_broadcast(text, target, target_id)
+
+    def spawn(self, broadcast_id: int,
+              on_finish: Optional[Callable[[BroadcastReport], Awaitable[None]]] = None) -> asyncio.Task:
+        """Runs a broadcast in the background, handlers must not wait for the whole fan-out."""
+        task = self._tasks.get(broadcast_id)
+        if task is not None:
+            return task
+
+        async def runner() -> BroadcastReport:
+            report = await self.run(broadcast_id)
+            if on_finish is not None:
+                await on_finish(report)
+            return report
+
+        task = self._tasks[broadcast_id] = asyncio.create_task(runner(), name=f"broadcast-{broadcast_id}")
+        task.add_done_callback(lambda done: self._finished(broadcast_id, done))
+        return task
+
+    def _finished(self, broadcast_id: int, task: asyncio.Task) -> None:
+        self._tasks.pop(broadcast_id, None)
+        # Nobody awaits spawned tasks, so a failure is only visible here
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Broadcast %s failed", broadcast_id, exc_info=task.exception())
+
+    async def run(self, broadcast_id: int) -> BroadcastReport:
+        broadcast = await db_broadcast.get_broadcast(broadcast_id)
+        if broadcast is None:
+            raise ValueError(f"Broadcast {broadcast_id} not found")
+
+        target = BroadcastTarget(broadcast.target)
+        logger.info("Broadcast %s to %s %s starting after user_id %s",
+                    broadcast_id, target.name, broadcast.target_id, broadcast.last_user_id)
+        started = time.perf_counter()
+        sent, blocked, failed = broadcast.sent, broadcast.blocked, broadcast.failed
+        last_user_id = broadcast.last_user_id
+
+        while True:
+            recipients = await db_broadcast.get_recipients(target, broadcast.target_id, last_user_id,
+                                                           self.page_size)
+            finished = len(recipients) < self.page_size
+            outcome = await self._deliver_page(broadcast.text, [tg_id for _, tg_id in recipients])
+            if recipients:
+                last_user_id = recipients[-1][0]
+            await db_broadcast.save_progress(broadcast_id, last_user_id, *outcome, finished=finished)
+            sent, blocked, failed = sent + outcome[_SENT], blocked + outcome[_BLOCKED], failed + outcome[_FAILED]
+            if finished:
+                break
+
+        report = BroadcastReport(broadcast_id, sent, blocked, failed, time.perf_counter() - started)
+        logger.info("Broadcast finished: %s", report)
+        return report
+
+    async def resume_unfinished(self) -> list[asyncio.Task]:
+        """Restarts every broadcast interrupted by a shutdown or crash."""
+        broadcasts = await db_broadcast.get_unfinished_broadcasts()
+        if broadcasts:
+            logger.info("Resuming %s unfinished broadcasts", len(broadcasts))
+        return [self.spawn(broadcast.broadcast_id) for broadcast in broadcasts]
+
+    async def close(self) -> None:
+        """Stops running broadcasts, they resume from the saved progress on the next start."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _deliver_page(self, text: str, chat_ids: list[int]) -> list[int]:
+        outcome = [0, 0, 0]
+        pending = iter(chat_ids)
+
+        async def worker():
+            # Workers share the iterator, so a slow chat never holds up the rest of the page
+            for chat_id in pending:
+                outcome[await self._send(chat_id, text)] += 1
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(chat_ids)))))
+        return outcome
+
+    async def _send(self, chat_id: int, text: str) -> int:
+        attempt = flood_retries = 0
+        while attempt < self.max_attempts:
+            await self._chat_limiter.acquire(chat_id)
+            await self._limiter.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text)
+                return _SENT
+            except TelegramRetryAfter as e:
+                # Flood control applies to the whole bot, so every worker waits, and the retry is not an attempt
+                flood_retries += 1
+                if flood_retries > _MAX_FLOOD_RETRIES:
+                    logger.warning("Chat %s still flood limited after %s retries, giving up",
+                                   chat_id, _MAX_FLOOD_RETRIES)
+                    return _FAILED
+                logger.warning("Flood control on chat %s, pausing broadcasts for %ss", chat_id, e.retry_after)
+                self._limiter.pause(e.retry_after)
+            except TelegramForbiddenError:
+                logger.debug("Chat %s blocked the bot", chat_id)
+                return _BLOCKED
+            except TelegramBadRequest as e:
+                logger.warning("Broadcast message rejected for chat %s: %s", chat_id, e.message)
+                return _FAILED
+            except (TelegramNetworkError, TelegramServerError) as e:
+                attempt += 1
+                logger.warning("Attempt %s to send to chat %s failed: %s", attempt, chat_id, e)
+                await asyncio.sleep(attempt)
+            except TelegramAPIError as e:
+                logger.warning("Broadcast message to chat %s failed: %s", chat_id, e)
+                return _FAILED
+        return _FAILED
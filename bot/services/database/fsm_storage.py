@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import aiosqlite as sql
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from bot.services.database.pool import connection
+
+logger = logging.getLogger(__name__)
+
+
+class _Record:
+    __slots__ = ('state', 'data')
+
+    def __init__(self, state: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> None:
+        self.state = state
+        self.data = data if data is not None else {}
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM storage persisted in the bot's own SQLite database (``fsm_storage`` table).
+
+    Records are cached in memory and writes are coalesced: ``set_state``/``set_data`` only mark
+    the record dirty, and all dirty records are written in one transaction at most
+    ``flush_interval`` seconds later. Other processes sharing the database therefore observe
+    changes with up to that delay. Pending writes are flushed on ``close``.
+    """
+
+    def __init__(self,
+                 flush_interval: float = 1.0,
+                 cache_size: int = 10000,
+                 key_builder: Optional[KeyBuilder] = None) -> None:
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._records: OrderedDict[str, _Record] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    async def _get_record(self, key: StorageKey) -> tuple[str, _Record]:
+        db_key = self.key_builder.build(key)
+        record = self._records.get(db_key)
+        if record is not None:
+            self._records.move_to_end(db_key)
+            return db_key, record
+
+        loaded = await self._load(db_key)
+        # A concurrent write may have populated the cache while the row was being read
+        record = self._records.get(db_key)
+        if record is None:
+            record = self._records[db_key] = loaded
+        return db_key, record
+
+    @staticmethod
+    async def _load(db_key: str) -> _Record:
+        logger.debug("Loading FSM record for key: %s", db_key)
+        async with connection() as conn:
+            async with conn.execute('SELECT state, data FROM fsm_storage WHERE key = ?', (db_key,)) as cursor:
+                row = await cursor.fetchone()
+        if row is None:
+            return _Record()
+        return _Record(row[0], json.loads(row[1]) if row[1] else {})
+
+    def _mark_dirty(self, db_key: str) -> None:
+        self._dirty.add(db_key)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        # Writes arriving while this flush runs schedule the next one
+        self._flush_task = None
+        try:
+            await self.flush()
+        except sql.Error as e:
+            logger.error(f"Error flushing FSM storage: {e}")
+
+    async def flush(self) -> None:
+        # Serialized so that an older snapshot never commits after a newer one
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+
+            dirty, self._dirty = self._dirty, set()
+            upserts = []
+            deletes = []
+            for db_key in dirty:
+                record = self._records.get(db_key)
+                if record is None or (record.state is None and not record.data):
+                    deletes.append((db_key,))
+                else:
+                    upserts.append((db_key, record.state, json.dumps(record.data) if record.data else None))
+
+            try:
+                async with connection() as conn:
+                    if upserts:
+                        await conn.executemany('''
+                            INSERT INTO fsm_storage (key, state, data) VALUES (?, ?, ?)
+                            ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data
+                        ''', upserts)
+                    if deletes:
+                        await conn.executemany('DELETE FROM fsm_storage WHERE key = ?', deletes)
+                    await conn.commit()
+            except BaseException:
+                # Keep the records dirty so the next flush retries them
+                self._dirty |= dirty
+                raise
+            logger.debug("Flushed %s FSM records, deleted %s", len(upserts), len(deletes))
+
+            self._evict()
+
+    def _evict(self) -> None:
+        records = self._records
+        for db_key in list(records.keys())[:max(0, len(records) - self.cache_size)]:
+            if db_key not in self._dirty:
+                del records[db_key]
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        db_key, record = await self._get_record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(db_key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, record = await self._get_record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        db_key, record = await self._get_record(key)
+        record.data = data.copy()
+        self._mark_dirty(db_key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, record = await self._get_record(key)
+        return record.data.copy()
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        logger.info("FSM storage flushed and closed")
@@ -0,0 +1,50 @@
+from typing import Optional
+
+
+class DBBroadcast:
+    def __init__(self,
+                 broadcast_id: int,
+                 text: str,
+                 target: int,
+                 target_id: Optional[int],
+                 state: int,
+                 last_user_id: int,
+                 sent: int,
+                 blocked: int,
+                 failed: int) -> None:
+        self.broadcast_id = broadcast_id
+        self.text = text
+        self.target = target
+        self.target_id = target_id
+        self.state = state
+        self.last_user_id = last_user_id
+        self.sent = sent
+        self.blocked = blocked
+        self.failed = failed
+
+    def __repr__(self):
+        return (f"DBBroadcast(broadcast_id={self.broadcast_id}, target={self.target}, target_id={self.target_id}, "
+                f"state={self.state}, last_user_id={self.last_user_id}, sent={self.sent}, "
+                f"blocked={self.blocked}, failed={self.failed})")
+
+
+class BroadcastReport:
+    def __init__(self,
+                 broadcast_id: int,
+                 sent: int,
+                 blocked: int,
+                 failed: int,
+                 elapsed: float) -> None:
+        self.broadcast_id = broadcast_id
+        self.sent = sent
+        self.blocked = blocked
+        self.failed = failed
+        self.elapsed = elapsed
+
+    @property
+    def total(self) -> int:
+        return self.sent + self.blocked + self.failed
+
+    def __repr__(self):
+        return (f"BroadcastReport(broadcast_id={self.broadcast_id}, sent={self.sent}, blocked={self.blocked}, "
+                f"failed={self.failed}, elapsed={self.elapsed:.2f})")
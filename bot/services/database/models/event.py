@@ -0,0 +1,24 @@
+from typing import Optional
+
+
+class DBEvent:
+    def __init__(self,
+                 event_id: int,
+                 name: str,
+                 description: Optional[str],
+                 data_time: str,
+                 owner_id: int,
+                 approver_id: Optional[int],
+                 state: int) -> None:
+        self.event_id = event_id
+        self.name = name
+        self.description = description
+        self.data_time = data_time
+        self.owner_id = owner_id
+        self.approver_id = approver_id
+        self.state = state
+
+    def __repr__(self):
+        return (f"DBEvent(event_id={self.event_id}, name='{self.name}', description='{self.description}', "
+                f"data_time='{self.data_time}', owner_id={self.owner_id}, approver_id={self.approver_id}, "
+                f"state={self.state})")
@@ -0,0 +1,21 @@
+class TribeStanding:
+    def __init__(self,
+                 tribe_id: int,
+                 tribe_name: str,
+                 member_count: int,
+                 member_balance: int,
+                 tribe_balance: int) -> None:
+        self.tribe_id = tribe_id
+        self.tribe_name = tribe_name
+        self.member_count = member_count
+        self.member_balance = member_balance
+        self.tribe_balance = tribe_balance
+
+    @property
+    def total_balance(self) -> int:
+        return self.member_balance + self.tribe_balance
+
+    def __repr__(self):
+        return (f"TribeStanding(tribe_id={self.tribe_id}, tribe_name='{self.tribe_name}', "
+                f"member_count={self.member_count}, member_balance={self.member_balance}, "
+                f"tribe_balance={self.tribe_balance})")
@@ -1,30 +1,47 @@
-from typing import Optional
-
-
-class DBUser:
-    def __init__(self,
-                 user_id: int,
-                 tg_id: int,
-                 tg_teg: str | None,
-                 name: str,
-                 tribe_id: int,
-                 role_id: int,
-                 wallet_token: int,
-                 language: str,
-                 description: str | None = None,
-                 photo_path: str | None = None) -> None:
-        self.user_id = user_id
-        self.tg_id = tg_id
-        self.tg_teg = tg_teg
-        self.name = name
-        self.tribe_id = tribe_id
-        self.role_id = role_id
-        self.wallet_token = wallet_token
-        self.language = language
-        self.description = description
-        self.photo_path = photo_path
-
-    def __repr__(self):
-        return (f"DBUser(user_id={self.user_id}, tg_id={self.tg_id}, tg_teg='{self.tg_teg}', name='{self.name}', "
-                f"tribe_id={self.tribe_id}, role_id={self.role_id}, wallet_token={self.wallet_token}, "
-                f"language='{self.language}', description='{self.description}', photo_path='{self.photo_path}')")
+import sqlite3
+from typing import Any, NamedTuple
+
+from bot.utils.cache import MISSING
+
+# Column order of DBUser, select exactly these to build users with ``db_user_factory``
+USER_COLUMNS = 'user_id, tg_id, tg_teg, name, tribe_id, role_id, wallet_token, language, description, photo_path'
+
+
+class DBUser(NamedTuple):
+    """
+    Immutable user record: tuple storage without a per-instance ``__dict__``.
+
+    Instances are shared through the user cache, so they must never be modified in place.
+    """
+
+    user_id: int
+    tg_id: int
+    tg_teg: str | None
+    name: str
+    tribe_id: int
+    role_id: int
+    wallet_token: int
+    language: str
+    description: str | None = None
+    photo_path: str | None = None
+
+
+def db_user_factory(cursor: sqlite3.Cursor, row: tuple) -> DBUser:
+    """Row factory building DBUser straight from rows selected with ``USER_COLUMNS``."""
+    return DBUser._make(row)
+
+
+class ProfileUpdate(NamedTuple):
+    """Pending changes of a user's non-critical fields, fields left as ``MISSING`` keep their stored value."""
+
+    last_seen: int
+    tg_teg: Any = MISSING
+    language: Any = MISSING
+
+    def merge(self, newer: 'ProfileUpdate') -> 'ProfileUpdate':
+        """Combines with a later update, whose fields win where it sets them."""
+        return ProfileUpdate(
+            max(self.last_seen, newer.last_seen),
+            self.tg_teg if newer.tg_teg is MISSING else newer.tg_teg,
+            self.language if newer.language is MISSING else newer.language,
+        )
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, Optional
+
+import aiosqlite as sql
+
+from bot.services.metrics import DB_CONNECTION_OPEN, DB_CONNECTION_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of long-lived aiosqlite connections.
+
+    Every aiosqlite connection owns a worker thread and an open file handle, so opening
+    one per query dominates the cost of short statements. The pool opens the connections
+    once and hands them out exclusively for the duration of an ``acquire`` block.
+    """
+
+    def __init__(self, path: str, size: int, pragmas: Iterable[str] = ()) -> None:
+        if size < 1:
+            raise ValueError(f"Pool size must be positive, got {size}")
+        self.path = path
+        self.size = size
+        self.pragmas = tuple(pragmas)
+        self._connections: list[sql.Connection] = []
+        self._idle: asyncio.Queue[sql.Connection] = asyncio.Queue()
+        self._closed = True
+
+    async def open(self) -> None:
+        logger.debug(f"Opening {self.size} connections to the database: {self.path}")
+        # Every connection opens in its own worker thread, so they are opened side by side
+        connections = await asyncio.gather(*(self._connect() for _ in range(self.size)), return_exceptions=True)
+        failed = [conn for conn in connections if isinstance(conn, BaseException)]
+        for conn in connections:
+            if not isinstance(conn, BaseException):
+                if failed:
+                    await conn.close()
+                    continue
+                self._connections.append(conn)
+                self._idle.put_nowait(conn)
+        if failed:
+            raise failed[0]
+        self._closed = False
+        logger.info(f"Connection pool opened with {self.size} connections")
+
+    async def _connect(self) -> sql.Connection:
+        started = time.perf_counter()
+        conn = await sql.connect(self.path)
+        try:
+            for pragma in self.pragmas:
+                await conn.execute(pragma)
+        except BaseException:
+            await conn.close()
+            raise
+        DB_CONNECTION_OPEN.observe(time.perf_counter() - started)
+        return conn
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+        self._idle = asyncio.Queue()
+        logger.info("Connection pool closed")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[sql.Connection]:
+        if self._closed:
+            raise RuntimeError("Connection pool is not open")
+        started = time.perf_counter()
+        conn = await self._idle.get()
+        DB_CONNECTION_WAIT.observe(time.perf_counter() - started)
+        try:
+            yield conn
+        finally:
+            # Never hand a connection with a dangling transaction to the next caller
+            if conn.in_transaction:
+                logger.warning("Connection returned to the pool with an open transaction, rolling back")
+                await conn.rollback()
+            self._idle.put_nowait(conn)
+
+
+_pool: Optional[ConnectionPool] = None
+
+
+async def open_pool(path: str, size: int, pragmas: Iterable[str] = ()) -> ConnectionPool:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+    _pool = ConnectionPool(path, size, pragmas)
+    await _pool.open()
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def connection():
+    """
+    Acquire a pooled connection for the duration of an ``async with`` block.
+
+    :return: Async context manager yielding an aiosqlite connection.
+    :raises RuntimeError: If the pool has not been opened by ``base.initialize``.
+    """
+    if _pool is None:
+        raise RuntimeError("Database pool is not initialized")
+    return _pool.acquire()
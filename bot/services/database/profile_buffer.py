@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+import aiosqlite as sql
+
+from bot.services.database.models.user import ProfileUpdate
+from bot.services.database.response import user as db_user
+from bot.utils.cache import MISSING
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileBuffer:
+    """
+    Write-behind buffer for non-critical user fields: tg_teg, language and last_seen.
+
+    ``touch`` only records the change in memory, repeated touches of a user are coalesced into one row. All pending
+    rows are written in one transaction at most ``flush_interval`` seconds later, or right away once ``flush_size``
+    users are pending. Readers therefore see these fields with up to that delay. Pending writes are flushed on
+    ``close``.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, flush_size: int = 1000) -> None:
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._pending: dict[int, ProfileUpdate] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    def touch(self, tg_id: int, tg_teg: Any = MISSING, language: Any = MISSING) -> None:
+        """
+        Marks the user as seen now and queues the given fields, omitted fields keep their stored value.
+
+        :param tg_id: Telegram id of the user, unknown users are ignored when flushing.
+        :param tg_teg: New tag, None clears it.
+        :param language: New language.
+        """
+        update = ProfileUpdate(int(time.time()), tg_teg, language)
+        pending = self._pending.get(tg_id)
+        self._pending[tg_id] = update if pending is None else pending.merge(update)
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+        if len(self._pending) >= self.flush_size:
+            self._full.set()
+
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.wait_for(self._full.wait(), self.flush_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._full.clear()
+        # Touches arriving while this flush runs schedule the next one
+        self._flush_task = None
+        try:
+            await self.flush()
+        except sql.Error as e:
+            logger.error(f"Error flushing profile buffer: {e}")
+
+    async def flush(self) -> None:
+        # Serialized so that an older snapshot never commits after a newer one
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, {}
+            try:
+                await db_user.update_user_profiles(pending)
+            except BaseException:
+                # Keep the updates pending so the next flush retries them, touches made meanwhile win
+                for tg_id, update in pending.items():
+                    newer = self._pending.get(tg_id)
+                    self._pending[tg_id] = update if newer is None else update.merge(newer)
+                raise
+            logger.debug("Flushed %s profile updates", len(pending))
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        logger.info("Profile buffer flushed and closed")
+
+    def __len__(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,133 @@
+import aiosqlite as sql
+import logging
+from typing import Optional
+
+from ..pool import connection
+from bot.services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# app_meta key of the last wallet transaction already counted
+LEDGER_CURSOR_KEY = 'achievements_ledger_cursor'
+
+# (user_id, counter) pairs per VALUES list, well below SQLite's bound parameter limit
+_CHUNK_SIZE = 400
+
+
+@timed
+async def get_ledger_cursor() -> int:
+    logger.debug("get_ledger_cursor called")
+    try:
+        async with connection() as conn:
+            async with conn.execute('SELECT value FROM app_meta WHERE key = ?', (LEDGER_CURSOR_KEY,)) as cursor:
+                row = await cursor.fetchone()
+        return int(row[0]) if row else 0
+    except sql.Error as e:
+        logger.error(f"Error getting achievement ledger cursor: {e}")
+        raise
+
+
+@timed
+async def get_ledger_changes(after_id: int, limit: int = 1000) -> list[tuple[int, Optional[int], Optional[int], int]]:
+    """
+    Wallet transactions after ``after_id`` in id order, reduced to the users involved.
+
+    :return: Rows of (transaction_id, sender user_id, receiver user_id, amount), the user ids are None for tribe
+        wallets and mints.
+    """
+    logger.debug("get_ledger_changes called with after_id: %s, limit: %s", after_id, limit)
+    try:
+        async with connection() as conn:
+            async with conn.execute('''
+                SELECT t.transaction_id, s.user_id, r.user_id, t.amount
+                FROM wallet_transactions t
+                LEFT JOIN users s ON s.wallet_token = t.from_token
+                LEFT JOIN users r ON r.wallet_token = t.to_token
+                WHERE t.transaction_id > ?
+                ORDER BY t.transaction_id
+                LIMIT ?
+            ''', (after_id, limit)) as cursor:
+                return await cursor.fetchall()
+    except sql.Error as e:
+        logger.error(f"Error getting ledger changes: {e}")
+        raise
+
+
+@timed
+async def record_progress(deltas: dict[tuple[int, int], int],
+                          thresholds: dict[int, list[tuple[int, str]]],
+                          ledger_cursor: Optional[tuple[int, int]] = None) -> Optional[list[tuple[int, str]]]:
+    """
+    Add to user counters and award the achievements whose threshold was crossed, in one transaction.
+
+    Only the new counter values are compared with the thresholds, so no history is read. An achievement is
+    awarded at most once per user.
+
+    :param deltas: Increments keyed by (user_id, counter value).
+    :param thresholds: Per counter value, the (threshold, achievement id) pairs to check.
+    :param ledger_cursor: If given, the (read, counted) last wallet transaction ids. The stored cursor is moved
+        from the read to the counted id in the same transaction.
+    :return: Newly awarded (user_id, achievement id) pairs, or None if the stored cursor was no longer the read
+        one, i.e. another evaluation already counted these transfers. Nothing is written then.
+    """
+    logger.debug("record_progress called with %s deltas, ledger_cursor: %s", len(deltas), ledger_cursor)
+    keys = list(deltas)
+    awarded = []
+    try:
+        async with connection() as conn:
+            await conn.execute('BEGIN IMMEDIATE')
+            try:
+                await conn.executemany('''
+                    INSERT INTO user_counters (user_id, counter, value) VALUES (?, ?, ?)
+                    ON CONFLICT (user_id, counter) DO UPDATE SET value = value + excluded.value
+                ''', [(user_id, counter, delta) for (user_id, counter), delta in deltas.items()])
+
+                for start in range(0, len(keys), _CHUNK_SIZE):
+                    chunk = keys[start:start + _CHUNK_SIZE]
+                    async with conn.execute(f'''
+                        SELECT user_id, counter, value FROM user_counters
+                        WHERE (user_id, counter) IN (VALUES {', '.join(['(?, ?)'] * len(chunk))})
+                    ''', [value for key in chunk for value in key]) as cursor:
+                        for user_id, counter, value in await cursor.fetchall():
+                            previous = value - deltas[user_id, counter]
+                            awarded.extend((user_id, achievement) for threshold, achievement
+                                           in thresholds.get(counter, ()) if previous < threshold <= value)
+
+                if awarded:
+                    await conn.executemany('''
+                        INSERT OR IGNORE INTO user_achievements (user_id, achievement) VALUES (?, ?)
+                    ''', awarded)
+                if ledger_cursor is not None:
+                    read, counted = ledger_cursor
+                    async with conn.execute('''
+                        UPDATE app_meta SET value = ? WHERE key = ? AND CAST(value AS INTEGER) = ?
+                    ''', (str(counted), LEDGER_CURSOR_KEY, read)) as cursor:
+                        moved = cursor.rowcount
+                    if not moved:
+                        await conn.rollback()
+                        logger.warning("Achievement ledger cursor moved past %s meanwhile, progress discarded", read)
+                        return None
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+    except sql.Error as e:
+        logger.error(f"Error recording achievement progress: {e}")
+        raise
+    logger.debug("Recorded %s counter updates, awarded %s achievements", len(deltas), len(awarded))
+    return awarded
+
+
+@timed
+async def get_achievements(user_id: int) -> list[tuple[str, int]]:
+    """:return: (achievement id, awarded_at) pairs of the user, oldest first."""
+    logger.debug("get_achievements called with user_id: %s", user_id)
+    try:
+        async with connection() as conn:
+            async with conn.execute('''
+                SELECT achievement, awarded_at FROM user_achievements WHERE user_id = ? ORDER BY awarded_at
+            ''', (user_id,)) as cursor:
+                return await cursor.fetchall()
+    except sql.Error as e:
+        logger.error(f"Error getting achievements: {e}")
+        raise
@@ -1,34 +1,78 @@
 import aiosqlite as sql
+import hashlib
 import logging
+import time
 
 from bot.enums.enums import EventState, UserRole, Tribe
 from bot.services.database import db_config
-from .tribe import add_tribe
+from bot.services.database.pool import open_pool
+from .tribe import REBUILD_TRIBE_STANDINGS_SQL
+from .ledger import MINOR_UNITS_PER_COIN
+from .wallet import RESERVED_WALLET_TOKENS
 
 logger = logging.getLogger(__name__)
 
-
-async def initialize(db_path: str):
+# Applied to every pooled connection, WAL makes NORMAL durable across application crashes
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous = NORMAL;',
+)
+
+# Rows every database must contain, the tribe_id doubles as the wallet_token of the tribe
+SEED_TRIBES = tuple((tribe.value, tribe.name.capitalize()) for tribe in Tribe)
+SEED_EVENT_STATES = (
+    (EventState.ON_REVIEW.value, 'on_review'),  # На рассмотрении
+    (EventState.APPROVED.value, 'approved'),  # Одобрено
+    (EventState.REJECTED.value, 'rejected'),  # Отклонено
+    (EventState.IN_PROGRESS.value, 'in_progress'),  # В процессе
+    (EventState.COMPLETED.value, 'completed'),  # Завершено
+)
+SEED_USER_ROLES = (
+    (UserRole.USER.value, 'user'),
+    (UserRole.ADMIN.value, 'admin'),
+)
+
+
+async def initialize(db_path: str, pool_size: int = 4):
     db_config.path = db_path
     logger.debug(f"Initializing database with path: {db_config.path}")
 
     try:
+        # Schema setup runs once on a dedicated connection
         async with sql.connect(db_config.path) as conn:
+            # WAL lets readers proceed while a writer commits, the mode is persisted in the file
+            async with conn.execute('PRAGMA journal_mode = WAL;') as cursor:
+                journal_mode = (await cursor.fetchone())[0]
+            logger.debug(f"Journal mode: {journal_mode}")
+
+            # Migrations rebuild tables, which must happen before foreign keys are enforced
+            started = time.perf_counter()
+            await _migrate(conn)
+            migrated = time.perf_counter()
+
             async with conn.cursor() as cursor:
                 # Enable foreign key support
                 await cursor.execute('PRAGMA foreign_keys = ON;')
                 logger.debug("Enabled foreign key support")
 
-                await _create_tables(conn)
-                logger.debug("Tables creation process completed")
+            # Shared connections used by every response function
+            await open_pool(db_config.path, pool_size, CONNECTION_PRAGMAS)
+            pool_opened = time.perf_counter()
 
+            # Seeding is skipped on restarts, unless the seed rows changed since they were last inserted
+            fingerprint = _seed_fingerprint()
+            if await _get_meta(conn, 'seed_fingerprint') == fingerprint:
+                logger.debug("Initial data is up to date, skipping insertion")
+            else:
                 await _insert_initial_data(conn)
+                await _set_meta(conn, 'seed_fingerprint', fingerprint)
                 logger.debug("Initial data insertion process completed")
 
             await conn.commit()
             logger.debug("Transaction committed")
+            seeded = time.perf_counter()
 
-        logger.info("Database initialized successfully")
+        logger.info("Database initialized successfully (migrations %.1fms, pool %.1fms, seed %.1fms)",
+                    (migrated - started) * 1000, (pool_opened - migrated) * 1000, (seeded - pool_opened) * 1000)
     except sql.Error as e:
         logger.critical(f"Error initializing database: {e}")
         raise
@@ -37,6 +81,51 @@ async def initialize(db_path: str):
         raise
 
 
+async def _get_schema_version(conn) -> int:
+    async with conn.execute('PRAGMA user_version;') as cursor:
+        return (await cursor.fetchone())[0]
+
+
+def _seed_fingerprint() -> str:
+    seed = repr((SCHEMA_VERSION, SEED_TRIBES, SEED_EVENT_STATES, SEED_USER_ROLES))
+    return hashlib.sha256(seed.encode()).hexdigest()
+
+
+async def _get_meta(conn, key: str):
+    async with conn.execute('SELECT value FROM app_meta WHERE key = ?', (key,)) as cursor:
+        row = await cursor.fetchone()
+    return row[0] if row else None
+
+
+async def _set_meta(conn, key: str, value: str) -> None:
+    await conn.execute('''
+        INSERT INTO app_meta (key, value) VALUES (?, ?)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value
+    ''', (key, value))
+
+
+async def _migrate(conn):
+    version = await _get_schema_version(conn)
+    if version == SCHEMA_VERSION:
+        logger.debug(f"Database schema is up to date (version {version}), skipping migrations")
+        return
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema version {version} is newer than supported {SCHEMA_VERSION}")
+
+    for target_version, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        logger.info(f"Migrating database schema to version {target_version}")
+        # Each migration and its version bump are committed atomically
+        await conn.execute('BEGIN')
+        try:
+            await migration(conn)
+            await conn.execute(f'PRAGMA user_version = {target_version};')
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+    logger.info(f"Database schema migrated from version {version} to {SCHEMA_VERSION}")
+
+
 async def _create_tables(conn):
     logger.debug("Starting to create tables")
     try:
@@ -48,12 +137,418 @@ async def _create_tables(conn):
             await _create_event_subscribers_table(cursor)
             await _create_wallets_table(cursor)
             await _create_user_roles_table(cursor)
+            await _create_fsm_storage_table(cursor)
         logger.info("All tables created successfully")
     except sql.Error as e:
         logger.critical(f"Critical error creating tables: {e}")
         raise
 
 
+async def _create_indexes(conn):
+    logger.debug("Creating indexes")
+    try:
+        async with conn.cursor() as cursor:
+            # Drop duplicated subscriptions before enforcing uniqueness
+            await cursor.execute('''
+            DELETE FROM event_subscribers WHERE rowid NOT IN (
+                SELECT MIN(rowid) FROM event_subscribers GROUP BY event_id, subscriber_id
+            )
+            ''')
+            await cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_event_subscribers_event_subscriber
+            ON event_subscribers (event_id, subscriber_id)
+            ''')
+            await cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_event_subscribers_subscriber ON event_subscribers (subscriber_id)
+            ''')
+            await cursor.execute('CREATE INDEX IF NOT EXISTS idx_event_state_dataTime ON event (state, dataTime)')
+            await cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_tribe ON users (tribe_id)')
+        logger.info("Indexes created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating indexes: {e}")
+        raise
+
+
+async def _create_ledger(conn):
+    logger.debug("Creating wallet ledger")
+    try:
+        async with conn.cursor() as cursor:
+            # Balances move from REAL coins to INTEGER minor units
+            await cursor.execute('''
+            CREATE TABLE wallets_new (
+                wallet_token INTEGER PRIMARY KEY AUTOINCREMENT,
+                balance INTEGER NOT NULL DEFAULT 0 CHECK (balance >= 0)
+            )
+            ''')
+            await cursor.execute('''
+            INSERT INTO wallets_new (wallet_token, balance)
+            SELECT wallet_token, CAST(ROUND(COALESCE(balance, 0) * ?) AS INTEGER) FROM wallets
+            ''', (MINOR_UNITS_PER_COIN,))
+            await cursor.execute('DROP TABLE wallets')
+            await cursor.execute('ALTER TABLE wallets_new RENAME TO wallets')
+
+            await cursor.execute('''
+            CREATE TABLE IF NOT EXISTS wallet_transactions (
+                transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                from_token INTEGER,
+                to_token INTEGER NOT NULL,
+                amount INTEGER NOT NULL CHECK (amount > 0),
+                reason TEXT,
+                created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                FOREIGN KEY(from_token) REFERENCES wallets(wallet_token),
+                FOREIGN KEY(to_token) REFERENCES wallets(wallet_token)
+            )
+            ''')
+            await cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_wallet_transactions_from ON wallet_transactions (from_token, transaction_id)
+            ''')
+            await cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_wallet_transactions_to ON wallet_transactions (to_token, transaction_id)
+            ''')
+
+            # The ledger is append-only
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS wallet_transactions_no_update BEFORE UPDATE ON wallet_transactions
+            BEGIN
+                SELECT RAISE(ABORT, 'wallet_transactions is append-only');
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS wallet_transactions_no_delete BEFORE DELETE ON wallet_transactions
+            BEGIN
+                SELECT RAISE(ABORT, 'wallet_transactions is append-only');
+            END
+            ''')
+        logger.info("Wallet ledger created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating wallet ledger: {e}")
+        raise
+
+
+async def _create_tribe_standings(conn):
+    logger.debug("Creating tribe standings")
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tribe_standings (
+                tribe_id INTEGER PRIMARY KEY,
+                member_count INTEGER NOT NULL DEFAULT 0,
+                member_balance INTEGER NOT NULL DEFAULT 0,
+                tribe_balance INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY(tribe_id) REFERENCES tribes(tribe_id)
+            )
+            ''')
+
+            # The triggers keep the standings in step with every write to tribes, users and wallets
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tribe_standings_tribe_insert AFTER INSERT ON tribes
+            BEGIN
+                INSERT OR IGNORE INTO tribe_standings (tribe_id, tribe_balance) VALUES (
+                    NEW.tribe_id,
+                    COALESCE((SELECT balance FROM wallets WHERE wallet_token = NEW.wallet_token), 0)
+                );
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tribe_standings_tribe_delete AFTER DELETE ON tribes
+            BEGIN
+                DELETE FROM tribe_standings WHERE tribe_id = OLD.tribe_id;
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tribe_standings_user_insert AFTER INSERT ON users
+            BEGIN
+                UPDATE tribe_standings
+                SET member_count = member_count + 1,
+                    member_balance = member_balance
+                        + COALESCE((SELECT balance FROM wallets WHERE wallet_token = NEW.wallet_token), 0)
+                WHERE tribe_id = NEW.tribe_id;
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tribe_standings_user_delete AFTER DELETE ON users
+            BEGIN
+                UPDATE tribe_standings
+                SET member_count = member_count - 1,
+                    member_balance = member_balance
+                        - COALESCE((SELECT balance FROM wallets WHERE wallet_token = OLD.wallet_token), 0)
+                WHERE tribe_id = OLD.tribe_id;
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tribe_standings_user_move AFTER UPDATE OF tribe_id, wallet_token ON users
+            BEGIN
+                UPDATE tribe_standings
+                SET member_count = member_count - 1,
+                    member_balance = member_balance
+                        - COALESCE((SELECT balance FROM wallets WHERE wallet_token = OLD.wallet_token), 0)
+                WHERE tribe_id = OLD.tribe_id;
+                UPDATE tribe_standings
+                SET member_count = member_count + 1,
+                    member_balance = member_balance
+                        + COALESCE((SELECT balance FROM wallets WHERE wallet_token = NEW.wallet_token), 0)
+                WHERE tribe_id = NEW.tribe_id;
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tribe_standings_wallet_insert AFTER INSERT ON wallets
+            WHEN NEW.balance != 0
+            BEGIN
+                UPDATE tribe_standings SET member_balance = member_balance + NEW.balance
+                WHERE tribe_id = (SELECT tribe_id FROM users WHERE wallet_token = NEW.wallet_token);
+                UPDATE tribe_standings SET tribe_balance = tribe_balance + NEW.balance
+                WHERE tribe_id IN (SELECT tribe_id FROM tribes WHERE wallet_token = NEW.wallet_token);
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tribe_standings_wallet_update AFTER UPDATE OF balance ON wallets
+            WHEN NEW.balance != OLD.balance
+            BEGIN
+                UPDATE tribe_standings SET member_balance = member_balance + NEW.balance - OLD.balance
+                WHERE tribe_id = (SELECT tribe_id FROM users WHERE wallet_token = NEW.wallet_token);
+                UPDATE tribe_standings SET tribe_balance = tribe_balance + NEW.balance - OLD.balance
+                WHERE tribe_id IN (SELECT tribe_id FROM tribes WHERE wallet_token = NEW.wallet_token);
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tribe_standings_wallet_delete AFTER DELETE ON wallets
+            WHEN OLD.balance != 0
+            BEGIN
+                UPDATE tribe_standings SET member_balance = member_balance - OLD.balance
+                WHERE tribe_id = (SELECT tribe_id FROM users WHERE wallet_token = OLD.wallet_token);
+                UPDATE tribe_standings SET tribe_balance = tribe_balance - OLD.balance
+                WHERE tribe_id IN (SELECT tribe_id FROM tribes WHERE wallet_token = OLD.wallet_token);
+            END
+            ''')
+
+            await cursor.execute('DELETE FROM tribe_standings')
+            await cursor.execute(REBUILD_TRIBE_STANDINGS_SQL)
+        logger.info("Tribe standings created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating tribe standings: {e}")
+        raise
+
+
+async def _make_event_approver_optional(conn):
+    logger.debug("Making event approver optional")
+    try:
+        async with conn.cursor() as cursor:
+            # Events on review have no approver yet, SQLite needs a table rebuild to drop NOT NULL
+            await cursor.execute('''
+            CREATE TABLE event_new (
+                event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                description TEXT,
+                dataTime TEXT NOT NULL,
+                owner_id INTEGER NOT NULL,
+                approver_id INTEGER,
+                state INTEGER NOT NULL,
+                FOREIGN KEY(owner_id) REFERENCES users(user_id),
+                FOREIGN KEY(approver_id) REFERENCES users(user_id),
+                FOREIGN KEY(state) REFERENCES eventStates(eventState_id)
+            )
+            ''')
+            await cursor.execute('''
+            INSERT INTO event_new (event_id, name, description, dataTime, owner_id, approver_id, state)
+            SELECT event_id, name, description, dataTime, owner_id, approver_id, state FROM event
+            ''')
+            await cursor.execute('DROP TABLE event')
+            await cursor.execute('ALTER TABLE event_new RENAME TO event')
+            await cursor.execute('CREATE INDEX IF NOT EXISTS idx_event_state_dataTime ON event (state, dataTime)')
+        logger.info("Event approver made optional successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error making event approver optional: {e}")
+        raise
+
+
+async def _create_broadcasts(conn):
+    logger.debug("Creating broadcasts table")
+    try:
+        async with conn.cursor() as cursor:
+            # last_user_id is the resume cursor: every recipient up to it has been handled
+            await cursor.execute('''
+            CREATE TABLE IF NOT EXISTS broadcasts (
+                broadcast_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT NOT NULL,
+                target INTEGER NOT NULL,
+                target_id INTEGER,
+                state INTEGER NOT NULL DEFAULT 0,
+                last_user_id INTEGER NOT NULL DEFAULT 0,
+                sent INTEGER NOT NULL DEFAULT 0,
+                blocked INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                finished_at INTEGER
+            )
+            ''')
+            await cursor.execute('CREATE INDEX IF NOT EXISTS idx_broadcasts_state ON broadcasts (state)')
+            # Role broadcasts page through the role's users by user_id
+            await cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_role ON users (role_id, user_id)')
+        logger.info("Broadcasts table created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating broadcasts table: {e}")
+        raise
+
+
+async def _create_users_search(conn):
+    logger.debug("Creating users search index")
+    try:
+        async with conn.cursor() as cursor:
+            # External content table: the index stores tokens only, the text itself stays in users
+            await cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+                name, tg_teg, description,
+                content='users', content_rowid='user_id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users
+            BEGIN
+                INSERT INTO users_fts (rowid, name, tg_teg, description)
+                VALUES (NEW.user_id, NEW.name, NEW.tg_teg, NEW.description);
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users
+            BEGIN
+                INSERT INTO users_fts (users_fts, rowid, name, tg_teg, description)
+                VALUES ('delete', OLD.user_id, OLD.name, OLD.tg_teg, OLD.description);
+            END
+            ''')
+            await cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF name, tg_teg, description ON users
+            BEGIN
+                INSERT INTO users_fts (users_fts, rowid, name, tg_teg, description)
+                VALUES ('delete', OLD.user_id, OLD.name, OLD.tg_teg, OLD.description);
+                INSERT INTO users_fts (rowid, name, tg_teg, description)
+                VALUES (NEW.user_id, NEW.name, NEW.tg_teg, NEW.description);
+            END
+            ''')
+            await cursor.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+        logger.info("Users search index created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating users search index: {e}")
+        raise
+
+
+async def _create_media_files(conn):
+    logger.debug("Creating media files table")
+    try:
+        async with conn.cursor() as cursor:
+            # file_id is only valid for the media type it was uploaded as
+            await cursor.execute('''
+            CREATE TABLE IF NOT EXISTS media_files (
+                path TEXT NOT NULL,
+                media_type TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                file_id TEXT NOT NULL,
+                uploaded_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                PRIMARY KEY (path, media_type)
+            )
+            ''')
+        logger.info("Media files table created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating media files table: {e}")
+        raise
+
+
+async def _create_app_meta(conn):
+    logger.debug("Creating app meta table")
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute('''
+            CREATE TABLE IF NOT EXISTS app_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+            ''')
+        logger.info("App meta table created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating app meta table: {e}")
+        raise
+
+
+async def _add_users_last_seen(conn):
+    logger.debug("Adding last_seen column to users table")
+    try:
+        async with conn.cursor() as cursor:
+            # Unix time of the user's latest update, written behind by the profile buffer
+            await cursor.execute('''ALTER TABLE users ADD COLUMN last_seen INTEGER''')
+        logger.info("Last seen column added successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error adding last_seen column: {e}")
+        raise
+
+
+async def _create_sequences(conn):
+    logger.debug("Creating sequences table")
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sequences (
+                name TEXT PRIMARY KEY,
+                next_value INTEGER NOT NULL
+            )
+            ''')
+            # Existing user wallets are keyed by tg_id, new tokens continue above every token in use
+            await cursor.execute('''
+            INSERT OR IGNORE INTO sequences (name, next_value)
+            SELECT 'wallet_token', MAX(COALESCE(MAX(wallet_token), 0), ?) + 1 FROM wallets
+            ''', (RESERVED_WALLET_TOKENS,))
+        logger.info("Sequences table created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating sequences table: {e}")
+        raise
+
+
+async def _add_event_reminded(conn):
+    logger.debug("Adding reminded column to event table")
+    try:
+        async with conn.cursor() as cursor:
+            # Set once the reminder of an event has been handed to the broadcaster
+            await cursor.execute('''ALTER TABLE event ADD COLUMN reminded INTEGER NOT NULL DEFAULT 0''')
+        logger.info("Reminded column added successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error adding reminded column: {e}")
+        raise
+
+
+async def _create_achievements(conn):
+    logger.debug("Creating achievement tables")
+    try:
+        async with conn.cursor() as cursor:
+            # Running totals per user and AchievementCounter, only ever incremented
+            await cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_counters (
+                user_id INTEGER NOT NULL,
+                counter INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                PRIMARY KEY (user_id, counter),
+                FOREIGN KEY(user_id) REFERENCES users(user_id)
+            ) WITHOUT ROWID
+            ''')
+            await cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_achievements (
+                user_id INTEGER NOT NULL,
+                achievement TEXT NOT NULL,
+                awarded_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                PRIMARY KEY (user_id, achievement),
+                FOREIGN KEY(user_id) REFERENCES users(user_id)
+            ) WITHOUT ROWID
+            ''')
+            # Transfers are counted from the ledger onwards, existing ones are not replayed
+            await cursor.execute('''
+            INSERT OR IGNORE INTO app_meta (key, value)
+            SELECT 'achievements_ledger_cursor', COALESCE(MAX(transaction_id), 0) FROM wallet_transactions
+            ''')
+        logger.info("Achievement tables created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating achievement tables: {e}")
+        raise
+
+
 async def _insert_initial_data(conn):
     logger.debug("Inserting initial data")
     try:
@@ -195,15 +690,35 @@ async def _create_user_roles_table(cursor):
         raise
 
 
+async def _create_fsm_storage_table(cursor):
+    logger.debug("Creating fsm_storage table")
+    try:
+        await cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT
+        )
+        ''')
+        logger.info("Fsm_storage table created successfully")
+    except sql.Error as e:
+        logger.critical(f"Critical error creating fsm_storage table: {e}")
+        raise
+
+
 async def _initial_tribes(cursor):
     logger.debug("Inserting initial tribes")
     try:
-        await add_tribe('Aqua', Tribe.AQUA.value, Tribe.AQUA.value)
-        await add_tribe('Ignis', Tribe.IGNIS.value, Tribe.IGNIS.value)
-        # await add_tribe('Air', Tribe.AIR.value, Tribe.AIR.value)
-        # await add_tribe('Terra', Tribe.TERRA.value, Tribe.TERRA.value)
+        # Seeded in the caller's transaction, a tribe whose name or id is taken is left alone
+        await cursor.executemany('''
+            INSERT OR IGNORE INTO wallets (wallet_token, balance) VALUES (?, 0)
+            ''', [(tribe_id,) for tribe_id, _ in SEED_TRIBES])
+        await cursor.executemany('''
+            INSERT INTO tribes (tribe_id, tribe_name, wallet_token)
+            SELECT ?1, ?2, ?1 WHERE NOT EXISTS (SELECT 1 FROM tribes WHERE tribe_id = ?1 OR tribe_name = ?2)
+            ''', SEED_TRIBES)
         logger.info("Initial tribes inserted successfully")
-    except Exception as e:
+    except sql.Error as e:
         logger.critical(f"Critical error inserting initial tribes: {e}")
         raise
 
@@ -213,13 +728,7 @@ async def _initial_eventState(cursor):
     try:
         await cursor.executemany('''
             INSERT OR IGNORE INTO eventStates (eventState_id, state) VALUES (?, ?)
-            ''', [
-            (EventState.ON_REVIEW.value, 'on_review'),  # На рассмотрении
-            (EventState.APPROVED.value, 'approved'),  # Одобрено
-            (EventState.REJECTED.value, 'rejected'),  # Отклонено
-            (EventState.IN_PROGRESS.value, 'in_progress'),  # В процессе
-            (EventState.COMPLETED.value, 'completed')  # Завершено
-        ])
+            ''', SEED_EVENT_STATES)
         logger.info("Initial event states inserted successfully")
     except sql.Error as e:
         logger.critical(f"Critical error inserting initial event states: {e}")
@@ -231,11 +740,27 @@ async def _initial_userRoles(cursor):
     try:
         await cursor.executemany('''
             INSERT OR IGNORE INTO userRoles (userRole_id, role_name) VALUES (?, ?)
-            ''', [
-            (UserRole.USER.value, 'user'),
-            (UserRole.ADMIN.value, 'admin'),
-        ])
+            ''', SEED_USER_ROLES)
         logger.info("Initial user roles inserted successfully")
     except sql.Error as e:
         logger.critical(f"Critical error inserting initial user roles: {e}")
         raise
+
+
+# Ordered schema migrations, the database stores the number of applied ones in PRAGMA user_version
+MIGRATIONS = [
+    _create_tables,
+    _create_indexes,
+    _create_ledger,
+    _create_tribe_standings,
+    _make_event_approver_optional,
+    _create_broadcasts,
+    _create_users_search,
+    _create_media_files,
+    _create_app_meta,
+    _add_users_last_seen,
+    _create_sequences,
+    _add_event_reminded,
+    _create_achievements,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
@@ -0,0 +1,119 @@
+import aiosqlite as sql
+import logging
+from typing import Optional
+
+from .. import db_config
+from ..pool import connection
+from bot.enums.enums import BroadcastState, BroadcastTarget
+from bot.services.database.models.broadcast import DBBroadcast
+from bot.services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+_BROADCAST_COLUMNS = 'broadcast_id, text, target, target_id, state, last_user_id, sent, blocked, failed'
+
+# Every query pages by user_id, so a page costs the same no matter how far the broadcast got
+_RECIPIENTS_SQL = {
+    BroadcastTarget.ALL: '''
+        SELECT user_id, tg_id FROM users
+        WHERE user_id > ? ORDER BY user_id LIMIT ?
+    ''',
+    BroadcastTarget.TRIBE: '''
+        SELECT user_id, tg_id FROM users
+        WHERE tribe_id = ? AND user_id > ? ORDER BY user_id LIMIT ?
+    ''',
+    BroadcastTarget.ROLE: '''
+        SELECT user_id, tg_id FROM users
+        WHERE role_id = ? AND user_id > ? ORDER BY user_id LIMIT ?
+    ''',
+    BroadcastTarget.EVENT: '''
+        SELECT u.user_id, u.tg_id FROM event_subscribers s
+        JOIN users u ON u.user_id = s.subscriber_id
+        WHERE s.event_id = ? AND s.subscriber_id > ? ORDER BY s.subscriber_id LIMIT ?
+    ''',
+}
+
+
+@timed
+async def create_broadcast(text: str, target: BroadcastTarget, target_id: Optional[int] = None) -> int:
+    logger.debug("create_broadcast called with target: %s, target_id: %s", target, target_id)
+    if (target is BroadcastTarget.ALL) != (target_id is None):
+        raise ValueError(f"target_id is required for {target.name} broadcasts and only for them")
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            async with conn.execute('''
+                INSERT INTO broadcasts (text, target, target_id, state) VALUES (?, ?, ?, ?)
+            ''', (text, target.value, target_id, BroadcastState.IN_PROGRESS.value)) as cursor:
+                broadcast_id = cursor.lastrowid
+            await conn.commit()
+        logger.info("Broadcast %s created for %s %s", broadcast_id, target.name, target_id)
+        return broadcast_id
+    except sql.Error as e:
+        logger.error(f"Error creating broadcast: {e}")
+        raise
+
+
+@timed
+async def get_broadcast(broadcast_id: int) -> Optional[DBBroadcast]:
+    logger.debug("get_broadcast called with broadcast_id: %s", broadcast_id)
+    try:
+        async with connection() as conn:
+            async with conn.execute(f'SELECT {_BROADCAST_COLUMNS} FROM broadcasts WHERE broadcast_id = ?',
+                                    (broadcast_id,)) as cursor:
+                row = await cursor.fetchone()
+        return DBBroadcast(*row) if row else None
+    except sql.Error as e:
+        logger.exception(f"Error retrieving broadcast: {e}")
+        return None
+
+
+@timed
+async def get_unfinished_broadcasts() -> list[DBBroadcast]:
+    logger.debug("get_unfinished_broadcasts called")
+    try:
+        async with connection() as conn:
+            async with conn.execute(f'''
+                SELECT {_BROADCAST_COLUMNS} FROM broadcasts WHERE state = ? ORDER BY broadcast_id
+            ''', (BroadcastState.IN_PROGRESS.value,)) as cursor:
+                return [DBBroadcast(*row) for row in await cursor.fetchall()]
+    except sql.Error as e:
+        logger.exception(f"Error retrieving unfinished broadcasts: {e}")
+        return []
+
+
+@timed
+async def get_recipients(target: BroadcastTarget, target_id: Optional[int],
+                         after_user_id: int, limit: int) -> list[tuple[int, int]]:
+    """
+    Returns the next page of recipients of a broadcast.
+
+    :return: Pairs of (user_id, tg_id) ordered by user_id, all greater than ``after_user_id``.
+    """
+    params = (after_user_id, limit) if target is BroadcastTarget.ALL else (target_id, after_user_id, limit)
+    async with connection() as conn:
+        async with conn.execute(_RECIPIENTS_SQL[target], params) as cursor:
+            return list(await cursor.fetchall())
+
+
+@timed
+async def save_progress(broadcast_id: int, last_user_id: int,
+                        sent: int, blocked: int, failed: int, finished: bool = False) -> None:
+    """
+    Moves the resume cursor of a broadcast forward and adds the outcome of the delivered page to its counters.
+    """
+    logger.debug("save_progress called with broadcast_id: %s, last_user_id: %s, finished: %s",
+                 broadcast_id, last_user_id, finished)
+    state = BroadcastState.COMPLETED if finished else BroadcastState.IN_PROGRESS
+    try:
+        async with connection() as conn:
+            await conn.execute('''
+                UPDATE broadcasts
+                SET last_user_id = ?, sent = sent + ?, blocked = blocked + ?, failed = failed + ?, state = ?,
+                    finished_at = CASE WHEN ? THEN CAST(strftime('%s', 'now') AS INTEGER) END
+                WHERE broadcast_id = ?
+            ''', (last_user_id, sent, blocked, failed, state.value, finished, broadcast_id))
+            await conn.commit()
+    except sql.Error as e:
+        logger.error(f"Error saving broadcast progress: {e}")
+        raise
@@ -0,0 +1,324 @@
+import aiosqlite as sql
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+from .. import db_config
+from ..pool import connection
+from bot.enums.enums import EventState
+from bot.services.database.models.event import DBEvent
+from bot.services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# dataTime is stored as UTC text in this format, so that text order matches time order
+DATA_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_EVENT_COLUMNS = 'event_id, name, description, dataTime, owner_id, approver_id, state'
+
+# Ids per IN (...) statement, well below SQLite's bound parameter limit
+_CHUNK_SIZE = 500
+
+# Called after an event is approved, so that its deadlines are scheduled right away
+_approval_listener: Optional[Callable[[], None]] = None
+
+
+def set_approval_listener(listener: Optional[Callable[[], None]]) -> None:
+    global _approval_listener
+    logger.debug("Setting event approval listener: %s", listener)
+    _approval_listener = listener
+
+
+def format_data_time(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime(DATA_TIME_FORMAT)
+
+
+def parse_data_time(value: str) -> datetime:
+    return datetime.strptime(value, DATA_TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+@timed
+async def create_event(name: str, owner_id: int, data_time: datetime,
+                       description: Optional[str] = None) -> Optional[int]:
+    logger.debug("create_event called with name: %s, owner_id: %s, data_time: %s", name, owner_id, data_time)
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            async with conn.execute('''
+                INSERT INTO event (name, description, dataTime, owner_id, approver_id, state)
+                VALUES (?, ?, ?, ?, NULL, ?)
+            ''', (name, description, format_data_time(data_time), owner_id, EventState.ON_REVIEW.value)) as cursor:
+                event_id = cursor.lastrowid
+            await conn.commit()
+            logger.debug("Transaction committed")
+        logger.info("Event '%s' created with event_id: %s", name, event_id)
+        return event_id
+    except sql.Error as e:
+        logger.error(f"Error creating event: {e}")
+        return None
+
+
+@timed
+async def get_event(event_id: int) -> Optional[DBEvent]:
+    logger.debug("get_event called with event_id: %s", event_id)
+    try:
+        async with connection() as conn:
+            async with conn.execute(f'SELECT {_EVENT_COLUMNS} FROM event WHERE event_id = ?', (event_id,)) as cursor:
+                row = await cursor.fetchone()
+        return DBEvent(*row) if row else None
+    except sql.Error as e:
+        logger.exception(f"Error retrieving event: {e}")
+        return None
+
+
+async def _review_event(event_id: int, approver_id: int, new_state: EventState) -> bool:
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            # Only events still on review can be approved or rejected
+            async with conn.execute('''
+                UPDATE event SET state = ?, approver_id = ? WHERE event_id = ? AND state = ?
+            ''', (new_state.value, approver_id, event_id, EventState.ON_REVIEW.value)) as cursor:
+                updated = cursor.rowcount
+            await conn.commit()
+        if updated:
+            logger.info("Event %s moved to %s by approver_id: %s", event_id, new_state.name, approver_id)
+        else:
+            logger.warning(f"Event {event_id} not found or not on review")
+        return updated > 0
+    except sql.Error as e:
+        logger.error(f"Error reviewing event: {e}")
+        return False
+
+
+@timed
+async def approve_event(event_id: int, approver_id: int) -> bool:
+    approved = await _review_event(event_id, approver_id, EventState.APPROVED)
+    if approved and _approval_listener is not None:
+        _approval_listener()
+    return approved
+
+
+@timed
+async def reject_event(event_id: int, approver_id: int) -> bool:
+    return await _review_event(event_id, approver_id, EventState.REJECTED)
+
+
+@timed
+async def list_events(state: EventState,
+                      after: Optional[tuple[str, int]] = None,
+                      limit: int = 20) -> tuple[list[DBEvent], Optional[tuple[str, int]]]:
+    """
+    List events in a state ordered by start time, using keyset pagination.
+
+    :param state: State of the events to list.
+    :param after: Cursor returned with the previous page, None for the first page.
+    :param limit: Page size.
+    :return: The page of events and the cursor of the next page (None if this is the last page).
+    """
+    logger.debug("list_events called with state: %s, after: %s, limit: %s", state, after, limit)
+    data_time, event_id = after if after is not None else ('', 0)
+    try:
+        async with connection() as conn:
+            # (dataTime, event_id) is a range scan on idx_event_state_dataTime, no matter how deep the page is
+            async with conn.execute(f'''
+                SELECT {_EVENT_COLUMNS} FROM event
+                WHERE state = ? AND (dataTime, event_id) > (?, ?)
+                ORDER BY dataTime, event_id
+                LIMIT ?
+            ''', (state.value, data_time, event_id, limit + 1)) as cursor:
+                rows = await cursor.fetchall()
+    except sql.Error as e:
+        logger.exception(f"Error listing events: {e}")
+        return [], None
+
+    events = [DBEvent(*row) for row in rows[:limit]]
+    next_cursor = (events[-1].data_time, events[-1].event_id) if len(rows) > limit else None
+    return events, next_cursor
+
+
+@timed
+async def subscribe_users(event_id: int, user_ids: Iterable[int]) -> int:
+    """
+    Subscribe many users to an event, already subscribed users are skipped.
+
+    :return: Number of new subscriptions.
+    """
+    user_ids = list(user_ids)
+    logger.debug("subscribe_users called with event_id: %s and %s users", event_id, len(user_ids))
+    try:
+        async with connection() as conn:
+            async with conn.executemany('''
+                INSERT OR IGNORE INTO event_subscribers (event_id, subscriber_id) VALUES (?, ?)
+            ''', [(event_id, user_id) for user_id in user_ids]) as cursor:
+                added = cursor.rowcount
+            await conn.commit()
+        logger.info("Subscribed %s users to event %s", added, event_id)
+        return added
+    except sql.Error as e:
+        logger.error(f"Error subscribing users: {e}")
+        raise
+
+
+@timed
+async def unsubscribe_users(event_id: int, user_ids: Iterable[int]) -> int:
+    """
+    Unsubscribe many users from an event.
+
+    :return: Number of removed subscriptions.
+    """
+    user_ids = list(user_ids)
+    logger.debug("unsubscribe_users called with event_id: %s and %s users", event_id, len(user_ids))
+    try:
+        async with connection() as conn:
+            async with conn.executemany('''
+                DELETE FROM event_subscribers WHERE event_id = ? AND subscriber_id = ?
+            ''', [(event_id, user_id) for user_id in user_ids]) as cursor:
+                removed = cursor.rowcount
+            await conn.commit()
+        logger.info("Unsubscribed %s users from event %s", removed, event_id)
+        return removed
+    except sql.Error as e:
+        logger.error(f"Error unsubscribing users: {e}")
+        raise
+
+
+@timed
+async def get_subscriber_count(event_id: int) -> int:
+    return (await get_subscriber_counts([event_id])).get(event_id, 0)
+
+
+@timed
+async def get_subscriber_counts(event_ids: Iterable[int]) -> dict[int, int]:
+    """
+    Count subscribers of many events at once, e.g. for a page returned by ``list_events``.
+
+    :return: Mapping of event_id to subscriber count, events without subscribers map to 0.
+    """
+    event_ids = list(event_ids)
+    logger.debug("get_subscriber_counts called with %s events", len(event_ids))
+    counts = dict.fromkeys(event_ids, 0)
+    if not event_ids:
+        return counts
+    try:
+        async with connection() as conn:
+            placeholders = ','.join('?' * len(event_ids))
+            async with conn.execute(f'''
+                SELECT event_id, COUNT(*) FROM event_subscribers
+                WHERE event_id IN ({placeholders})
+                GROUP BY event_id
+            ''', event_ids) as cursor:
+                counts.update(await cursor.fetchall())
+    except sql.Error as e:
+        logger.exception(f"Error counting subscribers: {e}")
+    return counts
+
+
+@timed
+async def get_event_times(state: EventState, until: datetime, unreminded: bool = False) -> list[tuple[int, datetime]]:
+    """
+    Start times of the events in a state that start no later than ``until``, earliest first.
+
+    :param state: State of the events.
+    :param until: Latest start time to include.
+    :param unreminded: Only include events whose reminder has not been sent.
+    :return: Pairs of (event_id, start time).
+    """
+    logger.debug("get_event_times called with state: %s, until: %s, unreminded: %s", state, until, unreminded)
+    try:
+        async with connection() as conn:
+            # A range scan on idx_event_state_dataTime, only the upcoming window is read
+            async with conn.execute(f'''
+                SELECT event_id, dataTime FROM event
+                WHERE state = ? AND dataTime <= ? {'AND reminded = 0' if unreminded else ''}
+                ORDER BY dataTime
+            ''', (state.value, format_data_time(until))) as cursor:
+                rows = await cursor.fetchall()
+    except sql.Error as e:
+        logger.error(f"Error getting event times: {e}")
+        raise
+    return [(event_id, parse_data_time(data_time)) for event_id, data_time in rows]
+
+
+@timed
+async def transition_events(event_ids: Iterable[int], from_state: EventState, to_state: EventState) -> list[int]:
+    """
+    Moves many events to another state, events no longer in ``from_state`` are left alone.
+
+    :return: Ids of the events that were moved.
+    """
+    event_ids = list(event_ids)
+    logger.debug("transition_events called with %s events from %s to %s", len(event_ids), from_state, to_state)
+    moved = []
+    try:
+        async with connection() as conn:
+            for start in range(0, len(event_ids), _CHUNK_SIZE):
+                chunk = event_ids[start:start + _CHUNK_SIZE]
+                async with conn.execute(f'''
+                    UPDATE event SET state = ? WHERE state = ? AND event_id IN ({','.join('?' * len(chunk))})
+                    RETURNING event_id
+                ''', (to_state.value, from_state.value, *chunk)) as cursor:
+                    moved.extend(row[0] for row in await cursor.fetchall())
+            await conn.commit()
+    except sql.Error as e:
+        logger.error(f"Error moving events to {to_state.name}: {e}")
+        raise
+    if moved:
+        logger.info("Moved %s events from %s to %s", len(moved), from_state.name, to_state.name)
+    return moved
+
+
+@timed
+async def claim_reminders(event_ids: Iterable[int], now: datetime) -> list[DBEvent]:
+    """
+    Marks the reminders of approved events that have not started yet as sent.
+
+    An event is claimed only once, even by concurrent callers, so its subscribers are reminded at most once.
+
+    :return: The claimed events.
+    """
+    event_ids = list(event_ids)
+    logger.debug("claim_reminders called with %s events", len(event_ids))
+    claimed = []
+    try:
+        async with connection() as conn:
+            for start in range(0, len(event_ids), _CHUNK_SIZE):
+                chunk = event_ids[start:start + _CHUNK_SIZE]
+                async with conn.execute(f'''
+                    UPDATE event SET reminded = 1
+                    WHERE reminded = 0 AND state = ? AND dataTime > ?
+                        AND event_id IN ({','.join('?' * len(chunk))})
+                    RETURNING {_EVENT_COLUMNS}
+                ''', (EventState.APPROVED.value, format_data_time(now), *chunk)) as cursor:
+                    claimed.extend(DBEvent(*row) for row in await cursor.fetchall())
+            await conn.commit()
+    except sql.Error as e:
+        logger.error(f"Error claiming event reminders: {e}")
+        raise
+    return claimed
+
+
+@timed
+async def get_subscriber_ids(event_ids: Iterable[int]) -> list[int]:
+    """
+    Subscribers of many events, a user subscribed to several of them is listed once per event.
+
+    :return: user_id of every subscription.
+    """
+    event_ids = list(event_ids)
+    logger.debug("get_subscriber_ids called with %s events", len(event_ids))
+    subscribers = []
+    try:
+        async with connection() as conn:
+            for start in range(0, len(event_ids), _CHUNK_SIZE):
+                chunk = event_ids[start:start + _CHUNK_SIZE]
+                async with conn.execute(f'''
+                    SELECT subscriber_id FROM event_subscribers WHERE event_id IN ({','.join('?' * len(chunk))})
+                ''', chunk) as cursor:
+                    subscribers.extend(row[0] for row in await cursor.fetchall())
+    except sql.Error as e:
+        logger.error(f"Error getting event subscribers: {e}")
+        raise
+    return subscribers
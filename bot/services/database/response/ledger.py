@@ -0,0 +1,177 @@
+import aiosqlite as sql
+import logging
+from typing import Iterable, Optional
+
+from .. import db_config
+from ..pool import connection
+from bot.exceptions.wallet import InsufficientFundsError, WalletNotFoundError
+from bot.services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Balances and amounts are stored as integers in minor units, 100 minor units make one coin
+MINOR_UNITS_PER_COIN = 100
+
+
+def _check_amount(amount: int) -> None:
+    if not isinstance(amount, int) or amount <= 0:
+        raise ValueError(f"Amount must be a positive integer of minor units, got {amount!r}")
+
+
+@timed
+async def get_balance(wallet_token: int) -> Optional[int]:
+    logger.debug("get_balance called with wallet_token: %s", wallet_token)
+    try:
+        async with connection() as conn:
+            async with conn.execute('SELECT balance FROM wallets WHERE wallet_token = ?', (wallet_token,)) as cursor:
+                row = await cursor.fetchone()
+        return row[0] if row else None
+    except sql.Error as e:
+        logger.exception(f"Error getting balance: {e}")
+        return None
+
+
+@timed
+async def transfer(from_token: int, to_token: int, amount: int, reason: Optional[str] = None) -> int:
+    """
+    Atomically move coins between two wallets and record the transaction.
+
+    :param from_token: Wallet to debit.
+    :param to_token: Wallet to credit.
+    :param amount: Positive amount in minor units.
+    :param reason: Optional free-form description stored with the transaction.
+    :return: Id of the recorded transaction.
+    :raises InsufficientFundsError: If the source wallet balance is lower than the amount.
+    :raises WalletNotFoundError: If either wallet does not exist.
+    """
+    logger.debug("transfer called with from_token: %s, to_token: %s, amount: %s", from_token, to_token, amount)
+    _check_amount(amount)
+    if from_token == to_token:
+        raise ValueError("Cannot transfer to the same wallet")
+
+    try:
+        async with connection() as conn:
+            # Take the write lock up front so that the debit and credit never interleave with other writers
+            await conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Conditional debit: the balance check and update are a single statement
+                async with conn.execute('''
+                    UPDATE wallets SET balance = balance - ? WHERE wallet_token = ? AND balance >= ?
+                ''', (amount, from_token, amount)) as cursor:
+                    debited = cursor.rowcount
+                if not debited:
+                    async with conn.execute('SELECT 1 FROM wallets WHERE wallet_token = ?', (from_token,)) as cursor:
+                        exists = await cursor.fetchone()
+                    raise InsufficientFundsError(from_token, amount) if exists else WalletNotFoundError(from_token)
+
+                async with conn.execute('''
+                    UPDATE wallets SET balance = balance + ? WHERE wallet_token = ?
+                ''', (amount, to_token)) as cursor:
+                    credited = cursor.rowcount
+                if not credited:
+                    raise WalletNotFoundError(to_token)
+
+                async with conn.execute('''
+                    INSERT INTO wallet_transactions (from_token, to_token, amount, reason) VALUES (?, ?, ?, ?)
+                ''', (from_token, to_token, amount, reason)) as cursor:
+                    transaction_id = cursor.lastrowid
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+        logger.info("Transferred %s from wallet %s to wallet %s, transaction: %s",
+                    amount, from_token, to_token, transaction_id)
+        return transaction_id
+    except sql.Error as e:
+        logger.error(f"Error transferring coins: {e}")
+        raise
+
+
+# Not timed itself, credit_many records the query
+async def credit(to_token: int, amount: int, reason: Optional[str] = None) -> None:
+    await credit_many([(to_token, amount)], reason)
+
+
+@timed
+async def credit_many(credits: Iterable[tuple[int, int]], reason: Optional[str] = None) -> int:
+    """
+    Credit many wallets in one transaction, e.g. awarding all participants of an event.
+
+    Either every wallet is credited or none is.
+
+    :param credits: Pairs of (wallet_token, amount in minor units).
+    :param reason: Optional free-form description stored with every transaction.
+    :return: Number of credited wallets.
+    :raises WalletNotFoundError: If any of the wallets does not exist.
+    """
+    credits = list(credits)
+    logger.debug("credit_many called with %s credits", len(credits))
+    if not credits:
+        return 0
+    for _, amount in credits:
+        _check_amount(amount)
+
+    try:
+        async with connection() as conn:
+            await conn.execute('BEGIN IMMEDIATE')
+            try:
+                async with conn.executemany('''
+                    UPDATE wallets SET balance = balance + ? WHERE wallet_token = ?
+                ''', [(amount, token) for token, amount in credits]) as cursor:
+                    credited = cursor.rowcount
+                if credited != len(credits):
+                    tokens = [token for token, _ in credits]
+                    placeholders = ','.join('?' * len(tokens))
+                    async with conn.execute(f'SELECT wallet_token FROM wallets WHERE wallet_token IN ({placeholders})',
+                                            tokens) as cursor:
+                        existing = {row[0] for row in await cursor.fetchall()}
+                    raise WalletNotFoundError(next(token for token in tokens if token not in existing))
+
+                await conn.executemany('''
+                    INSERT INTO wallet_transactions (from_token, to_token, amount, reason) VALUES (NULL, ?, ?, ?)
+                ''', [(token, amount, reason) for token, amount in credits])
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+        logger.info("Credited %s wallets", len(credits))
+        return len(credits)
+    except sql.Error as e:
+        logger.error(f"Error crediting wallets: {e}")
+        raise
+
+
+@timed
+async def get_transactions(wallet_token: int, limit: int = 20,
+                           before_id: Optional[int] = None) -> list[tuple[int, Optional[int], int, int, str, int]]:
+    """
+    Returns the newest transactions touching a wallet, paginated by transaction id.
+
+    :param wallet_token: Wallet to list.
+    :param limit: Page size.
+    :param before_id: Return transactions older than this id (the last id of the previous page).
+    :return: Tuples of (transaction_id, from_token, to_token, amount, reason, created_at).
+    """
+    logger.debug("get_transactions called with wallet_token: %s, before_id: %s", wallet_token, before_id)
+    before_id = before_id if before_id is not None else 2 ** 63 - 1
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            async with conn.execute('''
+                SELECT * FROM (
+                    SELECT transaction_id, from_token, to_token, amount, reason, created_at
+                    FROM wallet_transactions WHERE from_token = ? AND transaction_id < ?
+                    ORDER BY transaction_id DESC LIMIT ?
+                )
+                UNION
+                SELECT * FROM (
+                    SELECT transaction_id, from_token, to_token, amount, reason, created_at
+                    FROM wallet_transactions WHERE to_token = ? AND transaction_id < ?
+                    ORDER BY transaction_id DESC LIMIT ?
+                )
+                ORDER BY transaction_id DESC LIMIT ?
+            ''', (wallet_token, before_id, limit, wallet_token, before_id, limit, limit)) as cursor:
+                return list(await cursor.fetchall())
+    except sql.Error as e:
+        logger.exception(f"Error getting transactions: {e}")
+        return []
@@ -0,0 +1,58 @@
+import aiosqlite as sql
+import logging
+from typing import Optional
+
+from .. import db_config
+from ..pool import connection
+from bot.services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+@timed
+async def get_media_file(path: str, media_type: str) -> Optional[tuple[str, str]]:
+    """
+    :return: (content_hash, file_id) of the last upload of the file, None if it was never uploaded.
+    """
+    logger.debug("get_media_file called with path: %s, media_type: %s", path, media_type)
+    try:
+        async with connection() as conn:
+            async with conn.execute('''
+                SELECT content_hash, file_id FROM media_files WHERE path = ? AND media_type = ?
+            ''', (path, media_type)) as cursor:
+                row = await cursor.fetchone()
+        return (row[0], row[1]) if row else None
+    except sql.Error as e:
+        logger.exception(f"Error retrieving media file: {e}")
+        return None
+
+
+@timed
+async def save_media_file(path: str, media_type: str, content_hash: str, file_id: str) -> None:
+    logger.debug("save_media_file called with path: %s, media_type: %s, content_hash: %s",
+                 path, media_type, content_hash)
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            await conn.execute('''
+                INSERT INTO media_files (path, media_type, content_hash, file_id) VALUES (?, ?, ?, ?)
+                ON CONFLICT(path, media_type) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    file_id = excluded.file_id,
+                    uploaded_at = CAST(strftime('%s', 'now') AS INTEGER)
+            ''', (path, media_type, content_hash, file_id))
+            await conn.commit()
+    except sql.Error as e:
+        # A lost file_id only costs one more upload
+        logger.error(f"Error saving media file: {e}")
+
+
+@timed
+async def delete_media_file(path: str, media_type: str) -> None:
+    logger.debug("delete_media_file called with path: %s, media_type: %s", path, media_type)
+    try:
+        async with connection() as conn:
+            await conn.execute('DELETE FROM media_files WHERE path = ? AND media_type = ?', (path, media_type))
+            await conn.commit()
+    except sql.Error as e:
+        logger.error(f"Error deleting media file: {e}")
@@ -0,0 +1,91 @@
+import asyncio
+import aiosqlite as sql
+import logging
+import re
+from typing import Optional
+
+from ..pool import connection
+from bot.exceptions.search import SearchTimeoutError
+from bot.services.database.models.user import DBUser, USER_COLUMNS, db_user_factory
+from bot.services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Longer queries do not narrow the results any further but make matching slower
+MAX_QUERY_TOKENS = 8
+
+# Column weights for bm25: a match in the name counts more than in the tag, and both more than in the description
+_RANK = 'bm25(users_fts, 10.0, 5.0, 1.0)'
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turns free user input into an FTS5 query where every word is a prefix that must match.
+
+    Only word characters are kept, so the input can never inject FTS5 syntax.
+
+    :return: The MATCH expression, or None if the input has no words.
+    """
+    tokens = _TOKEN_RE.findall(query.lower())[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+@timed
+async def search_users(query: str,
+                       tribe_id: Optional[int] = None,
+                       limit: int = 10,
+                       offset: int = 0,
+                       timeout: Optional[float] = None) -> tuple[list[DBUser], bool]:
+    """
+    Finds users by name, tag and description, best matches first.
+
+    :param query: Free text, each word matches as a prefix, e.g. "iva pet" finds "Ivan Petrov".
+    :param tribe_id: Only return members of this tribe.
+    :param limit: Page size.
+    :param offset: Number of results to skip.
+    :param timeout: Latency budget in seconds, the query is interrupted when it is exceeded.
+    :return: The page of users and whether more results follow.
+    :raises SearchTimeoutError: If the search did not finish within the timeout.
+    """
+    logger.debug("search_users called with query: %r, tribe_id: %s, limit: %s, offset: %s",
+                 query, tribe_id, limit, offset)
+    match = build_match_query(query)
+    if match is None:
+        return [], False
+
+    async with connection() as conn:
+        search = asyncio.ensure_future(_execute_search(conn, match, tribe_id, limit + 1, offset))
+        done, _ = await asyncio.wait({search}, timeout=timeout)
+        if not done:
+            # sqlite3 interrupts are thread safe, the running statement fails right away
+            await conn.interrupt()
+        try:
+            users = await search
+        except sql.OperationalError as e:
+            if not done:
+                logger.warning("Search for %r interrupted after %ss", query, timeout)
+                raise SearchTimeoutError(query, timeout) from e
+            logger.error(f"Error searching users: {e}")
+            raise
+
+    return users[:limit], len(users) > limit
+
+
+async def _execute_search(conn, match: str, tribe_id: Optional[int], limit: int, offset: int) -> list[DBUser]:
+    async with conn.cursor() as cursor:
+        cursor.row_factory = db_user_factory
+        # The subquery only exposes the rowid and rank, so USER_COLUMNS resolve to users unambiguously
+        await cursor.execute(f'''
+            SELECT {USER_COLUMNS}
+            FROM users
+            JOIN (SELECT rowid AS match_id, {_RANK} AS match_rank FROM users_fts WHERE users_fts MATCH ?)
+                ON user_id = match_id
+            WHERE ? IS NULL OR tribe_id = ?
+            ORDER BY match_rank
+            LIMIT ? OFFSET ?
+        ''', (match, tribe_id, tribe_id, limit, offset))
+        return list(await cursor.fetchall())
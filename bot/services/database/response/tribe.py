@@ -4,40 +4,59 @@ from typing import Optional
 from random import choice
 
 from .. import db_config
-from .wallet import _generate_wallet_token, _add_wallet
+from ..pool import connection
+from .wallet import _generate_wallet_tokens, _insert_wallets
 from bot.enums.enums import Tribe
+from bot.services.database.models.tribe import TribeStanding
+from bot.services.metrics import timed
 
 logger = logging.getLogger(__name__)
 
+# Recomputes every standing from scratch, used by the migration and to repair drift
+REBUILD_TRIBE_STANDINGS_SQL = '''
+    INSERT INTO tribe_standings (tribe_id, member_count, member_balance, tribe_balance)
+    SELECT t.tribe_id,
+           (SELECT COUNT(*) FROM users u WHERE u.tribe_id = t.tribe_id),
+           (SELECT COALESCE(SUM(w.balance), 0) FROM users u
+            JOIN wallets w ON w.wallet_token = u.wallet_token
+            WHERE u.tribe_id = t.tribe_id),
+           COALESCE((SELECT w.balance FROM wallets w WHERE w.wallet_token = t.wallet_token), 0)
+    FROM tribes t
+'''
+
 
 def _generate_tribe_id() -> int:
-    logger.debug(f"Generate tribe_id")
+    logger.debug("Generate tribe_id")
     random_tribe = choice(list(Tribe))
-    logger.debug(f"{random_tribe} chosen")
+    logger.debug("%s chosen", random_tribe)
     return random_tribe.value
 
 
+@timed
 async def add_tribe(tribe_name: str, wallet_token: Optional[int] = None, tribe_id: Optional[int] = None) -> None:
-    logger.debug(f"add_tribe called with tribe_name: {tribe_name}, wallet_token: {wallet_token}, tribe_id: {tribe_id}")
-
-    # Generate wallet_token if not provided
-    if wallet_token is None:
-        wallet_token = _generate_wallet_token(tribe_name)
+    logger.debug("add_tribe called with tribe_name: %s, wallet_token: %s, tribe_id: %s",
+                 tribe_name, wallet_token, tribe_id)
 
     try:
-        async with sql.connect(db_config.path) as conn:
-            logger.debug(f"Connected to the database: {db_config.path}")
-            async with conn.cursor() as cursor:
-                # Check if tribe already exists
-                await cursor.execute('''
-                    SELECT COUNT(*) FROM tribes WHERE tribe_name = ? OR tribe_id = ?
-                ''', (tribe_name, tribe_id))
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            # Check if tribe already exists, before a wallet token is allocated for it
+            async with conn.execute('''
+                SELECT COUNT(*) FROM tribes WHERE tribe_name = ? OR tribe_id = ?
+            ''', (tribe_name, tribe_id)) as cursor:
                 count = (await cursor.fetchone())[0]
 
-                if count > 0:
-                    logger.warning(f"Tribe with name '{tribe_name}' or ID '{tribe_id}' already exists.")
-                    return  # Exit the function if the tribe already exists
+            if count > 0:
+                logger.warning(f"Tribe with name '{tribe_name}' or ID '{tribe_id}' already exists.")
+                return  # Exit the function if the tribe already exists
+
+            # Generate wallet_token if not provided
+            if wallet_token is None:
+                wallet_token, = await _generate_wallet_tokens(conn)
 
+            async with conn.cursor() as cursor:
+                # The tribe and its wallet are created in one transaction
+                await _insert_wallets(cursor, [wallet_token])
                 if tribe_id is None:
                     # Insert a new tribe with auto-generated tribe_id
                     await cursor.execute('''
@@ -53,9 +72,42 @@ async def add_tribe(tribe_name: str, wallet_token: Optional[int] = None, tribe_i
 
             await conn.commit()
             logger.debug("Transaction committed")
-        await _add_wallet(wallet_token)
-        logger.info(
-            f"Tribe '{tribe_name}' added successfully with wallet_token: {wallet_token} and tribe_id: {tribe_id}")
+        logger.info("Tribe '%s' added successfully with wallet_token: %s and tribe_id: %s",
+                    tribe_name, wallet_token, tribe_id)
     except sql.Error as e:
         logger.critical(f"Error adding tribe: {e}")
         raise
+
+
+@timed
+async def get_tribe_standings() -> list[TribeStanding]:
+    logger.debug("get_tribe_standings called")
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            async with conn.execute('''
+                SELECT s.tribe_id, t.tribe_name, s.member_count, s.member_balance, s.tribe_balance
+                FROM tribe_standings s
+                JOIN tribes t ON t.tribe_id = s.tribe_id
+                ORDER BY s.member_balance + s.tribe_balance DESC, s.tribe_id
+            ''') as cursor:
+                return [TribeStanding(*row) for row in await cursor.fetchall()]
+    except sql.Error as e:
+        logger.exception(f"Error getting tribe standings: {e}")
+        return []
+
+
+@timed
+async def rebuild_tribe_standings() -> None:
+    logger.debug("rebuild_tribe_standings called")
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            await conn.execute('BEGIN IMMEDIATE')
+            await conn.execute('DELETE FROM tribe_standings')
+            await conn.execute(REBUILD_TRIBE_STANDINGS_SQL)
+            await conn.commit()
+        logger.info("Tribe standings rebuilt successfully")
+    except sql.Error as e:
+        logger.critical(f"Error rebuilding tribe standings: {e}")
+        raise
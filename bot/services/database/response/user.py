@@ -1,155 +1,350 @@
 import aiosqlite as sql
 import logging
-from typing import Optional
+from typing import Iterable, Optional
 
-from bot.services.database.models.user import DBUser
+from bot.services.database.models.user import DBUser, ProfileUpdate, USER_COLUMNS, db_user_factory
 from bot.services.database import db_config
-from .wallet import _generate_wallet_token, _add_wallet
+from bot.services.database.pool import connection
+from .wallet import _generate_wallet_tokens, _insert_wallets
 from .tribe import _generate_tribe_id
 from bot.enums.enums import UserRole
 from bot.enums.language import Language
+from bot.services.metrics import timed
+from bot.utils.cache import LRUCache, MISSING
 
 logger = logging.getLogger(__name__)
 
+# Read-through cache of DBUser (or None for unknown users) keyed by tg_id
+_user_cache = LRUCache(maxsize=10000, ttl=300)
+
+# Ids per IN (...) query, well below SQLite's bound parameter limit
+GET_USERS_CHUNK_SIZE = 500
+
+
+def configure_user_cache(maxsize: int, ttl: Optional[float]) -> None:
+    global _user_cache
+    logger.debug("Configuring user cache with maxsize: %s, ttl: %s", maxsize, ttl)
+    _user_cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+
+def get_user_cache_stats() -> dict[str, int]:
+    return _user_cache.stats()
+
 
 async def _add_user(tg_id: int, name: str, user_role: int,
-                    tribe_id: Optional[int] = None, language: str = Language.DEFAULT) -> None:
-    logger.debug(f"add_user called with tg_id: {tg_id}, name: {name}, tribe_id: {tribe_id},"
-                 f" language: {language}, user_role: {user_role}")
+                    tribe_id: Optional[int] = None, language: str = Language.DEFAULT) -> int:
+    logger.debug("add_user called with tg_id: %s, name: %s, tribe_id: %s, language: %s, user_role: %s",
+                 tg_id, name, tribe_id, language, user_role)
 
     if tribe_id is None:
         tribe_id = _generate_tribe_id()
 
-    wallet_token = _generate_wallet_token(tg_id)
-
     try:
-        async with sql.connect(db_config.path) as conn:
-            logger.debug(f"Connected to the database: {db_config.path}")
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            wallet_token, = await _generate_wallet_tokens(conn)
+            # The user and its wallet are created in one transaction
             async with conn.cursor() as cursor:
+                await _insert_wallets(cursor, [wallet_token])
                 await cursor.execute('''
                 INSERT INTO users (tg_id, name, tribe_id, wallet_token, language, role_id) VALUES (?, ?, ?, ?, ?, ?)
                 ''', (tg_id, name, tribe_id, wallet_token, language, user_role))
+                user_id = cursor.lastrowid
             await conn.commit()
             logger.debug("Transaction committed")
-        await _add_wallet(wallet_token)
-        logger.info(f"User \"{name} tg_id: {tg_id}\" added successfully")
+        _user_cache.invalidate(tg_id)
+        logger.info("User \"%s tg_id: %s\" added successfully", name, tg_id)
+        return user_id
     except sql.Error as e:
         logger.error(f"Error adding user: {e}")
         raise
 
 
+@timed
 async def add_user(tg_id: int, name: str, tribe_id: Optional[int] = None,
-                   language: Optional[str] = Language.DEFAULT) -> None:
+                   language: Optional[str] = Language.DEFAULT) -> int:
     if (language is None) or not (language in Language.ALL):
         language = Language.DEFAULT
-    await _add_user(tg_id, name, UserRole.USER.value, tribe_id, language)
+    return await _add_user(tg_id, name, UserRole.USER.value, tribe_id, language)
 
 
+@timed
 async def add_admin(tg_id: int, name: str, tribe_id: Optional[int] = None,
-                    language: Optional[str] = Language.DEFAULT) -> None:
+                    language: Optional[str] = Language.DEFAULT) -> int:
     if (language is None) or not (language in Language.ALL):
         language = Language.DEFAULT
-    await _add_user(tg_id, name, UserRole.ADMIN.value, tribe_id, language)
+    return await _add_user(tg_id, name, UserRole.ADMIN.value, tribe_id, language)
 
 
+@timed
+async def import_users(users: list[tuple[int, str, int, int, str]]) -> int:
+    """
+    Insert a batch of users and their wallets in a single transaction.
+
+    Users whose tg_id is already registered (or repeated inside the batch) are skipped.
+
+    :param users: Tuples of (tg_id, name, tribe_id, role_id, language).
+    :return: Number of users actually inserted.
+    """
+    logger.debug("import_users called with %s users", len(users))
+    if not users:
+        return 0
+
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            async with conn.cursor() as cursor:
+                placeholders = ','.join('?' * len(users))
+                await cursor.execute(f'SELECT tg_id FROM users WHERE tg_id IN ({placeholders})',
+                                     [user[0] for user in users])
+                existing = {row[0] for row in await cursor.fetchall()}
+
+                accepted = []
+                for tg_id, name, tribe_id, role_id, language in users:
+                    if tg_id in existing:
+                        logger.warning(f"User already exists - tg_id: {tg_id}")
+                        continue
+                    existing.add(tg_id)
+                    accepted.append((tg_id, name, tribe_id, role_id, language))
+
+                # Allocated before the inserts, the reservation of a new block is committed on its own
+                tokens = await _generate_wallet_tokens(conn, len(accepted)) if accepted else []
+                new_users = [(tg_id, name, tribe_id, token, language, role_id)
+                             for (tg_id, name, tribe_id, role_id, language), token in zip(accepted, tokens)]
+
+                await _insert_wallets(cursor, tokens)
+                await cursor.executemany('''
+                INSERT INTO users (tg_id, name, tribe_id, wallet_token, language, role_id) VALUES (?, ?, ?, ?, ?, ?)
+                ''', new_users)
+            await conn.commit()
+            logger.debug("Transaction committed")
+        for user in new_users:
+            _user_cache.invalidate(user[0])
+        logger.info("Imported %s users, skipped %s", len(new_users), len(users) - len(new_users))
+        return len(new_users)
+    except sql.Error as e:
+        logger.error(f"Error importing users: {e}")
+        raise
+
+
+@timed
 async def user_exists(user_id: Optional[int] = None, tg_id: Optional[int] = None) -> bool:
-    logger.debug(f"user_exists called with user_id: {user_id}, tg_id: {tg_id}")
+    logger.debug("user_exists called with user_id: %s, tg_id: %s", user_id, tg_id)
 
     if user_id is None and tg_id is None:
         logger.error("Either user_id or tg_id must be provided.")
         return False
 
+    if user_id is None:
+        # Resolve through get_user so that a following get_user call is served from the cache
+        return await get_user(tg_id=tg_id) is not None
+
     try:
-        async with sql.connect(db_config.path) as conn:
-            logger.debug(f"Connected to the database: {db_config.path}")
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
             async with conn.cursor() as cursor:
-                if user_id is not None:
-                    await cursor.execute('SELECT COUNT(*) FROM users WHERE user_id = ?', (user_id,))
-                else:
-                    await cursor.execute('SELECT COUNT(*) FROM users WHERE tg_id = ?', (tg_id,))
+                await cursor.execute('SELECT COUNT(*) FROM users WHERE user_id = ?', (user_id,))
                 logger.debug("Executed SQL select statement")
 
                 count = (await cursor.fetchone())[0]
-                logger.debug(f"User count: {count}")
+                logger.debug("User count: %s", count)
                 return count > 0
     except sql.Error as e:
         logger.exception(f"Error checking if user exists: {e}")
         return False
 
 
+@timed
 async def get_user_count() -> int:
     logger.debug("get_user_count called")
 
     try:
-        async with sql.connect(db_config.path) as conn:
-            logger.debug(f"Connected to the database: {db_config.path}")
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
             async with conn.cursor() as cursor:
                 await cursor.execute('SELECT COUNT(*) FROM users')
                 logger.debug("Executed SQL select statement")
 
-                count = await cursor.fetchone()[0]
-                logger.debug(f"User count: {count}")
+                count = (await cursor.fetchone())[0]
+                logger.debug("User count: %s", count)
                 return count
     except sql.Error as e:
         logger.exception(f"Error getting user count: {e}")
         return 0
 
 
+@timed
 async def get_user(tg_id: Optional[int] = None, user_id: Optional[int] = None) -> Optional[DBUser]:
-    logger.debug(f"get_user called with tg_id: {tg_id}, user_id: {user_id}")
+    logger.debug("get_user called with tg_id: %s, user_id: %s", tg_id, user_id)
 
     if tg_id is None and user_id is None:
         logger.error("At least one of tg_id or user_id must be provided.")
         return None
 
+    if user_id is None:
+        cached = _user_cache.get(tg_id, MISSING)
+        if cached is not MISSING:
+            logger.debug("User with tg_id: %s served from cache", tg_id)
+            return cached
+
     try:
-        async with sql.connect(db_config.path) as conn:
-            logger.debug(f"Connected to the database: {db_config.path}")
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
             async with conn.cursor() as cursor:
+                cursor.row_factory = db_user_factory
                 if user_id is not None:
-                    await cursor.execute('''
-                        SELECT user_id, tg_id, tg_teg, name, tribe_id, role_id,
-                        wallet_token, language, description, photo_path
-                        FROM users
-                        WHERE user_id = ?
-                    ''', (user_id,))
+                    await cursor.execute(f'SELECT {USER_COLUMNS} FROM users WHERE user_id = ?', (user_id,))
                 elif tg_id is not None:
-                    await cursor.execute('''
-                        SELECT user_id, tg_id, tg_teg, name, tribe_id, role_id, 
-                        wallet_token, language, description, photo_path
-                        FROM users
-                        WHERE tg_id = ?
-                    ''', (tg_id,))
+                    await cursor.execute(f'SELECT {USER_COLUMNS} FROM users WHERE tg_id = ?', (tg_id,))
 
                 logger.debug("Executed SQL select statement")
 
-                row = await cursor.fetchone()
-                if row:
-                    logger.debug(f"User found: {row}")
-                    user = DBUser(*row)
+                user = await cursor.fetchone()
+                if user:
+                    logger.debug("User found: %s", user)
+                    _user_cache.set(user.tg_id, user)
                     logger.debug("Successfully retrieved user")
                     return user
                 else:
-                    logger.debug(
-                        f"No user found with {'tg_id' if tg_id is not None else 'user_id'}: "
-                        f"{tg_id if tg_id is not None else user_id}")
+                    logger.debug("No user found with tg_id: %s, user_id: %s", tg_id, user_id)
+                    if user_id is None:
+                        _user_cache.set(tg_id, None)
                     return None
     except sql.Error as e:
         logger.exception(f"Error retrieving user info: {e}")
         return None
 
 
+@timed
+async def get_users(tg_ids: Optional[Iterable[int]] = None,
+                    user_ids: Optional[Iterable[int]] = None) -> dict[int, DBUser]:
+    """
+    Resolves many users at once with chunked ``IN`` queries on a single connection.
+
+    Lookups by tg_id are served from the user cache where possible, and the fetched users are cached.
+
+    :param tg_ids: Telegram ids to resolve.
+    :param user_ids: Database ids to resolve, used when tg_ids is not given.
+    :return: Found users keyed by the requested id, unknown ids are left out.
+    """
+    if tg_ids is None and user_ids is None:
+        logger.error("At least one of tg_ids or user_ids must be provided.")
+        return {}
+
+    by_tg_id = tg_ids is not None
+    ids = list(dict.fromkeys(tg_ids if by_tg_id else user_ids))
+    logger.debug("get_users called with %s %s", len(ids), 'tg_ids' if by_tg_id else 'user_ids')
+
+    users: dict[int, DBUser] = {}
+    missing = ids
+    if by_tg_id:
+        missing = []
+        for tg_id in ids:
+            cached = _user_cache.get(tg_id, MISSING)
+            if cached is MISSING:
+                missing.append(tg_id)
+            elif cached is not None:
+                users[tg_id] = cached
+    if not missing:
+        return users
+
+    column = 'tg_id' if by_tg_id else 'user_id'
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            async with conn.cursor() as cursor:
+                cursor.row_factory = db_user_factory
+                for start in range(0, len(missing), GET_USERS_CHUNK_SIZE):
+                    chunk = missing[start:start + GET_USERS_CHUNK_SIZE]
+                    await cursor.execute(f'SELECT {USER_COLUMNS} FROM users '
+                                         f'WHERE {column} IN ({",".join("?" * len(chunk))})', chunk)
+                    for user in await cursor.fetchall():
+                        users[user.tg_id if by_tg_id else user.user_id] = user
+                        _user_cache.set(user.tg_id, user)
+    except sql.Error as e:
+        logger.exception(f"Error retrieving users: {e}")
+        return users
+
+    if by_tg_id:
+        for tg_id in missing:
+            if tg_id not in users:
+                _user_cache.set(tg_id, None)
+    logger.debug("Resolved %s of %s users, %s from the database", len(users), len(ids), len(missing))
+    return users
+
+
+@timed
 async def update_user_tg_teg(tg_id: int, tg_teg: str) -> bool:
-    logger.debug(f"Updating tg_teg for user with tg_id: {tg_id} to {tg_teg}")
+    logger.debug("Updating tg_teg for user with tg_id: %s to %s", tg_id, tg_teg)
     try:
-        async with sql.connect(db_config.path) as conn:
+        async with connection() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute('''
                     UPDATE users SET tg_teg = ? WHERE tg_id = ?
                 ''', (tg_teg, tg_id))
             await conn.commit()
-        logger.info(f"tg_teg updated for user with tg_id: {tg_id}, tg_teg: {tg_teg}")
+        _user_cache.invalidate(tg_id)
+        logger.info("tg_teg updated for user with tg_id: %s, tg_teg: %s", tg_id, tg_teg)
         return True
     except sql.Error as e:
         logger.critical(f"Error updating tg_teg: {e}")
         return False
+
+
+@timed
+async def update_user_profiles(updates: dict[int, ProfileUpdate]) -> None:
+    """
+    Applies buffered profile updates of many users in a single transaction.
+
+    Users that are not registered are skipped. Telegram usernames are unique, so a tg_teg taken over by another
+    user is cleared from its previous holder.
+
+    :param updates: Updates keyed by tg_id.
+    """
+    logger.debug("update_user_profiles called with %s updates", len(updates))
+    if not updates:
+        return
+
+    # A username that moved between users inside one batch stays with the user seen last
+    tag_owners = {}
+    for tg_id, update in sorted(updates.items(), key=lambda item: item[1].last_seen):
+        if update.tg_teg is not MISSING and update.tg_teg is not None:
+            tag_owners[update.tg_teg] = tg_id
+
+    rows = []
+    changed = set()
+    for tg_id, update in updates.items():
+        set_tg_teg = update.tg_teg is not MISSING and (update.tg_teg is None or tag_owners[update.tg_teg] == tg_id)
+        set_language = update.language is not MISSING
+        if set_tg_teg or set_language:
+            changed.add(tg_id)
+        rows.append((tg_id, set_tg_teg, update.tg_teg if set_tg_teg else None,
+                     set_language, update.language if set_language else None, update.last_seen))
+
+    try:
+        async with connection() as conn:
+            logger.debug("Acquired pooled connection to the database: %s", db_config.path)
+            async with conn.cursor() as cursor:
+                for tg_id, set_tg_teg, tg_teg, *_ in rows:
+                    if set_tg_teg and tg_teg is not None:
+                        await cursor.execute('''
+                            UPDATE users SET tg_teg = NULL WHERE tg_teg = ? AND tg_id != ? RETURNING tg_id
+                        ''', (tg_teg, tg_id))
+                        changed.update(row[0] for row in await cursor.fetchall())
+                await cursor.executemany('''
+                    UPDATE users
+                    SET tg_teg = CASE WHEN ?2 THEN ?3 ELSE tg_teg END,
+                        language = CASE WHEN ?4 THEN ?5 ELSE language END,
+                        last_seen = MAX(COALESCE(last_seen, 0), ?6)
+                    WHERE tg_id = ?1
+                ''', rows)
+            await conn.commit()
+            logger.debug("Transaction committed")
+    except sql.Error as e:
+        logger.error(f"Error updating user profiles: {e}")
+        raise
+
+    # last_seen is not part of DBUser, only users with changed fields are refetched
+    for tg_id in changed:
+        _user_cache.invalidate(tg_id)
+    logger.debug("Updated %s user profiles, %s with changed fields", len(rows), len(changed))
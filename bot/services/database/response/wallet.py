@@ -1,29 +1,38 @@
-import aiosqlite as sql
 import logging
 
-from .. import db_config
+import aiosqlite as sql
+
+from ..sequence import SequenceAllocator
 
 logger = logging.getLogger(__name__)
 
+# Tokens up to this one are reserved for tribe wallets, which use their tribe_id, allocated tokens start above it
+RESERVED_WALLET_TOKENS = 1000
+
+_wallet_tokens = SequenceAllocator('wallet_token')
+
+
+def configure_wallet_tokens(block_size: int) -> None:
+    global _wallet_tokens
+    logger.debug("Configuring wallet token allocator with block_size: %s", block_size)
+    _wallet_tokens = SequenceAllocator('wallet_token', block_size)
+
+
+async def _generate_wallet_tokens(conn: sql.Connection, count: int = 1) -> list[int]:
+    """
+    Allocates new wallet tokens, call it before the transaction that creates the wallets.
+
+    :param conn: Connection used if a block of tokens has to be reserved.
+    :param count: Number of tokens.
+    """
+    tokens = await _wallet_tokens.take(conn, count)
+    logger.debug("Generated %s wallet tokens", len(tokens))
+    return tokens
+
 
-def _generate_wallet_token(target: object) -> int:
-    logger.debug(f"Generate new wallet token by {target}")
-    # TODO: Implementation
-    return int(target)
-
-
-async def _add_wallet(token: int, balance: float = 0) -> None:
-    logger.debug(f"add_wallet called with token: {token}, balance: {balance}")
-    try:
-        async with sql.connect(db_config.path) as conn:
-            logger.debug(f"Connected to the database: {db_config.path}")
-            async with conn.cursor() as cursor:
-                await cursor.execute('''
-                INSERT INTO wallets (wallet_token, balance) VALUES (?, ?)
-                ''', (token, balance))
-                logger.debug("Executed SQL insert statement")
-            await conn.commit()
-            logger.debug("Transaction committed")
-        logger.info(f"Wallet with token: {token} added successfully with balance: {balance}")
-    except sql.Error as e:
-        logger.exception(f"Error adding wallet: {e}")
+async def _insert_wallets(cursor: sql.Cursor, tokens: list[int], balance: int = 0) -> None:
+    # Runs in the caller's transaction, so a wallet is only created together with its owner
+    await cursor.executemany('''
+    INSERT INTO wallets (wallet_token, balance) VALUES (?, ?)
+    ''', [(token, balance) for token in tokens])
+    logger.debug("Inserted %s wallets with balance: %s", len(tokens), balance)
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+
+import aiosqlite as sql
+
+logger = logging.getLogger(__name__)
+
+
+class SequenceAllocator:
+    """
+    Hands out unique ids from a named row of the ``sequences`` table.
+
+    Ids are reserved in blocks of ``block_size`` with a single ``UPDATE ... RETURNING`` and then handed out from
+    memory, so only every ``block_size``-th id costs a statement. Every process reserves its own blocks, so ids
+    never collide, but the unused rest of a block is lost on restart.
+    """
+
+    def __init__(self, name: str, block_size: int = 100) -> None:
+        if block_size < 1:
+            raise ValueError(f"Block size must be positive, got {block_size}")
+        self.name = name
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = asyncio.Lock()
+
+    async def take(self, conn: sql.Connection, count: int = 1) -> list[int]:
+        """
+        Allocates ``count`` ids, reserving a new block on ``conn`` if the current one is used up.
+
+        The reservation is committed right away, so it must not happen inside the caller's transaction: rolling
+        that back would release a block whose ids may already be in use. Allocate before writing.
+
+        :raises RuntimeError: If a block must be reserved while ``conn`` has an open transaction.
+        """
+        ids = []
+        async with self._lock:
+            while len(ids) < count:
+                if self._next >= self._end:
+                    size = max(self.block_size, count - len(ids))
+                    self._next = await self._reserve(conn, size)
+                    self._end = self._next + size
+                taken = min(count - len(ids), self._end - self._next)
+                ids.extend(range(self._next, self._next + taken))
+                self._next += taken
+        return ids
+
+    async def _reserve(self, conn: sql.Connection, size: int) -> int:
+        if conn.in_transaction:
+            raise RuntimeError(f"Sequence '{self.name}' must be reserved outside of a transaction")
+        async with conn.execute('''
+            UPDATE sequences SET next_value = next_value + ? WHERE name = ? RETURNING next_value - ?
+        ''', (size, self.name, size)) as cursor:
+            row = await cursor.fetchone()
+        await conn.commit()
+        if row is None:
+            raise RuntimeError(f"Sequence '{self.name}' does not exist")
+        logger.debug("Reserved %s ids of sequence '%s' starting at %s", size, self.name, row[0])
+        return row[0]
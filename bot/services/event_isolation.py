@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+from bot.services.metrics import UPDATE_QUEUE_DEPTH, UPDATE_QUEUE_KEYS, UPDATE_QUEUE_WAIT, UPDATES_IN_PROGRESS
+
+logger = logging.getLogger(__name__)
+
+
+class _ChatQueue:
+    __slots__ = ('waiters',)
+
+    def __init__(self) -> None:
+        # Updates of the chat waiting for the one in progress, in arrival order
+        self.waiters: deque[asyncio.Future] = deque()
+
+
+class OrderedEventIsolation(BaseEventIsolation):
+    """
+    FSM events isolation processing the updates of one chat strictly one after another, in arrival order.
+
+    aiogram takes this lock in ``FSMContextMiddleware`` before the FSM state is read, so every update sees the
+    state left by the previous update of its chat. Outer middlewares registered on ``dp.update`` after ``dp.fsm``
+    run inside it, the ones registered before it, like throttling, run before an update waits for its turn. Updates are keyed by their FSM storage key, i.e. per user in a chat with the default strategy.
+    Different keys are processed concurrently, at most ``limit`` updates at a time. A key's queue exists only
+    while it has an update in progress, so idle chats cost nothing.
+
+    Relies on aiogram starting the update tasks in the order the updates arrived, and on the middlewares before
+    ``FSMContextMiddleware`` not awaiting before calling their handler, which holds for the built-in ones.
+    """
+
+    def __init__(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError(f"Concurrency limit must be positive, got {limit}")
+        self.limit = limit
+        self._slots = asyncio.Semaphore(limit)
+        self._queues: dict[StorageKey, _ChatQueue] = {}
+        self._waiting = 0
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        started = time.perf_counter()
+        await self._enter(key)
+        try:
+            async with self._slots:
+                UPDATE_QUEUE_WAIT.observe(time.perf_counter() - started)
+                UPDATES_IN_PROGRESS.inc()
+                try:
+                    yield
+                finally:
+                    UPDATES_IN_PROGRESS.dec()
+        finally:
+            self._leave(key)
+
+    async def close(self) -> None:
+        # Updates still in progress release their keys themselves
+        logger.debug("Closing event isolation with %s keys in progress", len(self._queues))
+
+    async def _enter(self, key: StorageKey) -> None:
+        queue = self._queues.get(key)
+        if queue is None:
+            self._queues[key] = _ChatQueue()
+            UPDATE_QUEUE_KEYS.set(len(self._queues))
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.waiters.append(waiter)
+        self._set_waiting(self._waiting + 1)
+        logger.debug("Update for chat %s queued behind %s others", key.chat_id, len(queue.waiters) - 1)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The turn was handed over right before the cancellation, pass it on
+                self._leave(key)
+            elif waiter in queue.waiters:
+                queue.waiters.remove(waiter)
+                self._set_waiting(self._waiting - 1)
+            raise
+
+    def _leave(self, key: StorageKey) -> None:
+        queue = self._queues[key]
+        while queue.waiters:
+            waiter = queue.waiters.popleft()
+            self._set_waiting(self._waiting - 1)
+            # Skips waiters whose update was cancelled meanwhile
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        del self._queues[key]
+        UPDATE_QUEUE_KEYS.set(len(self._queues))
+
+    def _set_waiting(self, waiting: int) -> None:
+        self._waiting = waiting
+        UPDATE_QUEUE_DEPTH.set(waiting)
+
+    def depth(self, key: StorageKey) -> int:
+        """Number of updates of the chat waiting behind the one in progress."""
+        queue = self._queues.get(key)
+        return len(queue.waiters) if queue is not None else 0
+
+    @property
+    def waiting(self) -> int:
+        """Number of updates of all chats waiting behind an earlier update of their chat."""
+        return self._waiting
+
+    # Not __len__: aiogram falls back to no isolation when the one passed to the Dispatcher is falsy
+    @property
+    def keys(self) -> int:
+        """Number of keys with an update in progress."""
+        return len(self._queues)
@@ -0,0 +1,153 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from bot.enums.enums import BroadcastTarget, EventState
+from bot.enums.language import Language
+from bot.services.broadcast import Broadcaster
+from bot.services.database.models.event import DBEvent
+from bot.services.database.response import event as db_event
+from bot.telegram.handlers import handlers_config
+
+logger = logging.getLogger(__name__)
+
+# On equal deadlines a reminder fires before the start and a start before a completion
+_REMIND, _START, _COMPLETE = range(3)
+
+# Seconds to wait before retrying after a failed load or transition
+_RETRY_DELAY = 5.0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class EventScheduler:
+    """
+    Moves events through their timed states and reminds subscribers before an event starts.
+
+    Approved events become IN_PROGRESS at their start time and COMPLETED ``duration`` seconds later, subscribers
+    get a reminder broadcast ``remind_before`` seconds before the start. Only the deadlines of the next ``horizon``
+    seconds are loaded, with range scans on idx_event_state_dataTime, into a heap that is reloaded when the horizon
+    is reached and on ``wake``. Nothing is kept outside the database, so after a restart overdue deadlines fire
+    right away. Transitions only apply to events still in the expected state and reminders are claimed in the
+    database, so several instances never fire one twice. ``on_completed`` gets the ids of the events completed by
+    this instance.
+    """
+
+    def __init__(self,
+                 broadcaster: Broadcaster,
+                 duration: float = 3 * 3600,
+                 remind_before: float = 3600,
+                 horizon: float = 600,
+                 on_completed: Optional[Callable[[list[int]], None]] = None) -> None:
+        self.broadcaster = broadcaster
+        self.on_completed = on_completed
+        self.duration = timedelta(seconds=duration)
+        self.remind_before = timedelta(seconds=remind_before)
+        self.horizon = timedelta(seconds=horizon)
+        # Entries of (deadline, kind, event_id, start time)
+        self._heap: list[tuple[datetime, int, int, datetime]] = []
+        self._loaded_until: Optional[datetime] = None
+        self._reload = True
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="event-scheduler")
+        return self._task
+
+    def wake(self) -> None:
+        """Reloads the deadlines, called through the approval listener of the event repository."""
+        self._reload = True
+        self._wakeup.set()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        logger.info("Event scheduler started")
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Error in event scheduler: {e}")
+                self._reload = True
+                await asyncio.sleep(_RETRY_DELAY)
+
+    async def _tick(self) -> None:
+        now = _utcnow()
+        if self._reload or now >= self._loaded_until:
+            self._reload = False
+            await self._load(now)
+
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        if due:
+            await self._fire(due, now)
+            return
+
+        next_at = min(self._heap[0][0], self._loaded_until) if self._heap else self._loaded_until
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), (next_at - now).total_seconds())
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _load(self, now: datetime) -> None:
+        until = now + self.horizon
+        heap = []
+        for event_id, start in await db_event.get_event_times(EventState.APPROVED, until + self.remind_before,
+                                                              unreminded=True):
+            # Events that already started are not reminded any more
+            if start > now:
+                heap.append((start - self.remind_before, _REMIND, event_id, start))
+        for event_id, start in await db_event.get_event_times(EventState.APPROVED, until):
+            heap.append((start, _START, event_id, start))
+        for event_id, start in await db_event.get_event_times(EventState.IN_PROGRESS, until - self.duration):
+            heap.append((start + self.duration, _COMPLETE, event_id, start))
+
+        heapq.heapify(heap)
+        self._heap = heap
+        self._loaded_until = until
+        logger.debug("Loaded %s event deadlines until %s", len(heap), until)
+
+    async def _fire(self, due: list[tuple[datetime, int, int, datetime]], now: datetime) -> None:
+        batches: dict[int, list[tuple[int, datetime]]] = {_REMIND: [], _START: [], _COMPLETE: []}
+        for _, kind, event_id, start in due:
+            batches[kind].append((event_id, start))
+
+        if batches[_REMIND]:
+            for event in await db_event.claim_reminders([event_id for event_id, _ in batches[_REMIND]], now):
+                await self._remind(event)
+
+        if batches[_START]:
+            starts = dict(batches[_START])
+            started = await db_event.transition_events(starts, EventState.APPROVED, EventState.IN_PROGRESS)
+            # The completion of an event that started just now may fall into the loaded window
+            for event_id in started:
+                completes_at = starts[event_id] + self.duration
+                if completes_at <= self._loaded_until:
+                    heapq.heappush(self._heap, (completes_at, _COMPLETE, event_id, starts[event_id]))
+
+        if batches[_COMPLETE]:
+            completed = await db_event.transition_events([event_id for event_id, _ in batches[_COMPLETE]],
+                                                         EventState.IN_PROGRESS, EventState.COMPLETED)
+            if completed and self.on_completed is not None:
+                self.on_completed(completed)
+
+    async def _remind(self, event: DBEvent) -> None:
+        text = handlers_config.event_messages.get('event_reminder', Language.DEFAULT)
+        broadcast_id = await self.broadcaster.create(text.format(name=event.name, start=event.data_time[:16]),
+                                                     BroadcastTarget.EVENT, event.event_id)
+        self.broadcaster.spawn(broadcast_id)
+        logger.info("Reminder for event %s handed to broadcast %s", event.event_id, broadcast_id)
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Any, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from bot.services.database.response import media as db_media
+
+logger = logging.getLogger(__name__)
+
+ACHIEVEMENT_IMAGES_DIR = 'bot/constants/images/achievements'
+
+PHOTO = 'photo'
+DOCUMENT = 'document'
+
+# Lower-case fragments of the bad request descriptions Telegram gives for a file_id it no longer accepts
+_STALE_FILE_ID_ERRORS = (
+    'wrong file identifier',
+    'wrong remote file identifier',
+    'file reference expired',
+    'file_reference_expired',
+    'type of file mismatch',
+)
+
+
+def _is_stale_file_id(error: TelegramBadRequest) -> bool:
+    message = error.message.lower()
+    return any(fragment in message for fragment in _STALE_FILE_ID_ERRORS)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _Entry:
+    __slots__ = ('stat', 'content_hash', 'file_id')
+
+    def __init__(self, stat: tuple[int, int], content_hash: str, file_id: Optional[str]) -> None:
+        self.stat = stat
+        self.content_hash = content_hash
+        self.file_id = file_id
+
+
+class MediaService:
+    """
+    Sends local files through Telegram, uploading each file only once.
+
+    The file_id Telegram returns for an upload is stored with the SHA-256 of the file in ``media_files`` and reused
+    for later sends. A file is re-hashed only when its size or mtime changes, and re-uploaded when its content
+    changed or Telegram rejects the stored file_id as invalid (e.g. after the bot token changed). Any other error is
+    raised to the caller.
+    """
+
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+        self._entries: dict[tuple[str, str], _Entry] = {}
+        # Only held while uploading, so concurrent first sends of a file upload it once
+        self._upload_locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    async def send_photo(self, chat_id: int, path: str, **kwargs: Any) -> Message:
+        return await self._send(chat_id, path, PHOTO, kwargs)
+
+    async def send_document(self, chat_id: int, path: str, **kwargs: Any) -> Message:
+        return await self._send(chat_id, path, DOCUMENT, kwargs)
+
+    async def _send(self, chat_id: int, path: str, media_type: str, kwargs: dict[str, Any]) -> Message:
+        key = (os.path.normpath(path), media_type)
+        entry = await self._resolve(key)
+        if entry.file_id is not None:
+            try:
+                return await self._send_media(chat_id, media_type, entry.file_id, kwargs)
+            except TelegramBadRequest as e:
+                # Other bad requests, e.g. a caption too long, would fail the same way for an upload
+                if not _is_stale_file_id(e):
+                    raise
+                logger.warning("Stored file_id for %s was rejected, uploading again: %s", key[0], e.message)
+                entry.file_id = None
+                await db_media.delete_media_file(*key)
+
+        async with self._upload_locks.setdefault(key, asyncio.Lock()):
+            # Another send may have uploaded the file while this one waited
+            entry = await self._resolve(key)
+            if entry.file_id is not None:
+                return await self._send_media(chat_id, media_type, entry.file_id, kwargs)
+
+            logger.info("Uploading %s %s", media_type, key[0])
+            message = await self._send_media(chat_id, media_type, FSInputFile(key[0]), kwargs)
+            entry.file_id = message.photo[-1].file_id if media_type == PHOTO else message.document.file_id
+            await db_media.save_media_file(key[0], media_type, entry.content_hash, entry.file_id)
+            return message
+
+    async def _resolve(self, key: tuple[str, str]) -> _Entry:
+        path, media_type = key
+        stat_result = os.stat(path)
+        stat = (stat_result.st_mtime_ns, stat_result.st_size)
+        entry = self._entries.get(key)
+        if entry is not None and entry.stat == stat:
+            return entry
+
+        content_hash = await asyncio.to_thread(_hash_file, path)
+        entry = self._current(key, stat, content_hash)
+        if entry is not None:
+            return entry
+
+        stored = await db_media.get_media_file(path, media_type)
+        entry = self._current(key, stat, content_hash)
+        if entry is not None:
+            return entry
+
+        file_id = stored[1] if stored is not None and stored[0] == content_hash else None
+        if stored is not None and file_id is None:
+            logger.info("%s changed since its last upload", path)
+        entry = self._entries[key] = _Entry(stat, content_hash, file_id)
+        return entry
+
+    def _current(self, key: tuple[str, str], stat: tuple[int, int], content_hash: str) -> Optional[_Entry]:
+        # Concurrent sends resolve the same file, the first entry for a content wins so that its upload is shared
+        entry = self._entries.get(key)
+        if entry is None or entry.content_hash != content_hash:
+            return None
+        entry.stat = stat
+        return entry
+
+    async def _send_media(self, chat_id: int, media_type: str, media: Any, kwargs: dict[str, Any]) -> Message:
+        if media_type == PHOTO:
+            return await self.bot.send_photo(chat_id=chat_id, photo=media, **kwargs)
+        return await self.bot.send_document(chat_id=chat_id, document=media, **kwargs)
@@ -0,0 +1,222 @@
+import functools
+import logging
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Iterable, Optional, TypeVar
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Seconds, from a cached lookup to a slow Telegram round trip
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_T = TypeVar('_T')
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for label_values, value in self._values.items():
+            lines.append(f'{self.name}{_format_labels(self.label_names, label_values)} {value}')
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, *label_values: str) -> None:
+        self._values[label_values] = value
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        for label_values, value in self._values.items():
+            lines.append(f'{self.name}{_format_labels(self.label_names, label_values)} {value}')
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout, one series per combination of label values."""
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = _HistogramSeries(len(self.buckets))
+        # Only the first matching bucket is counted here, render accumulates them
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series.counts[index] += 1
+        series.sum += value
+        series.count += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series.count if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label_values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, label_values, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label_names, label_values, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {series.count}')
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f'{self.name}_sum{labels} {series.sum}')
+            lines.append(f'{self.name}_count{labels} {series.count}')
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def register(self, metric: _T) -> _T:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+UPDATE_DURATION = REGISTRY.register(Histogram(
+    'bot_update_duration_seconds', 'Time to process an update, including middlewares and filters.',
+    ('update_type',)))
+HANDLER_DURATION = REGISTRY.register(Histogram(
+    'bot_handler_duration_seconds', 'Time spent inside a handler.', ('handler',)))
+HANDLER_ERRORS = REGISTRY.register(Counter(
+    'bot_handler_errors_total', 'Exceptions raised by handlers.', ('handler', 'error')))
+DB_QUERY_DURATION = REGISTRY.register(Histogram(
+    'bot_db_query_duration_seconds', 'Time spent in a database response function.', ('function',)))
+DB_QUERY_ERRORS = REGISTRY.register(Counter(
+    'bot_db_query_errors_total', 'Exceptions raised by database response functions.', ('function', 'error')))
+DB_CONNECTION_WAIT = REGISTRY.register(Histogram(
+    'bot_db_connection_wait_seconds', 'Time waited for a pooled database connection.'))
+DB_CONNECTION_OPEN = REGISTRY.register(Histogram(
+    'bot_db_connection_open_seconds', 'Time to open a new database connection.'))
+UPDATE_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'bot_update_queue_depth', 'Updates waiting behind an earlier update of the same chat.'))
+UPDATE_QUEUE_KEYS = REGISTRY.register(Gauge(
+    'bot_update_queue_keys', 'Chats with an update being processed or waiting.'))
+UPDATES_IN_PROGRESS = REGISTRY.register(Gauge(
+    'bot_updates_in_progress', 'Updates currently being processed.'))
+UPDATE_QUEUE_WAIT = REGISTRY.register(Histogram(
+    'bot_update_queue_wait_seconds', 'Time an update waited for its chat and a free processing slot.'))
+TELEGRAM_REQUEST_DURATION = REGISTRY.register(Histogram(
+    'bot_telegram_request_duration_seconds', 'Bot API round trip time.', ('method',)))
+TELEGRAM_REQUEST_ERRORS = REGISTRY.register(Counter(
+    'bot_telegram_request_errors_total', 'Failed Bot API requests.', ('method', 'error')))
+
+
+def timed(func: Callable[..., Awaitable[_T]]) -> Callable[..., Awaitable[_T]]:
+    """
+    Records the duration and exceptions of a database response coroutine function.
+
+    The function is labelled as ``<module>.<name>``, e.g. ``user.get_user``.
+    """
+    label = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> _T:
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except BaseException as e:
+            DB_QUERY_ERRORS.inc(label, type(e).__name__)
+            raise
+        finally:
+            DB_QUERY_DURATION.observe(time.perf_counter() - started, label)
+
+    return wrapper
+
+
+async def _metrics_view(request: web.Request) -> web.Response:
+    return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8',
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+
+async def start_metrics_server(host: str, port: int, path: str = '/metrics') -> Optional[web.AppRunner]:
+    """
+    Serves the registry in Prometheus text format.
+
+    A port that is already taken, e.g. by another instance on the same host, is logged and the bot runs without
+    the endpoint.
+
+    :param port: Port to bind, 0 picks a free one.
+    :return: The runner, call ``cleanup`` on it to stop the server, or None if the port could not be bound.
+    """
+    app = web.Application()
+    app.router.add_get(path, _metrics_view)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=host, port=port).start()
+    except OSError as e:
+        logger.error(f"Metrics endpoint disabled, cannot bind {host}:{port}: {e}")
+        await runner.cleanup()
+        return None
+    bound_port = runner.addresses[0][1]
+    logger.info(f"Metrics served on http://{host}:{bound_port}{path}")
+    return runner
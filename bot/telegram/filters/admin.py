@@ -0,0 +1,11 @@
+from aiogram.filters import BaseFilter
+from aiogram.types import Message
+
+from bot.enums.enums import UserRole
+from bot.services.database.response import user as db_user
+
+
+class IsAdmin(BaseFilter):
+    async def __call__(self, message: Message) -> bool:
+        user = await db_user.get_user(tg_id=message.from_user.id)
+        return user is not None and user.role_id == UserRole.ADMIN.value
@@ -0,0 +1,21 @@
+from aiogram.filters import BaseFilter
+from aiogram.types import Message
+
+from bot.telegram.keyboards import keyboards_config
+
+
+class MenuButton(BaseFilter):
+    """
+    Matches a press of a main menu button in any locale.
+
+    :param keys: Button message keys from constants/keyboards/menu.xml, none means any menu button.
+    """
+
+    def __init__(self, *keys: str) -> None:
+        self.keys = frozenset(keys)
+
+    async def __call__(self, message: Message) -> bool:
+        if message.text is None:
+            return False
+        matched = keyboards_config.menu_keyboard_buttons.keys_for(message.text)
+        return bool(matched) if not self.keys else not self.keys.isdisjoint(matched)
@@ -1,3 +1,67 @@
-from aiogram import Router
+import logging
+from typing import Optional
+import aiosqlite as sql
+from aiogram import Router, types
+from aiogram.filters import Command, CommandObject
+
+from bot.enums.enums import BroadcastTarget
+from bot.services.broadcast import Broadcaster
+from bot.services.database.models.broadcast import BroadcastReport
+
+from bot.telegram.filters.admin import IsAdmin
+from bot.telegram.handlers import handlers_config as config
+from bot.services.database.response import user as db_user
+from bot.services.database.response import tribe as db_tribe
 
 router = Router(name=__name__)
+logger = logging.getLogger(__name__)
+
+
+@router.message(Command("rebuild_standings"), IsAdmin())
+async def rebuild_standings_command(message: types.Message):
+    logger.info("Admin with tg_id: %s requested tribe standings rebuild.", message.from_user.id)
+    user = await db_user.get_user(tg_id=message.from_user.id)
+    try:
+        await db_tribe.rebuild_tribe_standings()
+    except sql.Error as e:
+        logger.exception(f"Error rebuilding tribe standings: {e}")
+        await message.answer(config.admin_messages.get('standings_rebuild_failed', user.language))
+        return
+    await message.answer(config.admin_messages.get('standings_rebuilt', user.language))
+
+
+def _parse_broadcast_args(args: Optional[str]) -> Optional[tuple[BroadcastTarget, Optional[int], str]]:
+    # /broadcast all <text> | /broadcast tribe|role|event <id> <text>
+    parts = (args or '').split(maxsplit=1)
+    if len(parts) < 2:
+        return None
+    target = BroadcastTarget.__members__.get(parts[0].upper())
+    if target is None:
+        return None
+    if target is BroadcastTarget.ALL:
+        return target, None, parts[1]
+    rest = parts[1].split(maxsplit=1)
+    if len(rest) < 2 or not rest[0].isdigit():
+        return None
+    return target, int(rest[0]), rest[1]
+
+
+@router.message(Command("broadcast"), IsAdmin())
+async def broadcast_command(message: types.Message, command: CommandObject, broadcaster: Broadcaster):
+    user = await db_user.get_user(tg_id=message.from_user.id)
+    parsed = _parse_broadcast_args(command.args)
+    if parsed is None:
+        await message.answer(config.admin_messages.get('broadcast_usage', user.language))
+        return
+
+    target, target_id, text = parsed
+    logger.info("Admin with tg_id: %s started a broadcast to %s %s.", message.from_user.id, target.name, target_id)
+    broadcast_id = await broadcaster.create(text, target, target_id)
+
+    async def report_to_admin(report: BroadcastReport):
+        await message.answer(config.admin_messages.get('broadcast_finished', user.language).format(
+            broadcast_id=report.broadcast_id, sent=report.sent, blocked=report.blocked, failed=report.failed))
+
+    broadcaster.spawn(broadcast_id, on_finish=report_to_admin)
+    await message.answer(config.admin_messages.get('broadcast_started', user.language).format(
+        broadcast_id=broadcast_id))
@@ -1,7 +1,7 @@
 from typing import Final
 from aiogram import Router
 
-from . import menu, registration
+from . import menu, registration, search
 
 router: Final[Router] = Router(name=__name__)
-router.include_routers(registration.router, menu.router)
\ No newline at end of file
+router.include_routers(registration.router, menu.router, search.router)
\ No newline at end of file
@@ -8,63 +8,64 @@ from bot.enums.language import Language
 from bot.telegram.handlers import handlers_config as config
 from bot.telegram.keyboards import user as user_keyboards
 from bot.states.registration import RegistrationStates
+from bot.enums.enums import AchievementCounter
+from bot.services.achievements import AchievementEngine
+from bot.services.database.profile_buffer import ProfileBuffer
 from bot.services.database.response import user as db_user
-from bot.utils.json_loader import get_message
 
 router = Router(name=__name__)
 logger = logging.getLogger(__name__)
 
 
 @router.message(Command("start"))
-async def start_command(message: types.Message, state: FSMContext):
-    logger.info(f"User with tg_id: {message.from_user.id} initiated registration.")
+async def start_command(message: types.Message, state: FSMContext, profile_buffer: ProfileBuffer):
+    logger.info("User with tg_id: %s initiated registration.", message.from_user.id)
 
     user_id = message.from_user.id
     if await db_user.user_exists(tg_id=user_id):
         await state.set_state(RegistrationStates.registered)
         user = await db_user.get_user(tg_id=user_id)
-        # username = message.from_user.username
-        # await db_user.update_user_tg_teg(user_id, username)
-        # await message.answer(get_message('update_tag', Language.DEFAULT, config.menu_messages))
-        welcome_message = get_message('welcome_user', user.language, config.menu_messages)
+        # Written behind, /start must not wait for a commit
+        username = message.from_user.username
+        profile_buffer.touch(user_id, tg_teg='@' + username if username else None)
+        # await message.answer(config.menu_messages.get('update_tag', Language.DEFAULT))
+        welcome_message = config.menu_messages.get('welcome_user', user.language)
         await message.answer(welcome_message.format(first_name=user.name), reply_markup=user_keyboards.get_main_keyboard(user.language))
     else:
         await message.answer(
-            get_message('enter_secret_phrase', Language.DEFAULT, config.registration_messages))
+            config.registration_messages.get('enter_secret_phrase', Language.DEFAULT))
         await state.set_state(RegistrationStates.waiting_for_secret_phrase)
 
 
 @router.message(StateFilter(RegistrationStates.waiting_for_secret_phrase))
 async def enter_secret_phrase(message: types.Message, state: FSMContext):
-    logger.debug(f"User {message.from_user.id} entered secret phrase.")
+    logger.debug("User %s entered secret phrase.", message.from_user.id)
     if message.text == config.USER_SECRETKEY:
         await state.update_data(user_role='user')
-        await message.answer(get_message('enter_surname', Language.DEFAULT, config.registration_messages))
+        await message.answer(config.registration_messages.get('enter_surname', Language.DEFAULT))
         await state.set_state(RegistrationStates.waiting_for_surname)
     elif message.text == config.ADMIN_SECRETKEY:
         await state.update_data(user_role='admin')
-        await message.answer(get_message('enter_surname', Language.DEFAULT, config.registration_messages))
+        await message.answer(config.registration_messages.get('enter_surname', Language.DEFAULT))
         await state.set_state(RegistrationStates.waiting_for_surname)
     else:
-        await message.answer(get_message('invalid_secret_phrase',
-                                         Language.DEFAULT,
-                                         config.registration_messages))
+        await message.answer(config.registration_messages.get('invalid_secret_phrase', Language.DEFAULT))
 
 
 @router.message(StateFilter(RegistrationStates.waiting_for_surname))
 async def enter_surname(message: types.Message, state: FSMContext):
-    logger.debug(f"User {message.from_user.id} entered surname.")
+    logger.debug("User %s entered surname.", message.from_user.id)
     if message.text.isalpha():
         await state.update_data(surname=message.text)
-        await message.answer(get_message('enter_name', Language.DEFAULT, config.registration_messages))
+        await message.answer(config.registration_messages.get('enter_name', Language.DEFAULT))
         await state.set_state(RegistrationStates.waiting_for_name)
     else:
-        await message.answer(get_message('invalid_surname', Language.DEFAULT, config.registration_messages))
+        await message.answer(config.registration_messages.get('invalid_surname', Language.DEFAULT))
 
 
 @router.message(StateFilter(RegistrationStates.waiting_for_name))
-async def enter_name(message: types.Message, state: FSMContext):
-    logger.debug(f"User {message.from_user.id} entered name.")
+async def enter_name(message: types.Message, state: FSMContext, achievements: AchievementEngine):
+    logger.debug("User %s entered name.", message.from_user.id)
     if message.text.isalpha():
         user_data = await state.get_data()
         surname = user_data.get('surname')
@@ -73,19 +74,20 @@ async def enter_name(message: types.Message, state: FSMContext):
         user_role = user_data.get('user_role')
 
         if user_role == 'admin':
-            await db_user.add_admin(tg_id=message.from_user.id, name=username,
+            user_id = await db_user.add_admin(tg_id=message.from_user.id, name=username,
                                     language=message.from_user.language_code)
             await message.answer(
-                get_message('registration_successful', Language.DEFAULT, config.registration_messages))
+                config.registration_messages.get('registration_successful', Language.DEFAULT))
         else:
-            await db_user.add_user(tg_id=message.from_user.id, name=username,
+            user_id = await db_user.add_user(tg_id=message.from_user.id, name=username,
                                    language=message.from_user.language_code)
-            await message.answer(get_message('registration_successful',
-                                             Language.DEFAULT, config.registration_messages))
+            await message.answer(config.registration_messages.get('registration_successful', Language.DEFAULT))
 
+        # Evaluated in the background, the award is sent as a separate message
+        achievements.publish(AchievementCounter.REGISTERED, [user_id])
         await state.clear()
     else:
-        await message.answer(get_message('invalid_name', Language.DEFAULT, config.registration_messages))
+        await message.answer(config.registration_messages.get('invalid_name', Language.DEFAULT))
 
 # @router.message(Command("start"))
 # async def start_command(message: types.Message, bot: Bot):
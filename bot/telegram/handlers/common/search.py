@@ -0,0 +1,76 @@
+import logging
+from aiogram import Router, types
+from aiogram.fsm.context import FSMContext
+from aiogram.filters.state import StateFilter
+
+from bot.config import Config
+from bot.enums.enums import Tribe
+from bot.enums.language import Language
+from bot.exceptions.search import SearchTimeoutError
+from bot.services.database.models.user import DBUser
+from bot.services.database.response import user as db_user
+from bot.services.database.response.search import search_users
+from bot.states.search import SearchStates
+from bot.telegram.filters.menu import MenuButton
+from bot.telegram.handlers import handlers_config as config
+from bot.telegram.keyboards.user import SearchPage, get_search_keyboard
+
+router = Router(name=__name__)
+logger = logging.getLogger(__name__)
+
+
+def _format_results(users: list[DBUser], page: int, locale: str) -> str:
+    first = page * Config.SEARCH_PAGE_SIZE + 1
+    lines = [config.search_messages.get('results_header', locale).format(first=first, last=first + len(users) - 1)]
+    for number, user in enumerate(users, start=first):
+        tag = f" {user.tg_teg}" if user.tg_teg else ""
+        lines.append(f"{number}. {user.name}{tag} — {Tribe(user.tribe_id).name.capitalize()}")
+    return '\n'.join(lines)
+
+
+async def _search_page(query: str, page: int, locale: str) -> tuple[str, types.InlineKeyboardMarkup | None]:
+    try:
+        users, has_next = await search_users(query, limit=Config.SEARCH_PAGE_SIZE,
+                                             offset=page * Config.SEARCH_PAGE_SIZE, timeout=Config.SEARCH_TIMEOUT)
+    except SearchTimeoutError:
+        return config.search_messages.get('search_timeout', locale), None
+    if not users:
+        return config.search_messages.get('no_results', locale), None
+    return _format_results(users, page, locale), get_search_keyboard(page, has_next, locale)
+
+
+@router.message(MenuButton('search_participants'))
+async def search_command(message: types.Message, state: FSMContext):
+    logger.info("User with tg_id: %s opened participant search.", message.from_user.id)
+    user = await db_user.get_user(tg_id=message.from_user.id)
+    if user is None:
+        await message.answer(config.menu_messages.get('not_registered', Language.DEFAULT))
+        return
+    await state.set_state(SearchStates.waiting_for_query)
+    await message.answer(config.search_messages.get('enter_query', user.language))
+
+
+# Menu buttons leave the search, every other text is a new query
+@router.message(StateFilter(SearchStates.waiting_for_query), ~MenuButton())
+async def enter_query(message: types.Message, state: FSMContext):
+    logger.debug("User %s searched participants.", message.from_user.id)
+    user = await db_user.get_user(tg_id=message.from_user.id)
+    if user is None or not message.text:
+        return
+    # Pagination buttons only carry the page number, the query is kept in the FSM data
+    await state.update_data(search_query=message.text)
+    text, keyboard = await _search_page(message.text, 0, user.language)
+    await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query(SearchPage.filter())
+async def search_page(callback_query: types.CallbackQuery, callback_data: SearchPage, state: FSMContext):
+    user = await db_user.get_user(tg_id=callback_query.from_user.id)
+    locale = user.language if user is not None else Language.DEFAULT
+    query = (await state.get_data()).get('search_query')
+    if user is None or query is None:
+        await callback_query.answer(config.search_messages.get('search_expired', locale))
+        return
+    text, keyboard = await _search_page(query, callback_data.page, locale)
+    await callback_query.message.edit_text(text, reply_markup=keyboard)
+    await callback_query.answer()
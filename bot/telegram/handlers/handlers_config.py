@@ -1,4 +1,11 @@
-registration_messages: dict[str, dict[str, str]]
-menu_messages: dict[str, dict[str, str]]
+from bot.utils.localization import Catalog
+
+registration_messages: Catalog
+menu_messages: Catalog
+throttling_messages: Catalog
+admin_messages: Catalog
+search_messages: Catalog
+event_messages: Catalog
+achievement_messages: Catalog
 USER_SECRETKEY: str
 ADMIN_SECRETKEY: str
@@ -1 +1,3 @@
-menu_keyboard_buttons: dict[str, dict[str, str]]
+from bot.utils.localization import Catalog
+
+menu_keyboard_buttons: Catalog
@@ -0,0 +1,90 @@
+import logging
+from typing import Any, Callable, Iterable
+
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from pydantic import ConfigDict, field_serializer
+
+from bot.utils.localization import Catalog
+
+logger = logging.getLogger(__name__)
+
+
+class FrozenKeyboardButton(KeyboardButton):
+    """KeyboardButton that rejects attribute assignment."""
+
+    model_config = ConfigDict(frozen=True)
+
+
+class FrozenReplyKeyboardMarkup(ReplyKeyboardMarkup):
+    """
+    ReplyKeyboardMarkup that rejects attribute assignment and keeps its rows in tuples of frozen buttons, so it is
+    safe to share between updates.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    keyboard: tuple[tuple[FrozenKeyboardButton, ...], ...]
+
+    @field_serializer('keyboard')
+    def _serialize_keyboard(self, keyboard: tuple[tuple[FrozenKeyboardButton, ...], ...]) -> list[list[Any]]:
+        # aiogram only drops unset fields inside lists and dicts, so the rows are sent as lists
+        return [list(row) for row in keyboard]
+
+
+# name -> (catalog getter, rows of button keys, ReplyKeyboardMarkup options)
+_declarations: dict[str, tuple[Callable[[], Catalog], tuple[tuple[str, ...], ...], dict[str, Any]]] = {}
+_keyboards: dict[tuple[str, str], FrozenReplyKeyboardMarkup] = {}
+
+
+def declare_keyboard(name: str,
+                     rows: Iterable[Iterable[str]],
+                     catalog: Callable[[], Catalog],
+                     **options: Any) -> None:
+    """
+    Declare a reply keyboard to be built for every locale by ``build_keyboards``.
+
+    :param name: Unique keyboard name used with ``get_keyboard``.
+    :param rows: Rows of button message keys, e.g. [['profile', 'events'], ['store']].
+    :param catalog: Callable returning the catalog with the button texts, resolved at build time.
+    :param options: Extra ReplyKeyboardMarkup fields (e.g., resize_keyboard=True).
+    """
+    if name in _declarations:
+        raise ValueError(f"Keyboard '{name}' is already declared")
+    _declarations[name] = (catalog, tuple(tuple(row) for row in rows), options)
+
+
+def build_keyboards(locales: Iterable[str]) -> None:
+    """
+    Build every declared keyboard for every locale once.
+
+    :param locales: Locales to build the keyboards for.
+    :raises KeyError: If a button text is missing in a catalog.
+    """
+    locales = tuple(locales)
+    _keyboards.clear()
+    for name, (catalog_getter, rows, options) in _declarations.items():
+        catalog = catalog_getter()
+        for locale in locales:
+            _keyboards[name, locale] = FrozenReplyKeyboardMarkup(
+                keyboard=tuple(tuple(FrozenKeyboardButton(text=catalog.get(key, locale)) for key in row)
+                               for row in rows),
+                **options
+            )
+    logger.info(f"Built {len(_declarations)} keyboards for locales: {', '.join(locales)}")
+
+
+def get_keyboard(name: str, locale: str) -> ReplyKeyboardMarkup:
+    """
+    Returns the prebuilt keyboard. The instance, its rows and its buttons are immutable and shared between all
+    callers.
+
+    :param name: Keyboard name given to ``declare_keyboard``.
+    :param locale: The language of the buttons (e.g., 'en' for English, 'ru' for Russian).
+    :return: Shared ReplyKeyboardMarkup object.
+    :raises KeyError: If the keyboard was not declared or built for the locale.
+    """
+    try:
+        return _keyboards[name, locale]
+    except KeyError:
+        logger.error(f"Keyboard '{name}' is not built for locale '{locale}'")
+        raise
@@ -1 +1,2 @@
 from .main_keyboard import get_main_keyboard
+from .search_keyboard import SearchPage, get_search_keyboard
@@ -1,33 +1,27 @@
 import logging
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup
 
 from bot.telegram.keyboards import keyboards_config
-from bot.utils.json_loader import get_message
+from bot.telegram.keyboards.registry import declare_keyboard, get_keyboard
 
 logger = logging.getLogger(__name__)
 
+declare_keyboard(
+    'main',
+    [
+        ['profile', 'events'],
+        ['store', 'search_participants'],
+    ],
+    catalog=lambda: keyboards_config.menu_keyboard_buttons,
+    resize_keyboard=True
+)
+
 
 def get_main_keyboard(locale: str) -> ReplyKeyboardMarkup:
     """
-    Create the main keyboard with localized button texts.
+    Returns the main keyboard with localized button texts.
 
     :param locale: The language of the messages (e.g., 'en' for English, 'ru' for Russian).
-    :return: ReplyKeyboardMarkup object with localized buttons.
+    :return: Shared prebuilt ReplyKeyboardMarkup object with localized buttons.
     """
-    logger.debug(f"Creating main keyboard with locale '{locale}'")
-    try:
-        profile_text = get_message('profile', locale, keyboards_config.menu_keyboard_buttons)
-        events_text = get_message('events', locale, keyboards_config.menu_keyboard_buttons)
-        store_text = get_message('store', locale, keyboards_config.menu_keyboard_buttons)
-        search_participants_text = get_message('search_participants', locale, keyboards_config.menu_keyboard_buttons)
-    except KeyError as e:
-        logger.error(f"Error getting localized text: {e}")
-        raise
-
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text=profile_text), KeyboardButton(text=events_text)],
-            [KeyboardButton(text=store_text), KeyboardButton(text=search_participants_text)]
-        ],
-        resize_keyboard=True
-    )
+    return get_keyboard('main', locale)
@@ -0,0 +1,31 @@
+import logging
+from typing import Optional
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.telegram.handlers import handlers_config
+
+logger = logging.getLogger(__name__)
+
+
+class SearchPage(CallbackData, prefix='search'):
+    page: int
+
+
+def get_search_keyboard(page: int, has_next: bool, locale: str) -> Optional[InlineKeyboardMarkup]:
+    """
+    Returns the pagination buttons for a page of search results.
+
+    :param page: Zero-based number of the shown page.
+    :param has_next: Whether more results follow.
+    :param locale: The language of the messages (e.g., 'en' for English, 'ru' for Russian).
+    :return: Inline keyboard, or None when everything fits on one page.
+    """
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton(text=handlers_config.search_messages.get('previous_page', locale),
+                                            callback_data=SearchPage(page=page - 1).pack()))
+    if has_next:
+        buttons.append(InlineKeyboardButton(text=handlers_config.search_messages.get('next_page', locale),
+                                            callback_data=SearchPage(page=page + 1).pack()))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
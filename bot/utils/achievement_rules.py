@@ -0,0 +1,76 @@
+import logging
+import os
+import xml.etree.ElementTree as ET
+from typing import NamedTuple, Optional
+
+from bot.enums.enums import AchievementCounter
+from bot.exceptions.loading import IncompleteCatalogError, InvalidAchievementRuleError
+from bot.utils.localization import Catalog
+
+logger = logging.getLogger(__name__)
+
+
+class AchievementRule(NamedTuple):
+    achievement_id: str
+    counter: AchievementCounter
+    threshold: int
+    image: Optional[str] = None
+
+
+def load_achievement_rules(file_path: str, images_dir: str) -> list[AchievementRule]:
+    """
+    Load achievement rules from an XML file.
+
+    Every ``<achievement id="..." counter="..." threshold="..." image="..."/>`` is awarded once its counter reaches
+    the threshold. Counters are named after ``AchievementCounter`` in lower case, the image is optional.
+
+    :param file_path: Path to the XML file.
+    :param images_dir: Directory the image attributes are relative to.
+    :return: Rules in declaration order.
+    :raises InvalidAchievementRuleError: If a rule is incomplete, duplicated or names an unknown counter or a
+        missing image.
+    """
+    counters = {counter.name.lower(): counter for counter in AchievementCounter}
+    rules = []
+    seen = set()
+    for element in ET.parse(file_path).getroot().findall('achievement'):
+        achievement_id = element.get('id')
+        if not achievement_id:
+            raise InvalidAchievementRuleError(file_path, None, "missing id")
+        if achievement_id in seen:
+            raise InvalidAchievementRuleError(file_path, achievement_id, "duplicated id")
+        seen.add(achievement_id)
+
+        counter = counters.get(element.get('counter', ''))
+        if counter is None:
+            raise InvalidAchievementRuleError(file_path, achievement_id, f"unknown counter '{element.get('counter')}'")
+        try:
+            threshold = int(element.get('threshold', ''))
+        except ValueError:
+            threshold = 0
+        if threshold < 1:
+            raise InvalidAchievementRuleError(file_path, achievement_id, "threshold must be a positive integer")
+
+        image = element.get('image')
+        if image is not None:
+            image = os.path.join(images_dir, image)
+            if not os.path.isfile(image):
+                raise InvalidAchievementRuleError(file_path, achievement_id, f"image {image} not found")
+
+        rules.append(AchievementRule(achievement_id, counter, threshold, image))
+
+    logger.info(f"Loaded {len(rules)} achievement rules from {file_path}")
+    return rules
+
+
+def check_achievement_titles(rules: list[AchievementRule], catalog: Catalog, locales: list[str],
+                             catalog_path: str) -> None:
+    """
+    Check that the catalog has a title for every achievement in every locale.
+
+    :raises IncompleteCatalogError: If some title is missing.
+    """
+    missing = [f"{rule.achievement_id}/{locale}" for rule in rules for locale in locales
+               if (rule.achievement_id, locale) not in catalog]
+    if missing:
+        raise IncompleteCatalogError(catalog_path, missing)
@@ -1,6 +1,10 @@
 import xml.etree.ElementTree as ET
 import logging
 import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bot.utils.localization import Catalog
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -57,30 +61,14 @@ def load_from_xml(file_path: str) -> dict[str, dict[str, str]]:
     return messages
 
 
-def get_message(key: str, locale: str, messages: dict[str, dict[str, str]]) -> str:
+def get_message(key: str, locale: str, messages: 'Catalog') -> str:
     """
     Returns the message for the given key and locale.
 
-    :param key: The key to retrieve the message from the messages dictionary (e.g., 'welcome_user').
+    :param key: The key to retrieve the message from the catalog (e.g., 'welcome_user').
     :param locale: The language of the message (e.g., 'en' for English, 'ru' for Russian).
-    :param messages: The dictionary containing all the messages.
+    :param messages: The compiled catalog containing all the messages.
     :return: The message in the specified language.
-    :raises KeyError: If the key or locale is not found in the messages' dictionary.
+    :raises KeyError: If the key or locale is not found in the catalog.
     """
-    logger.debug(f"Starting get_message function with key: '{key}' and locale: '{locale}'")
-
-    # Retrieve the dictionary of messages for the given key
-    message_dict = messages.get(key)
-    if message_dict is None:
-        logger.error(f"Message key '{key}' not found.")
-        raise KeyError(f"Message key '{key}' not found.")
-
-    # Retrieve the message in the specified locale
-    message = message_dict.get(locale)
-    if message is None:
-        logger.error(f"Locale '{locale}' not found for message key '{key}'.")
-        raise KeyError(f"Locale '{locale}' not found for message key '{key}'.")
-
-    return message
-
-
+    return messages.get(key, locale)
@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+from typing import Iterable, Optional
+
+from bot.exceptions.loading import IncompleteCatalogError
+from bot.utils.json_loader import load_from_xml
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cache file layout changes so stale caches are recompiled
+_CACHE_FORMAT = 2
+
+
+class Catalog:
+    """
+    Compiled message catalog flattened to ``(key, locale) -> text``.
+
+    Lookups are a single dict access with no logging, so they are safe on hot paths. A reverse ``text -> keys``
+    index is built once on construction for matching incoming texts.
+    """
+
+    __slots__ = ('_messages', '_keys_by_text')
+
+    def __init__(self, messages: dict[tuple[str, str], str]) -> None:
+        self._messages = messages
+        keys_by_text: dict[str, set[str]] = {}
+        for (key, _), text in messages.items():
+            keys_by_text.setdefault(text, set()).add(key)
+        self._keys_by_text = {text: frozenset(keys) for text, keys in keys_by_text.items()}
+
+    def get(self, key: str, locale: str) -> str:
+        """
+        Returns the message for the given key and locale.
+
+        :param key: The message key (e.g., 'welcome_user').
+        :param locale: The language of the message (e.g., 'en' for English, 'ru' for Russian).
+        :return: The message in the specified language.
+        :raises KeyError: If the key or locale is not found in the catalog.
+        """
+        try:
+            return self._messages[key, locale]
+        except KeyError:
+            raise KeyError(f"Message key '{key}' with locale '{locale}' not found.") from None
+
+    def keys_for(self, text: str) -> frozenset[str]:
+        """
+        Returns the keys whose message is the given text in some locale.
+
+        :param text: Text to look up (e.g., a pressed button label).
+        :return: Matching message keys, empty if no message has this text.
+        """
+        return self._keys_by_text.get(text, frozenset())
+
+    def __contains__(self, item: tuple[str, str]) -> bool:
+        return item in self._messages
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+
+def compile_catalog(file_path: str, locales: Iterable[str]) -> Catalog:
+    """
+    Parse an XML messages file and check that every message is translated to every locale.
+
+    :param file_path: Path to the XML file.
+    :param locales: Locales every message must provide.
+    :return: Compiled catalog.
+    :raises IncompleteCatalogError: If some message lacks a required locale.
+    """
+    messages = {}
+    missing = []
+    for key, texts in load_from_xml(file_path).items():
+        for locale in locales:
+            if locale not in texts:
+                missing.append(f"{key}/{locale}")
+        for locale, text in texts.items():
+            messages[key, locale] = text
+
+    if missing:
+        raise IncompleteCatalogError(file_path, missing)
+    return Catalog(messages)
+
+
+def load_catalog(file_path: str, locales: Iterable[str], cache_dir: Optional[str] = None) -> Catalog:
+    """
+    Load a compiled catalog, reusing the cached compilation while the XML file is unchanged.
+
+    The cache is keyed by the source file's mtime and size, so editing the XML recompiles it. It is stored as
+    plain JSON rows of ``[key, locale, text]``, reading it never executes code.
+
+    :param file_path: Path to the XML file.
+    :param locales: Locales every message must provide.
+    :param cache_dir: Directory for compiled catalogs, caching is disabled if None.
+    :return: Compiled catalog.
+    """
+    locales = tuple(locales)
+    if cache_dir is None:
+        return compile_catalog(file_path, locales)
+
+    stat = os.stat(file_path)
+    # JSON has no tuples, the fingerprint is compared in the form it is read back in
+    fingerprint = [_CACHE_FORMAT, stat.st_mtime_ns, stat.st_size, list(locales)]
+    cache_path = os.path.join(cache_dir, os.path.normpath(file_path).replace(os.sep, '_') + '.json')
+
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            cached = json.load(file)
+        if cached['fingerprint'] == fingerprint:
+            messages = {(key, locale): text for key, locale, text in cached['messages']}
+            logger.debug("Catalog %s loaded from cache %s", file_path, cache_path)
+            return Catalog(messages)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable catalog cache {cache_path}: {e}")
+
+    catalog = compile_catalog(file_path, locales)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'fingerprint': fingerprint,
+                'messages': [[key, locale, text] for (key, locale), text in catalog._messages.items()],
+            }, file, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+        logger.debug("Catalog %s compiled to cache %s", file_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Failed to write catalog cache {cache_path}: {e}")
+    return catalog
@@ -1,9 +1,27 @@
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from queue import SimpleQueue
+from typing import Optional
+
+_listener: Optional[QueueListener] = None
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    QueueHandler for an in-process queue.
+
+    The stock handler formats every record before enqueueing it so that it can be pickled. Records
+    never leave the process here, so message interpolation is deferred to the listener thread too.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 # Logging configuration
 def configurate_logger(log_file: str, log_to_file: bool, log_to_console: bool, log_level: str):
+    global _listener
+
     # Set level for aiosqlite to WARNING or higher to ignore DEBUG and INFO logs
     logging.getLogger('aiosqlite').setLevel(logging.WARNING)
 
@@ -23,7 +41,23 @@ def configurate_logger(log_file: str, log_to_file: bool, log_to_console: bool, l
         console_handler.setFormatter(formatter)
         log_handlers.append(console_handler)
 
+    # File and console I/O happens on the listener thread, the event loop only enqueues records
+    stop_logger()
+    log_queue = SimpleQueue()
+    _listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+    _listener.start()
+
     logging.basicConfig(level=log_level,
                         format='%(asctime)s | %(levelname)s | %(name)s:%(funcName)s:%(lineno)s | %(message)s',
                         # datefmt='%d.%m.%Y %H:%M:%S',
-                        handlers=log_handlers)
+                        handlers=[_LocalQueueHandler(log_queue)],
+                        # Replaces the handler of a previous call, whose listener was just stopped
+                        force=True)
+
+
+def stop_logger():
+    """Flush queued records and stop the background logging thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to ``capacity`` tokens and refills at ``rate`` tokens per second.
+
+    Time is passed in explicitly so that callers handling many buckets read the clock once.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def consume(self, now: Optional[float] = None, tokens: float = 1) -> bool:
+        """
+        Try to take tokens from the bucket.
+
+        :return: True if enough tokens were available, False if the caller should be limited.
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def is_full(self, now: float) -> bool:
+        """A full bucket behaves exactly like a freshly created one and can be discarded."""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+    def delay(self, now: float, tokens: float = 1) -> float:
+        """Seconds until ``tokens`` can be consumed, 0 if they are available right now."""
+        self._refill(now)
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+
+class AsyncRateLimiter:
+    """
+    Waits instead of refusing: ``acquire`` returns once a token is available.
+
+    Acquisitions are served in arrival order, and ``pause`` holds everyone back, e.g. after a 429 with retry-after.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        self._bucket = TokenBucket(rate, capacity)
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._bucket.consume(now):
+                    return
+                await asyncio.sleep(self._bucket.delay(now))
+
+
+class KeyedRateLimiter:
+    """
+    One waiting token bucket per key, e.g. per chat.
+
+    Buckets are kept in LRU order and full ones are dropped, so memory is bounded by the recently active keys.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            bucket = next(iter(self._buckets.values()))
+            if not bucket.is_full(now):
+                break
+            self._buckets.popitem(last=False)
+
+    async def acquire(self, key: Hashable) -> None:
+        now = time.monotonic()
+        self._evict(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity, now)
+        self._buckets.move_to_end(key)
+        while not bucket.consume(now):
+            await asyncio.sleep(bucket.delay(now))
+            now = time.monotonic()
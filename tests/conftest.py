@@ -0,0 +1,36 @@
+import asyncio
+import os
+
+os.environ.setdefault('SUPERUSER_IDS', '1')
+
+import pytest
+
+from bot.enums.language import Language
+from bot.services.database.pool import close_pool
+from bot.services.database.response import user as db_user
+from bot.services.database.response import wallet as db_wallet
+from bot.services.database.response.base import initialize
+
+Language.DEFAULT = Language.EN
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / 'bot.db')
+
+
+@pytest.fixture
+def run_db(db_path):
+    """Runs a coroutine function against a freshly initialized database and closes the pool afterwards."""
+    def run(test, wallet_token_block_size: int = 100):
+        async def main():
+            # Module state would otherwise leak cached users and reserved tokens between databases
+            db_user.configure_user_cache(1000, None)
+            db_wallet.configure_wallet_tokens(wallet_token_block_size)
+            await initialize(db_path)
+            try:
+                return await test()
+            finally:
+                await close_pool()
+        return asyncio.run(main())
+    return run
@@ -0,0 +1,45 @@
+from bot.enums.enums import AchievementCounter
+from bot.services import achievements
+from bot.services.achievements import AchievementEngine
+from bot.services.database.pool import connection
+from bot.services.database.response import achievement as db_achievement
+from bot.services.database.response import ledger
+from bot.services.database.response import user as db_user
+
+
+async def _transfers_sent(user_id: int) -> int:
+    async with connection() as conn:
+        async with conn.execute('SELECT value FROM user_counters WHERE user_id = ? AND counter = ?',
+                                (user_id, AchievementCounter.TRANSFERS_SENT.value)) as cursor:
+            row = await cursor.fetchone()
+    return row[0] if row else 0
+
+
+def test_ledger_page_counted_by_another_evaluation_is_not_counted_again(run_db, monkeypatch):
+    async def test():
+        sender_id = await db_user.add_user(1001, "Sender")
+        await db_user.add_user(1002, "Receiver")
+        users = await db_user.get_users(tg_ids=(1001, 1002))
+        stale_cursor = await db_achievement.get_ledger_cursor()
+        await ledger.credit(users[1001].wallet_token, 500)
+        await ledger.transfer(users[1001].wallet_token, users[1002].wallet_token, 200)
+
+        first, second = (AchievementEngine(None, None, [], ledger_page_size=10) for _ in range(2))
+        assert not await first.evaluate()
+
+        # The second evaluation read the cursor before the first one committed
+        async def get_ledger_cursor():
+            monkeypatch.undo()
+            return stale_cursor
+        monkeypatch.setattr(achievements.db_achievement, 'get_ledger_cursor', get_ledger_cursor)
+        second.publish(AchievementCounter.TRANSFERS_SENT, [sender_id], 10)
+        retry = await second.evaluate()
+        discarded = await _transfers_sent(sender_id)
+        # The published deltas are kept and applied on the retry with the current cursor
+        assert not await second.evaluate()
+        return retry, discarded, await _transfers_sent(sender_id)
+
+    retry, discarded, counted = run_db(test)
+    assert retry
+    assert discarded == 1
+    assert counted == 11
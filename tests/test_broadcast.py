@@ -0,0 +1,37 @@
+import asyncio
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from bot.enums.enums import BroadcastTarget
+from bot.services import broadcast
+from bot.services.database.pool import connection
+from bot.services.database.response.broadcast import _RECIPIENTS_SQL
+
+
+class _FloodedBot:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def send_message(self, chat_id: int, text: str):
+        self.calls += 1
+        raise TelegramRetryAfter(method=SendMessage(chat_id=chat_id, text=text), message='Too Many Requests',
+                                 retry_after=0)
+
+
+def test_chat_that_keeps_hitting_flood_control_is_marked_failed():
+    bot = _FloodedBot()
+    broadcaster = broadcast.Broadcaster(bot, rate=1000, per_chat_rate=1000)
+
+    outcome = asyncio.run(asyncio.wait_for(broadcaster._send(1000, 'hello'), 5))
+    assert outcome == broadcast._FAILED
+    assert bot.calls == broadcast._MAX_FLOOD_RETRIES + 1
+
+
+def test_role_recipients_are_paged_through_an_index(run_db):
+    async def test():
+        async with connection() as conn:
+            async with conn.execute('EXPLAIN QUERY PLAN ' + _RECIPIENTS_SQL[BroadcastTarget.ROLE], (0, 0, 10)) as cursor:
+                return ' '.join(row[-1] for row in await cursor.fetchall())
+
+    assert 'idx_users_role' in run_db(test)
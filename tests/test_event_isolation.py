@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timezone
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.filters.state import StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Chat, Message, Update, User
+
+from bot.services.event_isolation import OrderedEventIsolation
+from bot.states.registration import RegistrationStates
+
+CHAT_ID = 1000
+
+
+def _update(update_id: int, text: str, chat_id: int = CHAT_ID) -> Update:
+    return Update(update_id=update_id, message=Message(
+        message_id=update_id, date=datetime.now(timezone.utc), text=text,
+        chat=Chat(id=chat_id, type='private'), from_user=User(id=chat_id, is_bot=False, first_name='Test')))
+
+
+def _dispatcher(handled: list[tuple[str, str]], limit: int = 8) -> Dispatcher:
+    router = Router()
+
+    @router.message(StateFilter(RegistrationStates.waiting_for_surname))
+    async def surname(message: Message, state: FSMContext):
+        handled.append(('surname', message.text))
+        # Gives a concurrent update of the chat the chance to read the old state
+        await asyncio.sleep(0.05)
+        await state.set_state(RegistrationStates.waiting_for_name)
+
+    @router.message(StateFilter(RegistrationStates.waiting_for_name))
+    async def name(message: Message, state: FSMContext):
+        handled.append(('name', message.text))
+        await asyncio.sleep(0.01)
+        await state.clear()
+
+    dp = Dispatcher(storage=MemoryStorage(), events_isolation=OrderedEventIsolation(limit))
+    dp.include_router(router)
+    return dp
+
+
+async def _set_surname_state(dp: Dispatcher, bot: Bot, chat_id: int) -> None:
+    state = dp.fsm.get_context(bot, chat_id=chat_id, user_id=chat_id)
+    await state.set_state(RegistrationStates.waiting_for_surname)
+
+
+def test_second_update_sees_state_set_by_first():
+    async def run():
+        handled = []
+        bot = Bot(token='42:TEST')
+        dp = _dispatcher(handled)
+        await _set_surname_state(dp, bot, CHAT_ID)
+        # Started in arrival order, as polling with handle_as_tasks does
+        await asyncio.gather(dp.feed_update(bot, _update(1, 'Ivanov')), dp.feed_update(bot, _update(2, 'Ivan')))
+        await bot.session.close()
+        return handled
+
+    assert asyncio.run(run()) == [('surname', 'Ivanov'), ('name', 'Ivan')]
+
+
+def test_chats_are_processed_concurrently_within_limit():
+    active = peak = 0
+
+    async def run():
+        nonlocal active, peak
+        handled = []
+        bot = Bot(token='42:TEST')
+        dp = _dispatcher(handled, limit=2)
+
+        @dp.update.outer_middleware()
+        async def count_holders(handler, event, data):
+            # Outer middlewares run inside the isolation lock
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            try:
+                return await handler(event, data)
+            finally:
+                active -= 1
+
+        chats = range(CHAT_ID, CHAT_ID + 4)
+        for chat_id in chats:
+            await _set_surname_state(dp, bot, chat_id)
+        await asyncio.gather(*(dp.feed_update(bot, _update(chat_id, 'Ivanov', chat_id)) for chat_id in chats))
+        await bot.session.close()
+        return handled
+
+    handled = asyncio.run(run())
+    assert len(handled) == 4
+    # Different chats overlap, but never more than the limit at once
+    assert peak == 2
@@ -0,0 +1,75 @@
+import aiosqlite as sql
+import pytest
+
+from bot.exceptions.wallet import InsufficientFundsError, WalletNotFoundError
+from bot.services.database.pool import connection
+from bot.services.database.response import ledger
+from bot.services.database.response import user as db_user
+
+
+async def _wallets(*tg_ids: int) -> list[int]:
+    for tg_id in tg_ids:
+        await db_user.add_user(tg_id, f"User {tg_id}")
+    users = await db_user.get_users(tg_ids=tg_ids)
+    return [users[tg_id].wallet_token for tg_id in tg_ids]
+
+
+async def _transaction_count() -> int:
+    async with connection() as conn:
+        async with conn.execute('SELECT COUNT(*) FROM wallet_transactions') as cursor:
+            return (await cursor.fetchone())[0]
+
+
+def test_transfer_moves_coins_and_records_one_transaction(run_db):
+    async def test():
+        sender, receiver = await _wallets(1001, 1002)
+        await ledger.credit(sender, 500)
+        count = await _transaction_count()
+        transaction_id = await ledger.transfer(sender, receiver, 200, 'gift')
+        transactions = await ledger.get_transactions(receiver)
+        return (await ledger.get_balance(sender), await ledger.get_balance(receiver),
+                await _transaction_count() - count, [row[:5] for row in transactions],
+                (transaction_id, sender, receiver, 200, 'gift'))
+
+    sender_balance, receiver_balance, written, transactions, expected = run_db(test)
+    assert (sender_balance, receiver_balance) == (300, 200)
+    assert written == 1
+    assert transactions == [expected]
+
+
+def test_transfer_with_insufficient_funds_writes_nothing(run_db):
+    async def test():
+        sender, receiver = await _wallets(1001, 1002)
+        await ledger.credit(sender, 100)
+        with pytest.raises(InsufficientFundsError):
+            await ledger.transfer(sender, receiver, 101)
+        return await ledger.get_balance(sender), await ledger.get_balance(receiver), await _transaction_count()
+
+    assert run_db(test) == (100, 0, 1)
+
+
+def test_credit_many_with_unknown_wallet_credits_nobody(run_db):
+    async def test():
+        known, = await _wallets(1001)
+        with pytest.raises(WalletNotFoundError) as error:
+            await ledger.credit_many([(known, 100), (999_999, 100)])
+        return error.value.wallet_token, await ledger.get_balance(known), await _transaction_count()
+
+    assert run_db(test) == (999_999, 0, 0)
+
+
+@pytest.mark.parametrize('statement', [
+    'UPDATE wallet_transactions SET amount = amount + 1',
+    'DELETE FROM wallet_transactions',
+])
+def test_ledger_is_append_only(run_db, statement):
+    async def test():
+        wallet, = await _wallets(1001)
+        await ledger.credit(wallet, 100)
+        async with connection() as conn:
+            with pytest.raises(sql.IntegrityError, match='append-only'):
+                await conn.execute(statement)
+            await conn.rollback()
+        return await _transaction_count()
+
+    assert run_db(test) == 1
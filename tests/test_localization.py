@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from bot.utils import localization
+from bot.utils.localization import load_catalog
+
+MESSAGES = '''<messages>
+    <message id="greeting">
+        <text lang="en">Hello</text>
+        <text lang="ru">Привет</text>
+    </message>
+</messages>
+'''
+
+
+@pytest.fixture
+def messages_path(tmp_path) -> str:
+    path = tmp_path / 'messages.xml'
+    path.write_text(MESSAGES, encoding='utf-8')
+    return str(path)
+
+
+def test_catalog_is_cached_as_json_and_reused(tmp_path, messages_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    compiled = load_catalog(messages_path, ['en', 'ru'], cache_dir)
+    cache_files = os.listdir(cache_dir)
+    with open(os.path.join(cache_dir, cache_files[0]), encoding='utf-8') as file:
+        cached = json.load(file)
+
+    def compile_catalog(*args):
+        raise AssertionError("Catalog recompiled despite an up-to-date cache")
+    monkeypatch.setattr(localization, 'compile_catalog', compile_catalog)
+    loaded = load_catalog(messages_path, ['en', 'ru'], cache_dir)
+
+    assert len(cache_files) == 1
+    assert sorted(cached['messages']) == [['greeting', 'en', 'Hello'], ['greeting', 'ru', 'Привет']]
+    assert loaded.get('greeting', 'ru') == compiled.get('greeting', 'ru') == 'Привет'
+    assert loaded.keys_for('Hello') == {'greeting'}
+
+
+def test_changed_source_or_corrupt_cache_is_recompiled(tmp_path, messages_path):
+    cache_dir = str(tmp_path / 'cache')
+    load_catalog(messages_path, ['en', 'ru'], cache_dir)
+    cache_path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+
+    with open(messages_path, 'w', encoding='utf-8') as file:
+        file.write(MESSAGES.replace('Hello', 'Hi there'))
+    assert load_catalog(messages_path, ['en', 'ru'], cache_dir).get('greeting', 'en') == 'Hi there'
+
+    with open(cache_path, 'w', encoding='utf-8') as file:
+        file.write('not json')
+    assert load_catalog(messages_path, ['en', 'ru'], cache_dir).get('greeting', 'en') == 'Hi there'
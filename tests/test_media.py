@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendPhoto
+
+from bot.services.database.response import media as db_media
+from bot.services.media import PHOTO, MediaService
+
+
+class _Bot:
+    """Accepts uploads and rejects sends by file_id with the queued bad request descriptions."""
+
+    def __init__(self, *errors: str) -> None:
+        self.errors = list(errors)
+        self.uploads = 0
+
+    async def send_photo(self, chat_id: int, photo, **kwargs):
+        if isinstance(photo, str) and self.errors:
+            raise TelegramBadRequest(SendPhoto(chat_id=chat_id, photo=photo), self.errors.pop(0))
+        if not isinstance(photo, str):
+            self.uploads += 1
+            photo = f'file-{self.uploads}'
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=photo)])
+
+
+@pytest.fixture
+def image(tmp_path) -> str:
+    path = tmp_path / 'image.png'
+    path.write_bytes(b'image')
+    return str(path)
+
+
+def test_rejected_file_id_is_uploaded_again(run_db, image):
+    async def test():
+        bot = _Bot("Bad Request: wrong file identifier/HTTP URL specified")
+        media = MediaService(bot)
+        await media.send_photo(1, image)
+        message = await media.send_photo(1, image)
+        return bot.uploads, message.photo[-1].file_id, (await db_media.get_media_file(image, PHOTO))[1]
+
+    assert run_db(test) == (2, 'file-2', 'file-2')
+
+
+def test_other_bad_request_keeps_the_file_id(run_db, image):
+    async def test():
+        bot = _Bot("Bad Request: message caption is too long")
+        media = MediaService(bot)
+        await media.send_photo(1, image)
+        with pytest.raises(TelegramBadRequest):
+            await media.send_photo(1, image, caption='x' * 2000)
+        message = await media.send_photo(1, image)
+        return bot.uploads, message.photo[-1].file_id, (await db_media.get_media_file(image, PHOTO))[1]
+
+    assert run_db(test) == (1, 'file-1', 'file-1')
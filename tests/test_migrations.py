@@ -0,0 +1,136 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from bot.services.database.pool import close_pool
+from bot.services.database.response.base import SCHEMA_VERSION, initialize
+from bot.services.database.response.wallet import RESERVED_WALLET_TOKENS
+
+# Schema and seed rows as created before schema versioning, balances were REAL coins
+BASELINE_SCHEMA = '''
+CREATE TABLE users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tg_id INTEGER UNIQUE NOT NULL,
+    tg_teg TEXT UNIQUE,
+    name TEXT NOT NULL,
+    tribe_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    wallet_token INTEGER UNIQUE NOT NULL,
+    language TEXT NOT NULL,
+    description TEXT,
+    photo_path TEXT
+);
+CREATE TABLE tribes (
+    tribe_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tribe_name TEXT NOT NULL,
+    wallet_token INTEGER NOT NULL
+);
+CREATE TABLE event (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    description TEXT,
+    dataTime TEXT NOT NULL,
+    owner_id INTEGER NOT NULL,
+    approver_id INTEGER NOT NULL,
+    state INTEGER NOT NULL
+);
+CREATE TABLE eventStates (eventState_id INTEGER PRIMARY KEY AUTOINCREMENT, state TEXT NOT NULL);
+CREATE TABLE event_subscribers (event_id INTEGER NOT NULL, subscriber_id INTEGER NOT NULL);
+CREATE TABLE wallets (wallet_token INTEGER PRIMARY KEY AUTOINCREMENT UNIQUE, balance REAL DEFAULT 0);
+CREATE TABLE userRoles (userRole_id INTEGER PRIMARY KEY AUTOINCREMENT, role_name TEXT NOT NULL);
+
+INSERT INTO eventStates VALUES (0, 'on_review'), (1, 'approved'), (2, 'rejected'), (3, 'in_progress'),
+                               (4, 'completed');
+INSERT INTO userRoles VALUES (0, 'user'), (1, 'admin');
+INSERT INTO wallets VALUES (1, 2.5), (2, 0), (700000001, 12.34), (700000002, 0.5);
+INSERT INTO tribes VALUES (1, 'Aqua', 1), (2, 'Ignis', 2);
+INSERT INTO users (user_id, tg_id, tg_teg, name, tribe_id, role_id, wallet_token, language) VALUES
+    (1, 700000001, '@ivanov', 'Ivanov Ivan', 1, 1, 700000001, 'ru'),
+    (2, 700000002, NULL, 'Petrov Petr', 1, 0, 700000002, 'en');
+INSERT INTO event VALUES (1, 'Game night', NULL, '2024-05-01 18:00:00', 2, 1, 1);
+INSERT INTO event_subscribers VALUES (1, 2);
+'''
+
+
+def _initialize(db_path: str) -> None:
+    async def run():
+        try:
+            await initialize(db_path)
+        finally:
+            await close_pool()
+    asyncio.run(run())
+
+
+def _dump(db_path: str) -> list[str]:
+    with sqlite3.connect(db_path) as conn:
+        return list(conn.iterdump())
+
+
+def _query(db_path: str, sql: str, parameters=()) -> list[tuple]:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(sql, parameters).fetchall()
+
+
+@pytest.fixture
+def migrated_db(db_path) -> str:
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+    _initialize(db_path)
+    return db_path
+
+
+def test_baseline_database_is_migrated_and_keeps_its_data(migrated_db):
+    assert _query(migrated_db, 'PRAGMA user_version') == [(SCHEMA_VERSION,)]
+    # REAL coins became INTEGER minor units
+    assert _query(migrated_db, 'SELECT wallet_token, balance, typeof(balance) FROM wallets ORDER BY 1') == [
+        (1, 250, 'integer'), (2, 0, 'integer'), (700000001, 1234, 'integer'), (700000002, 50, 'integer')]
+    assert _query(migrated_db, 'SELECT user_id, tg_id, tg_teg, name, tribe_id, wallet_token FROM users ORDER BY 1') == [
+        (1, 700000001, '@ivanov', 'Ivanov Ivan', 1, 700000001), (2, 700000002, None, 'Petrov Petr', 1, 700000002)]
+    assert _query(migrated_db, 'SELECT event_id, owner_id, approver_id, state, reminded FROM event') == [
+        (1, 2, 1, 1, 0)]
+    assert _query(migrated_db, 'SELECT event_id, subscriber_id FROM event_subscribers') == [(1, 2)]
+
+
+def test_second_initialize_is_a_no_op(migrated_db):
+    before = _dump(migrated_db)
+    _initialize(migrated_db)
+    assert _dump(migrated_db) == before
+
+
+def test_event_approver_is_optional_after_migration(migrated_db):
+    with sqlite3.connect(migrated_db) as conn:
+        conn.execute("INSERT INTO event (name, dataTime, owner_id, state) VALUES ('New', '2024-06-01 10:00:00', 2, 0)")
+    assert _query(migrated_db, "SELECT approver_id FROM event WHERE name = 'New'") == [(None,)]
+
+
+def test_tribe_standings_follow_balances_and_members(migrated_db):
+    standings = 'SELECT tribe_id, member_count, member_balance, tribe_balance FROM tribe_standings ORDER BY 1'
+    assert _query(migrated_db, standings) == [(1, 2, 1284, 250), (2, 0, 0, 0)]
+
+    with sqlite3.connect(migrated_db) as conn:
+        conn.execute('UPDATE wallets SET balance = balance + 100 WHERE wallet_token = 700000002')
+        conn.execute('UPDATE wallets SET balance = balance + 7 WHERE wallet_token = 2')
+        conn.execute('UPDATE users SET tribe_id = 2 WHERE user_id = 1')
+    assert _query(migrated_db, standings) == [(1, 1, 150, 250), (2, 1, 1234, 7)]
+
+
+def test_search_index_is_built_and_kept_in_sync(migrated_db):
+    search = "SELECT rowid FROM users_fts WHERE users_fts MATCH ? ORDER BY rowid"
+    assert _query(migrated_db, search, ('iva*',)) == [(1,)]
+
+    with sqlite3.connect(migrated_db) as conn:
+        conn.execute("UPDATE users SET name = 'Sidorov Ivan' WHERE user_id = 2")
+        conn.execute('DELETE FROM users WHERE user_id = 1')
+    assert _query(migrated_db, search, ('iva*',)) == [(2,)]
+    assert _query(migrated_db, search, ('petr*',)) == []
+
+
+def test_wallet_tokens_continue_above_existing_ones(migrated_db):
+    assert _query(migrated_db, "SELECT next_value FROM sequences WHERE name = 'wallet_token'") == [(700000003,)]
+
+
+def test_new_database_starts_wallet_tokens_above_reserved_ones(db_path):
+    _initialize(db_path)
+    assert _query(db_path, "SELECT next_value FROM sequences WHERE name = 'wallet_token'") == [
+        (RESERVED_WALLET_TOKENS + 1,)]
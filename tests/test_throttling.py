@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timezone
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Chat, Message, Update, User
+
+from bot.middlewares.throttling import ThrottlingMiddleware
+from bot.services.event_isolation import OrderedEventIsolation
+
+CHAT_ID = 1000
+
+
+def _update(update_id: int) -> Update:
+    return Update(update_id=update_id, message=Message(
+        message_id=update_id, date=datetime.now(timezone.utc), text=str(update_id),
+        chat=Chat(id=CHAT_ID, type='private'), from_user=User(id=CHAT_ID, is_bot=False, first_name='Test')))
+
+
+class _CountingStorage(MemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.state_reads = 0
+
+    async def get_state(self, key):
+        self.state_reads += 1
+        return await super().get_state(key)
+
+
+def test_throttled_updates_never_read_state(monkeypatch):
+    notified = []
+
+    async def notify(event, user):
+        notified.append(user.id)
+
+    monkeypatch.setattr(ThrottlingMiddleware, '_notify', staticmethod(notify))
+
+    async def run():
+        handled = []
+        router = Router()
+
+        @router.message()
+        async def echo(message: Message):
+            handled.append(message.text)
+
+        storage = _CountingStorage()
+        # Registered as in the loader: throttling ahead of the FSM middleware
+        dp = Dispatcher(storage=storage, events_isolation=OrderedEventIsolation(8), disable_fsm=True)
+        dp.update.outer_middleware(ThrottlingMiddleware(rate=0.001, burst=2))
+        dp.update.outer_middleware(dp.fsm)
+        dp.include_router(router)
+
+        bot = Bot(token='42:TEST')
+        await asyncio.gather(*(dp.feed_update(bot, _update(update_id)) for update_id in range(5)))
+        await bot.session.close()
+        return handled, storage.state_reads
+
+    handled, state_reads = asyncio.run(run())
+    assert handled == ['0', '1']
+    assert state_reads == 2
+    assert notified == [CHAT_ID]
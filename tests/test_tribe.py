@@ -0,0 +1,20 @@
+from bot.services.database.pool import connection
+from bot.services.database.response import tribe as db_tribe
+
+
+async def _next_wallet_token() -> int:
+    async with connection() as conn:
+        async with conn.execute("SELECT next_value FROM sequences WHERE name = 'wallet_token'") as cursor:
+            return (await cursor.fetchone())[0]
+
+
+def test_duplicate_tribe_does_not_reserve_wallet_tokens(run_db):
+    async def test():
+        await db_tribe.add_tribe('Extra')
+        reserved = await _next_wallet_token()
+        await db_tribe.add_tribe('Extra')
+        return reserved, await _next_wallet_token()
+
+    reserved, after_duplicate = run_db(test, wallet_token_block_size=1)
+    assert after_duplicate == reserved
+